@@ -17,35 +17,45 @@ migrate = Migrate()
 jwt = JWTManager()
 
 def create_app(config_env=None):
+    # Time each startup phase (printed when STARTUP_PROFILE is enabled)
+    from app.utils.startup_profile import StartupProfile
+    profile = StartupProfile()
+
     app = Flask(__name__)
     
-    # Get configuration from environment or argument
-    if config_env is None:
-        config_env = os.environ.get('FLASK_ENV', 'development')
-    
-    # Import configuration
-    from config import config_dict
-    app.config.from_object(config_dict[config_env])
+    with profile.phase('config'):
+        # Get configuration from environment or argument
+        if config_env is None:
+            config_env = os.environ.get('FLASK_ENV', 'development')
+        
+        # Import configuration
+        from config import config_dict
+        app.config.from_object(config_dict[config_env])
     
     # Print which configuration is being used
     print(f"Running with {config_env} configuration")
     
-    # Initialize extensions
-    db.init_app(app)
-    migrate.init_app(app, db)
-    jwt.init_app(app)
-    
-    # Set up CORS - allow specific origins for API routes
-    CORS(app, resources={r"/api/*": {"origins": [
-        "http://localhost:5173",
-        "https://mealmind-2k6u3ud5g-ranggajs-projects.vercel.app",
-        "https://mealmind-ranggajs-projects.vercel.app",
-        "*"  # Keep wildcard for development
-    ]}}, 
-         allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
-         expose_headers=["Content-Type", "Authorization"],
-         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-         supports_credentials=True)
+    with profile.phase('extensions'):
+        # Initialize extensions
+        db.init_app(app)
+        migrate.init_app(app, db)
+        jwt.init_app(app)
+        
+        # Set up CORS - allow specific origins for API routes
+        CORS(app, resources={r"/api/*": {"origins": [
+            "http://localhost:5173",
+            "https://mealmind-2k6u3ud5g-ranggajs-projects.vercel.app",
+            "https://mealmind-ranggajs-projects.vercel.app",
+            "*"  # Keep wildcard for development
+        ]}}, 
+             allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
+             expose_headers=["Content-Type", "Authorization"],
+             methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+             supports_credentials=True)
+        
+        # Per-user cache of calendar responses (see app/utils/response_cache.py)
+        from app.utils.response_cache import init_response_cache
+        init_response_cache(app)
     
     # Add a simple test route first
     @app.route('/')
@@ -54,34 +64,48 @@ def create_app(config_env=None):
     
     # Import and register blueprints
     with app.app_context():
-        # Import blueprints
-        from app.routes.auth import auth_bp
-        from app.routes.profile import profile_bp
-        from app.routes.recommendations import recommendations_bp
-        from app.routes.activities import activities_bp
-        from app.routes.user import user_bp
-        from app.routes.progress import progress_bp
-        
-        # Register blueprints
-        app.register_blueprint(auth_bp, url_prefix='/api/auth')
-        app.register_blueprint(profile_bp, url_prefix='/api/profile')
-        app.register_blueprint(recommendations_bp, url_prefix='/api/recommendations')
-        app.register_blueprint(activities_bp, url_prefix='/api/activities')
-        app.register_blueprint(user_bp, url_prefix='/api/user')
-        app.register_blueprint(progress_bp, url_prefix='/api/progress')
+        with profile.phase('blueprints'):
+            # Import blueprints
+            from app.routes.auth import auth_bp
+            from app.routes.profile import profile_bp
+            from app.routes.recommendations import recommendations_bp
+            from app.routes.activities import activities_bp
+            from app.routes.user import user_bp
+            from app.routes.progress import progress_bp
+            from app.routes.foods import foods_bp
+            
+            # Register blueprints
+            app.register_blueprint(auth_bp, url_prefix='/api/auth')
+            app.register_blueprint(profile_bp, url_prefix='/api/profile')
+            app.register_blueprint(recommendations_bp, url_prefix='/api/recommendations')
+            app.register_blueprint(activities_bp, url_prefix='/api/activities')
+            app.register_blueprint(user_bp, url_prefix='/api/user')
+            app.register_blueprint(progress_bp, url_prefix='/api/progress')
+            app.register_blueprint(foods_bp, url_prefix='/api/foods')
         
-        # Print all registered routes
-        print("========================")
-        for rule in app.url_map.iter_rules():
-            print(f"{rule.methods} {rule.rule}")
-        print("========================")
+        # Print all registered routes (opt-in, one line per route)
+        if app.config.get('PRINT_ROUTES'):
+            print("========================")
+            for rule in app.url_map.iter_rules():
+                print(f"{rule.methods} {rule.rule}")
+            print("========================")
         
         # Create database tables
-        try:
-            print("Creating database tables...")
-            db.create_all()
-            print("Database tables created successfully")
-        except Exception as e:
-            print(f"Error creating database tables: {e}")
+        with profile.phase('db init'):
+            try:
+                print("Creating database tables...")
+                db.create_all()
+                print("Database tables created successfully")
+            except Exception as e:
+                print(f"Error creating database tables: {e}")
+    
+    # Resume plan generation jobs left over from a previous run
+    with profile.phase('plan jobs'):
+        from app.utils.plan_jobs import resume_plan_jobs
+        resume_plan_jobs(app)
+    
+    app.extensions['startup_profile'] = profile
+    if app.config.get('STARTUP_PROFILE'):
+        print(profile.format_report())
             
     return app
\ No newline at end of file
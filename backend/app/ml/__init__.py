@@ -1,14 +1,30 @@
-from app.ml.food_database import USDAFoodDatabase
-from app.ml.advanced_recommendation_engine import AdvancedRecommendationEngine
-from app.ml.diet_progress_analyzer import DietProgressAnalyzer
-from app.ml.recommendation_engine import MealRecommendationEngine
-from app.ml.model_serializer import ModelSerializer
+# Components are imported on first attribute access (PEP 562): importing
+# app.ml, or a route that only needs the registry, must not pull in pandas,
+# scikit-learn and numpy before an engine is actually used.
+import importlib
+
+# Public name -> module that defines it
+_EXPORTS = {
+    'USDAFoodDatabase': 'app.ml.food_database',
+    'AdvancedRecommendationEngine': 'app.ml.advanced_recommendation_engine',
+    'DietProgressAnalyzer': 'app.ml.diet_progress_analyzer',
+    'MealRecommendationEngine': 'app.ml.recommendation_engine',
+    'ModelSerializer': 'app.ml.model_serializer',
+    'get_recommendation_engine': 'app.ml.engine_registry',
+}
 
 # Export the upgraded components
-__all__ = [
-    'USDAFoodDatabase',
-    'AdvancedRecommendationEngine',
-    'DietProgressAnalyzer',
-    'MealRecommendationEngine',
-    'ModelSerializer'
-]
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -5,11 +5,13 @@ from datetime import date, datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 import os
-from sklearn.metrics.pairwise import cosine_similarity
 from collections import defaultdict
 
 from app.ml.food_database import USDAFoodDatabase
 from app.ml.model_serializer import ModelSerializer
+from app.ml.food_similarity import (
+    FoodSimilarityIndex, DEFAULT_TOP_K, MAX_STARTUP_BUILD_FOODS, food_text
+)
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +21,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger('recommendation_engine')
 
+# Approximate nearest-neighbour index, see scripts/build_food_similarity.py
+FOOD_ANN_INDEX_PATH = "models/food_ann_index"
+
 class AdvancedRecommendationEngine:
     """
     Advanced recommendation engine that leverages machine learning 
@@ -34,7 +39,10 @@ class AdvancedRecommendationEngine:
             food_db_path: Path to SQLite food database
             api_key: USDA FoodData Central API key
         """
-        self.food_db = USDAFoodDatabase(db_path=food_db_path, api_key=api_key)
+        # USDAFoodDatabase keeps one pooled connection per thread, so a single
+        # handle can be shared by every request served by this engine. Meal
+        # candidates are filtered from the in-memory catalog snapshot.
+        self.food_db = USDAFoodDatabase(db_path=food_db_path, api_key=api_key, use_catalog=True)
         
         # Ensure the database has some initial data
         self.food_db.seed_default_foods()
@@ -69,6 +77,97 @@ class AdvancedRecommendationEngine:
             food_data=self.food_db.get_all_foods(limit=1000),
             model_path="models/tfidf_vectorizer.joblib"
         )
+        
+        # Top-k similar foods per food, precomputed with the vectorizer.
+        # Small catalogs are (re)indexed here if needed; large ones need
+        # scripts/build_food_similarity.py
+        self.similarity_index = None
+        if self.vectorizer is not None:
+            try:
+                self.similarity_index = FoodSimilarityIndex.load_or_build(
+                    "models/food_similarity",
+                    self.food_db.get_catalog(),
+                    self.vectorizer,
+                    max_build_foods=MAX_STARTUP_BUILD_FOODS
+                )
+            except Exception as e:
+                logger.error(f"Food similarity index unavailable: {str(e)}")
+        
+        # Approximate nearest-neighbour index for foods missing from the
+        # table above; built by scripts/build_food_similarity.py --ann
+        self.ann_index = None
+        if self.vectorizer is not None and os.path.exists(FOOD_ANN_INDEX_PATH):
+            self.ann_index = ModelSerializer.initialize_ann_index(
+                self.vectorizer, model_path=FOOD_ANN_INDEX_PATH
+            )
+    
+    def _similar_food_ids(self, food_id: int) -> List[Tuple[int, float]]:
+        """
+        (food_id, similarity) pairs from the precomputed table, or from the
+        approximate index for foods the table doesn't cover
+        """
+        if self.similarity_index is not None and self.similarity_index.contains(food_id):
+            return self.similarity_index.similar(food_id)
+        if self.ann_index is None:
+            return []
+        
+        catalog = self.food_db.get_catalog()
+        food = catalog.get_rows(catalog.positions_of([food_id]))
+        if not food:
+            return []
+        ids, scores = self.ann_index.search(
+            self.vectorizer.transform([food_text(food[0])]), DEFAULT_TOP_K + 1
+        )
+        return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0 and i != food_id]
+    
+    def similar_foods(self,
+                      food_id: int,
+                      k: int = 5,
+                      meal_type: Optional[str] = None,
+                      min_calories: Optional[float] = None,
+                      max_calories: Optional[float] = None,
+                      dietary_restrictions: List[str] = None,
+                      exclude_foods: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the foods most similar to a food, from the precomputed index
+        
+        Only the stored neighbours are read and filtered, so fewer than k
+        foods are returned when filters reject some of them.
+        
+        Args:
+            food_id: Food ID
+            k: Number of foods to return
+            meal_type: Only foods mapped to this meal type
+            min_calories: Minimum calories
+            max_calories: Maximum calories
+            dietary_restrictions: Foods whose name contains any of these are dropped
+            exclude_foods: Food names to drop
+            
+        Returns:
+            List of food dictionaries with a 'similarity' score, most similar first
+        """
+        if food_id is None or k <= 0:
+            return []
+        
+        neighbours = self._similar_food_ids(int(food_id))
+        if not neighbours:
+            return []
+        scores = dict(neighbours)
+        
+        catalog = self.food_db.get_catalog()
+        positions = catalog.filter_positions(
+            catalog.positions_of([neighbour_id for neighbour_id, _ in neighbours]),
+            meal_type=meal_type,
+            min_calories=min_calories,
+            max_calories=max_calories,
+            dietary_restrictions=dietary_restrictions,
+            exclude_foods=exclude_foods
+        )
+        
+        foods = catalog.get_rows(positions[:k])
+        for food in foods:
+            food['similarity'] = round(scores[food['id']], 4)
+        return foods
     
     def calculate_bmr(self, weight: float, height: float, age: int, gender: str) -> float:
         """
@@ -248,8 +347,8 @@ class AdvancedRecommendationEngine:
         preferred_foods = preferred_foods or []
         exclude_foods = exclude_foods or []
         
-        # Get suitable foods from database
-        db = USDAFoodDatabase()
+        # Get suitable foods from the shared database handle
+        db = self.food_db
         
         # Set default calorie range if not provided
         if min_calories is None:
@@ -257,81 +356,74 @@ class AdvancedRecommendationEngine:
         if max_calories is None:
             max_calories = target_calories * 1.25
         
-        try:
-            # Try with strict meal type first
+        # Try with strict meal type first
+        foods = db.get_foods_by_meal_type(
+            meal_type, 
+            min_calories=min_calories,
+            max_calories=max_calories,
+            dietary_restrictions=dietary_restrictions,
+            exclude_foods=exclude_foods
+        )
+        
+        # If not enough options, try with expanded calorie range
+        if len(foods) < foods_count:
+            expanded_min = target_calories * 0.6
+            expanded_max = target_calories * 1.4
+            
             foods = db.get_foods_by_meal_type(
                 meal_type, 
-                min_calories=min_calories,
-                max_calories=max_calories,
+                min_calories=expanded_min,
+                max_calories=expanded_max,
+                dietary_restrictions=dietary_restrictions,
+                exclude_foods=exclude_foods
+            )
+        
+        # If still not enough options, try with all meal types
+        if len(foods) < foods_count / 2:
+            foods = db.get_foods_by_calorie_range(
+                min_calories=expanded_min,
+                max_calories=expanded_max,
                 dietary_restrictions=dietary_restrictions,
                 exclude_foods=exclude_foods
             )
             
-            # If not enough options, try with expanded calorie range
-            if len(foods) < foods_count:
-                expanded_min = target_calories * 0.6
-                expanded_max = target_calories * 1.4
-                
+            # If still empty, ignore calorie constraints
+            if len(foods) < 2:
                 foods = db.get_foods_by_meal_type(
-                    meal_type, 
-                    min_calories=expanded_min,
-                    max_calories=expanded_max,
-                    dietary_restrictions=dietary_restrictions,
-                    exclude_foods=exclude_foods
-                )
-            
-            # If still not enough options, try with all meal types
-            if len(foods) < foods_count / 2:
-                foods = db.get_foods_by_calorie_range(
-                    min_calories=expanded_min,
-                    max_calories=expanded_max,
+                    meal_type,
                     dietary_restrictions=dietary_restrictions,
                     exclude_foods=exclude_foods
                 )
-                
-                # If still empty, ignore calorie constraints
-                if len(foods) < 2:
-                    foods = db.get_foods_by_meal_type(
-                        meal_type,
-                        dietary_restrictions=dietary_restrictions,
-                        exclude_foods=exclude_foods
-                    )
-            
-            # Prioritize preferred foods if any match
-            if preferred_foods:
-                for food in foods:
-                    if food['name'] in preferred_foods:
-                        food['priority'] = 10
-                    else:
-                        food['priority'] = 0
-                
-                # Sort by priority (higher first) then by how close to target calories
-                foods.sort(key=lambda x: (-x.get('priority', 0), abs(x['calories'] - target_calories)))
-            else:
-                # Sort by how close to target calories
-                foods.sort(key=lambda x: abs(x['calories'] - target_calories))
-                
-            # Shuffle the top matches slightly for more variety
-            import random
-            top_count = min(10, len(foods))
-            if top_count > 3:
-                top_foods = foods[:top_count]
-                random.shuffle(top_foods)
-                foods[:top_count] = top_foods
-                
-            # Remove the priority key before returning
+        
+        # Prioritize preferred foods if any match
+        if preferred_foods:
             for food in foods:
-                if 'priority' in food:
-                    del food['priority']
-                    
-            # Return the requested number of foods or all if fewer
-            return foods[:foods_count]
+                if food['name'] in preferred_foods:
+                    food['priority'] = 10
+                else:
+                    food['priority'] = 0
             
-        finally:
-            db.close()
+            # Sort by priority (higher first) then by how close to target calories
+            foods.sort(key=lambda x: (-x.get('priority', 0), abs(x['calories'] - target_calories)))
+        else:
+            # Sort by how close to target calories
+            foods.sort(key=lambda x: abs(x['calories'] - target_calories))
+            
+        # Shuffle the top matches slightly for more variety
+        import random
+        top_count = min(10, len(foods))
+        if top_count > 3:
+            top_foods = foods[:top_count]
+            random.shuffle(top_foods)
+            foods[:top_count] = top_foods
             
-        # Fallback - should not be reached if database has foods
-        return [self._get_fallback_meal(meal_type) for _ in range(min(foods_count, 3))]
+        # Remove the priority key before returning
+        for food in foods:
+            if 'priority' in food:
+                del food['priority']
+                
+        # Return the requested number of foods or all if fewer
+        return foods[:foods_count]
     
     def recommend_meals(self, 
                        target_calories: float,
@@ -764,14 +856,142 @@ class AdvancedRecommendationEngine:
             }
         }
     
-    def regenerate_meal(self, meal_type: str, target_calories: float, dietary_restrictions: List[str] = None, exclude_previous: str = None) -> Dict[str, Any]:
-        """Regenerate specific meal (breakfast, lunch, dinner)"""
+    def generate_daily_recommendations(self, user_profile: Dict[str, Any],
+                                       days: int,
+                                       plan_length: Optional[int] = 30) -> List[Dict[str, Any]]:
+        """
+        Generate independent daily recommendations for several days at once
+
+        Equivalent to calling generate_daily_recommendation(user_profile)
+        ``days`` times, but calorie targets and meal candidates are computed
+        once: each meal gets a pool of the 10 foods closest to its target and
+        every day draws from it the way recommend_meals does (5 random
+        options, one of the 3 closest picked).
+
+        Args:
+            user_profile: User profile data
+            days: Number of days to generate
+            plan_length: Length of the plan in days
+
+        Returns:
+            List of daily recommendation dictionaries
+        """
+        bmr = self.calculate_bmr(
+            user_profile['weight'],
+            user_profile['height'],
+            user_profile['age'],
+            user_profile['gender']
+        )
+        tdee = self.calculate_tdee(bmr, user_profile['activity_level'])
+
+        dietary_restrictions = []
+        if user_profile.get('dietary_restrictions'):
+            try:
+                dietary_restrictions = json.loads(user_profile['dietary_restrictions'])
+            except:
+                dietary_restrictions = []
+
+        target_calories = self.calculate_target_calories(
+            user_profile['weight'],
+            user_profile.get('goal_weight', user_profile['weight']),
+            tdee,
+            timeframe=plan_length,
+            gender=user_profile['gender']
+        )
+
+        # Same calorie split and relaxation steps as recommend_meals
+        meal_targets = {
+            'breakfast': target_calories * 0.25,
+            'lunch': target_calories * 0.35,
+            'dinner': target_calories * 0.40
+        }
+        pools = {}
+        for meal_type, meal_target in meal_targets.items():
+            pool = self.get_foods_for_meal(
+                meal_type=meal_type,
+                target_calories=meal_target,
+                foods_count=10,
+                dietary_restrictions=dietary_restrictions
+            )
+            if not pool:
+                pool = self.get_foods_for_meal(
+                    meal_type=meal_type,
+                    target_calories=meal_target,
+                    foods_count=10,
+                    min_calories=meal_target * 0.6,
+                    max_calories=meal_target * 1.4
+                )
+            pools[meal_type] = pool
+
+        calories_to_burn = max(0, tdee - target_calories)
+        if calories_to_burn < 100:
+            calories_to_burn = 200  # Minimum activity for health
+
+        user_stats = {
+            'bmr': round(bmr),
+            'tdee': round(tdee),
+            'target_calories': round(target_calories),
+            'calories_to_burn': round(calories_to_burn)
+        }
+
+        recommendations = []
+        for _ in range(days):
+            meals = {}
+            for meal_type, meal_target in meal_targets.items():
+                pool = pools[meal_type]
+                if not pool:
+                    meals[meal_type] = self._get_fallback_meal(meal_type)
+                    continue
+                options = random.sample(pool, min(5, len(pool)))
+                options.sort(key=lambda x: abs(x.get('calories', 0) - meal_target))
+                meals[meal_type] = dict(random.choice(options[:3]))
+
+            meals['total_calories'] = sum(meals[meal_type].get('calories', 0) for meal_type in meal_targets)
+            meals['target_calories'] = int(target_calories)
+
+            recommendations.append({
+                'meals': meals,
+                'activities': self.recommend_activities(calories_to_burn),
+                'user_stats': dict(user_stats)
+            })
+
+        return recommendations
+
+    def regenerate_meal(self, meal_type: str, target_calories: float, dietary_restrictions: List[str] = None, exclude_previous: str = None, previous_food_id: int = None) -> Dict[str, Any]:
+        """
+        Regenerate specific meal (breakfast, lunch, dinner)
+        
+        When the previous food is known, foods similar to it that fit the
+        meal type and calorie range are suggested first.
+        """
         if meal_type not in ['breakfast', 'lunch', 'dinner']:
             raise ValueError("meal_type must be 'breakfast', 'lunch', or 'dinner'")
         
         # Get a list of exclude foods
         exclude_foods = [exclude_previous] if exclude_previous and exclude_previous != "Rekomendasikan makanan lain" else []
         
+        # Alternatif yang mirip dengan makanan sebelumnya, dengan kalori
+        # setara (+/- 25%) agar total harian tidak berubah banyak
+        alternatives = []
+        has_similarity = self.similarity_index is not None or self.ann_index is not None
+        if previous_food_id is not None and has_similarity:
+            catalog = self.food_db.get_catalog()
+            previous = catalog.get_rows(catalog.positions_of([previous_food_id]))
+            if previous and previous[0]['calories']:
+                alternatives = self.similar_foods(
+                    previous_food_id,
+                    k=3,
+                    meal_type=meal_type,
+                    min_calories=previous[0]['calories'] * 0.75,
+                    max_calories=previous[0]['calories'] * 1.25,
+                    dietary_restrictions=dietary_restrictions,
+                    exclude_foods=exclude_foods
+                )
+        if alternatives:
+            selected_meal = random.choice(alternatives)
+            selected_meal.pop('similarity', None)
+            return selected_meal
+        
         # Coba dapatkan makanan dengan kriteria awal (rentang kalori yang lebih ketat)
         meal_options = self.get_foods_for_meal(
             meal_type,
@@ -813,7 +1033,6 @@ class AdvancedRecommendationEngine:
             return self._get_fallback_meal(meal_type)
             
         # Select a random option from the top matches for more variety
-        import random
         selected_meal = random.choice(meal_options[:3]) if len(meal_options) >= 3 else meal_options[0]
         
         return selected_meal
@@ -0,0 +1,347 @@
+import logging
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('ann_index')
+
+# Upper bound on the dense similarity block computed at once (queries x foods)
+MAX_BLOCK_CELLS = 16_000_000
+
+
+def _top_k(similarity: np.ndarray, column_ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best k columns of each row of a dense similarity block
+
+    Returns:
+        (ids, scores) of shape (rows, k), most similar first; columns with
+        no shared term (score <= 0) and missing columns are -1 / 0
+    """
+    rows, columns = similarity.shape
+    ids = np.full((rows, k), -1, dtype=np.int64)
+    scores = np.zeros((rows, k), dtype=np.float32)
+    width = min(k, columns)
+    if width == 0:
+        return ids, scores
+
+    top = np.argpartition(-similarity, width - 1, axis=1)[:, :width]
+    top_scores = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    found = top_scores > 0
+    ids[:, :width] = np.where(found, column_ids[top], -1)
+    scores[:, :width] = np.where(found, top_scores, 0)
+    return ids, scores
+
+
+class ANNIndex:
+    """
+    Base class of the nearest-neighbour indexes over food embeddings
+
+    Rows are TF-IDF vectors (L2-normalized, so the dot product is the
+    cosine similarity). Rows without any term can't be similar to anything
+    and are left out. Subclasses implement _build/_search and add their own
+    arrays to the state saved by ModelSerializer.save_arrays.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimensions(self) -> int:
+        return self.matrix.shape[1] if self.matrix is not None else 0
+
+    def build(self, matrix, ids) -> 'ANNIndex':
+        """
+        Index the rows of a sparse matrix
+
+        Args:
+            matrix: Sparse (foods, terms) TF-IDF matrix
+            ids: Food id of each row
+
+        Returns:
+            self
+        """
+        start = time.perf_counter()
+        matrix = matrix.tocsr().astype(np.float32)
+        keep = np.flatnonzero(np.diff(matrix.indptr) > 0)
+        self.matrix = matrix[keep]
+        self.ids = np.asarray(ids, dtype=np.int64)[keep]
+        self._build()
+        logger.info(f"Built {self.name} index over {len(self)} foods "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return self
+
+    def search(self, queries, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Most similar indexed foods of each query row
+
+        Args:
+            queries: Sparse (queries, terms) matrix from the same vectorizer
+            k: Neighbours per query
+
+        Returns:
+            (ids, scores) arrays of shape (queries, k), most similar first,
+            padded with id -1 and score 0
+        """
+        queries = queries.tocsr().astype(np.float32)
+        if not len(self) or k <= 0:
+            return (np.full((queries.shape[0], max(k, 0)), -1, dtype=np.int64),
+                    np.zeros((queries.shape[0], max(k, 0)), dtype=np.float32))
+        return self._search(queries, k)
+
+    def _build(self):
+        pass
+
+    def _search(self, queries, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def get_state(self) -> Dict:
+        """Arrays and parameters to persist the index"""
+        return {
+            'type': self.name,
+            'params': self.params(),
+            'ids': self.ids,
+            'matrix': self.matrix,
+        }
+
+    def params(self) -> Dict:
+        return {}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'ANNIndex':
+        """Rebuild an index saved with get_state (arrays may be memory-mapped)"""
+        index = cls(**state['params'])
+        index.ids = state['ids']
+        index.matrix = state['matrix']
+        index._load_state(state)
+        return index
+
+    def _load_state(self, state: Dict):
+        pass
+
+
+class ExactCosineIndex(ANNIndex):
+    """Brute-force search over every indexed food (the recall baseline)"""
+
+    name = 'exact'
+
+    def _search(self, queries, k):
+        transposed = self.matrix.T.tocsc()
+        ids = np.empty((queries.shape[0], k), dtype=np.int64)
+        scores = np.empty((queries.shape[0], k), dtype=np.float32)
+        block_size = max(1, MAX_BLOCK_CELLS // len(self))
+
+        for start in range(0, queries.shape[0], block_size):
+            end = min(queries.shape[0], start + block_size)
+            similarity = (queries[start:end] @ transposed).toarray()
+            ids[start:end], scores[start:end] = _top_k(similarity, self.ids, k)
+        return ids, scores
+
+
+class RandomProjectionLSH(ANNIndex):
+    """
+    Random-projection (SimHash) locality-sensitive hashing
+
+    Each table hashes a vector to the signs of n_bits random projections;
+    vectors with a small angle between them mostly land in the same bucket.
+    A query reads its bucket in every table, plus the buckets one bit away
+    when probes is 1, and reranks the candidates with the exact cosine
+    similarity. More tables or probes raise recall, more bits make buckets
+    smaller and queries faster. Collisions are only likely for close
+    vectors: neighbours sharing one or two words of a short name (cosine
+    around 0.4) are often missed, where PrunedInvertedIndex finds them.
+    """
+
+    name = 'lsh'
+
+    def __init__(self, n_tables: int = 8, n_bits: int = 16, probes: int = 1,
+                 max_candidates: int = 5000, seed: int = 42):
+        """
+        Args:
+            n_tables: Independent hash tables
+            n_bits: Projections (bits) per table, at most 63
+            probes: 0 reads only the query's bucket, 1 also the buckets at
+                Hamming distance 1
+            max_candidates: Cap on the candidates reranked per query
+            seed: Seed of the random projections
+        """
+        super().__init__()
+        if not 0 < n_bits < 64:
+            raise ValueError("n_bits must be between 1 and 63")
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.probes = probes
+        self.max_candidates = max_candidates
+        self.seed = seed
+        self.projection = None
+        self.orders = None
+        self.sorted_codes = None
+
+    def params(self):
+        return {'n_tables': self.n_tables, 'n_bits': self.n_bits, 'probes': self.probes,
+                'max_candidates': self.max_candidates, 'seed': self.seed}
+
+    def _hash(self, rows) -> np.ndarray:
+        """(rows, n_tables) bucket codes"""
+        weights = np.left_shift(np.uint64(1), np.arange(self.n_bits, dtype=np.uint64))
+        codes = np.empty((rows.shape[0], self.n_tables), dtype=np.uint64)
+        block_size = max(1, MAX_BLOCK_CELLS // self.projection.shape[1])
+        for start in range(0, rows.shape[0], block_size):
+            end = min(rows.shape[0], start + block_size)
+            bits = np.asarray(rows[start:end] @ self.projection) > 0
+            bits = bits.reshape(end - start, self.n_tables, self.n_bits)
+            codes[start:end] = (bits * weights).sum(axis=2, dtype=np.uint64)
+        return codes
+
+    def _build(self):
+        rng = np.random.default_rng(self.seed)
+        self.projection = rng.standard_normal(
+            (self.dimensions, self.n_tables * self.n_bits)
+        ).astype(np.float32)
+
+        codes = self._hash(self.matrix)
+        self.orders = np.argsort(codes, axis=0, kind='stable').T.astype(np.int32)
+        self.sorted_codes = np.take_along_axis(codes.T, self.orders.astype(np.int64), axis=1)
+
+    def _candidates(self, codes: np.ndarray) -> np.ndarray:
+        """Row positions in the buckets of one query (own buckets first)"""
+        flips = np.left_shift(np.uint64(1), np.arange(self.n_bits, dtype=np.uint64))
+        found = []
+        for probe in range(self.probes + 1):
+            for table in range(self.n_tables):
+                code = codes[table]
+                probe_codes = np.array([code], dtype=np.uint64) if probe == 0 else code ^ flips
+                sorted_codes = self.sorted_codes[table]
+                low = np.searchsorted(sorted_codes, probe_codes, side='left')
+                high = np.searchsorted(sorted_codes, probe_codes, side='right')
+                found.extend(self.orders[table, l:h] for l, h in zip(low, high) if h > l)
+
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.concatenate(found)
+        # Distinct rows in first-seen order, then the cap
+        _, first = np.unique(candidates, return_index=True)
+        return candidates[np.sort(first)][:self.max_candidates].astype(np.int64)
+
+    def _search(self, queries, k):
+        codes = self._hash(queries)
+        ids = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        scores = np.zeros((queries.shape[0], k), dtype=np.float32)
+
+        for i in range(queries.shape[0]):
+            candidates = self._candidates(codes[i])
+            if not len(candidates):
+                continue
+            similarity = (self.matrix[candidates] @ queries[i].T).toarray().T
+            ids[i], scores[i] = _top_k(similarity, self.ids[candidates], k)
+        return ids, scores
+
+    def get_state(self):
+        state = super().get_state()
+        state.update(projection=self.projection, orders=self.orders, sorted_codes=self.sorted_codes)
+        return state
+
+    def _load_state(self, state):
+        self.projection = state['projection']
+        self.orders = state['orders']
+        self.sorted_codes = state['sorted_codes']
+
+
+class PrunedInvertedIndex(ANNIndex):
+    """
+    Inverted index with impact-ordered, truncated posting lists
+
+    Food names are short, so two foods are similar when they share their
+    rare (high TF-IDF weight) terms. Each term's postings are sorted by
+    weight; a query reads at most max_postings foods from each of its
+    max_terms heaviest terms and reranks them with the exact cosine
+    similarity. Only very common terms are truncated, and those contribute
+    little to the similarity.
+    """
+
+    name = 'inverted'
+
+    def __init__(self, max_terms: int = 8, max_postings: int = 1000):
+        """
+        Args:
+            max_terms: Query terms read, heaviest first
+            max_postings: Foods read per term, heaviest first
+        """
+        super().__init__()
+        self.max_terms = max_terms
+        self.max_postings = max_postings
+        self.posting_indptr = None
+        self.posting_rows = None
+
+    def params(self):
+        return {'max_terms': self.max_terms, 'max_postings': self.max_postings}
+
+    def _build(self):
+        by_term = self.matrix.tocsc()
+        terms = np.repeat(np.arange(by_term.shape[1]), np.diff(by_term.indptr))
+        # Postings grouped by term, heaviest first within each term
+        order = np.lexsort((-by_term.data, terms))
+        self.posting_indptr = by_term.indptr.astype(np.int64)
+        self.posting_rows = by_term.indices[order].astype(np.int32)
+
+    def _search(self, queries, k):
+        ids = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        scores = np.zeros((queries.shape[0], k), dtype=np.float32)
+
+        for i in range(queries.shape[0]):
+            query = queries[i]
+            heaviest = query.indices[np.argsort(-query.data, kind='stable')[:self.max_terms]]
+            heaviest = heaviest[heaviest < len(self.posting_indptr) - 1]
+            starts = self.posting_indptr[heaviest]
+            ends = np.minimum(self.posting_indptr[heaviest + 1], starts + self.max_postings)
+            if not len(starts) or not (ends > starts).any():
+                continue
+
+            candidates = np.unique(np.concatenate(
+                [self.posting_rows[start:end] for start, end in zip(starts, ends)]
+            ))
+            similarity = (self.matrix[candidates] @ query.T).toarray().T
+            ids[i], scores[i] = _top_k(similarity, self.ids[candidates], k)
+        return ids, scores
+
+    def get_state(self):
+        state = super().get_state()
+        state.update(posting_indptr=self.posting_indptr, posting_rows=self.posting_rows)
+        return state
+
+    def _load_state(self, state):
+        self.posting_indptr = state['posting_indptr']
+        self.posting_rows = state['posting_rows']
+
+
+# Index type name -> class, for ModelSerializer and the build scripts
+ANN_INDEX_TYPES = {
+    ExactCosineIndex.name: ExactCosineIndex,
+    RandomProjectionLSH.name: RandomProjectionLSH,
+    PrunedInvertedIndex.name: PrunedInvertedIndex,
+}
+
+# Best recall/latency trade-off on food names (scripts/benchmark_ann_index.py)
+DEFAULT_ANN_INDEX = PrunedInvertedIndex.name
+
+
+def create_ann_index(index_type: str = DEFAULT_ANN_INDEX, **params) -> ANNIndex:
+    """New empty index of a registered type"""
+    if index_type not in ANN_INDEX_TYPES:
+        raise ValueError(f"Unknown ANN index type {index_type!r}, use one of {sorted(ANN_INDEX_TYPES)}")
+    return ANN_INDEX_TYPES[index_type](**params)
+
+
+def load_ann_index(state: Dict) -> ANNIndex:
+    """Index from a state saved with get_state"""
+    return ANN_INDEX_TYPES[state['type']].from_state(state)
@@ -1,10 +1,7 @@
 import json
-import numpy as np
-import pandas as pd
 from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime, date, timedelta
 import logging
-from sklearn.linear_model import LinearRegression
 
 # Configure logging
 logging.basicConfig(
@@ -250,6 +247,10 @@ class DietProgressAnalyzer:
         if not weight_history or len(weight_history) < 3:
             return []
         
+        # Imported on first use: most analyses never fit a regression
+        import numpy as np
+        from sklearn.linear_model import LinearRegression
+        
         # Convert dates to days since start
         start_date = weight_history[0][0]
         
@@ -356,10 +357,7 @@ class DietProgressAnalyzer:
             Nutritional analysis
         """
         if not meal_history:
-            return {
-                'status': 'no_data',
-                'message': 'No meal data available'
-            }
+            return self.analyze_macro_averages(0, None, None, None)
         
         # Collect macronutrient ratios
         macros = []
@@ -400,16 +398,45 @@ class DietProgressAnalyzer:
                 })
         
         if not macros:
-            return {
-                'status': 'insufficient_data',
-                'message': 'Could not calculate macronutrient distribution'
-            }
+            return self.analyze_macro_averages(len(meal_history), None, None, None)
         
         # Calculate average macro distribution
         avg_protein = sum(m['protein_percent'] for m in macros) / len(macros)
         avg_carbs = sum(m['carb_percent'] for m in macros) / len(macros)
         avg_fat = sum(m['fat_percent'] for m in macros) / len(macros)
         
+        return self.analyze_macro_averages(len(meal_history), avg_protein, avg_carbs, avg_fat)
+    
+    def analyze_macro_averages(self,
+                               days: int,
+                               avg_protein: Optional[float],
+                               avg_carbs: Optional[float],
+                               avg_fat: Optional[float]) -> Dict[str, Any]:
+        """
+        Evaluate an average macronutrient distribution
+        
+        Args:
+            days: Number of days with meal data
+            avg_protein: Average share of calories from protein (%) over the
+                days with calories, None if no day has calories
+            avg_carbs: Same for carbohydrates
+            avg_fat: Same for fat
+            
+        Returns:
+            Nutritional analysis (same format as analyze_nutritional_balance)
+        """
+        if not days:
+            return {
+                'status': 'no_data',
+                'message': 'No meal data available'
+            }
+        
+        if avg_protein is None or avg_carbs is None or avg_fat is None:
+            return {
+                'status': 'insufficient_data',
+                'message': 'Could not calculate macronutrient distribution'
+            }
+        
         # Evaluate balance based on common recommendations
         # Protein: 10-35%, Carbs: 45-65%, Fat: 20-35%
         protein_status = 'optimal' if 15 <= avg_protein <= 35 else ('low' if avg_protein < 15 else 'high')
@@ -0,0 +1,62 @@
+import os
+import threading
+import logging
+
+logger = logging.getLogger('engine_registry')
+
+# Engines yang sudah dibangun per proses, key: path database makanan
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_recommendation_engine(food_db_path='food_database.db', api_key=None):
+    """
+    Get the process-wide recommendation engine, building it on first use
+
+    The engine is constructed at most once per worker process. Construction
+    (seeding, loading the catalog and the TF-IDF vectorizer) is guarded by a
+    lock so concurrent first requests do not build it twice.
+
+    Args:
+        food_db_path: Path to SQLite food database
+        api_key: USDA FoodData Central API key (defaults to USDA_API_KEY)
+
+    Returns:
+        Shared AdvancedRecommendationEngine instance
+    """
+    engine = _engines.get(food_db_path)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        # Cek ulang setelah mendapatkan lock
+        engine = _engines.get(food_db_path)
+        if engine is None:
+            logger.info(f"Building shared recommendation engine for {food_db_path}")
+            # Imported here: the engine pulls in numpy and scikit-learn, which
+            # workers that never recommend (auth, profile) shouldn't load
+            from app.ml.advanced_recommendation_engine import AdvancedRecommendationEngine
+            engine = AdvancedRecommendationEngine(
+                food_db_path=food_db_path,
+                api_key=api_key or os.environ.get('USDA_API_KEY')
+            )
+            _engines[food_db_path] = engine
+
+    return engine
+
+
+def reset_recommendation_engines():
+    """Drop all cached engines so the next call rebuilds them"""
+    with _engines_lock:
+        _engines.clear()
+
+
+def _reset_after_fork():
+    """Forked workers must not share SQLite handles with their parent"""
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    _engines.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,358 @@
+import logging
+import random
+import sqlite3
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger('food_catalog')
+
+
+class FoodCatalog:
+    """
+    Read-only, column-oriented snapshot of the ``foods`` and
+    ``food_meal_types`` tables.
+
+    Numeric columns are kept in NumPy arrays and meal types are packed into
+    one bitmask per food, so candidate selection is a handful of vectorized
+    mask operations instead of a SQL round-trip per query. Rows are only
+    materialized into dictionaries for the foods that are actually returned.
+    """
+
+    NUMERIC_COLUMNS = ('calories', 'protein', 'carbs', 'fat')
+
+    # Random sampling: draw candidates only when k is well below the pool
+    # size, and give up on drawing after this many attempts per item
+    SAMPLE_DENSE_RATIO = 4
+    SAMPLE_DRAWS_PER_ITEM = 16
+    SAMPLE_MIN_DRAWS = 64
+
+    # Dietary restriction keywords whose name match mask is kept
+    RESTRICTION_CACHE_SIZE = 64
+
+    def __init__(self,
+                 columns: Sequence[str],
+                 rows: List[tuple],
+                 meal_type_bits: Dict[str, int],
+                 meal_mappings: List[tuple]):
+        """
+        Build the catalog from raw table rows
+
+        Args:
+            columns: Column names of the ``foods`` table
+            rows: Rows of the ``foods`` table ordered by id
+            meal_type_bits: Meal type name -> bit in the meal mask
+            meal_mappings: (food_id, meal_type name) pairs
+        """
+        self.columns = list(columns)
+        self._rows = rows
+        self.meal_type_bits = meal_type_bits
+
+        column_index = {name: i for i, name in enumerate(self.columns)}
+        id_col = column_index['id']
+        name_col = column_index['name']
+        category_col = column_index['category']
+
+        self.ids = np.fromiter((row[id_col] for row in rows), dtype=np.int64, count=len(rows))
+
+        # NULL becomes NaN, which (like SQL) never satisfies a comparison
+        for column in self.NUMERIC_COLUMNS:
+            col = column_index[column]
+            values = np.fromiter(
+                (np.nan if row[col] is None else row[col] for row in rows),
+                dtype=np.float64,
+                count=len(rows)
+            )
+            setattr(self, column, values)
+
+        self.names = np.array([row[name_col] or '' for row in rows], dtype=object)
+        # LIKE in SQLite is case-insensitive, so match against lowercase names.
+        # Object array, not fixed-width '<U': every row would pay 4 bytes per
+        # character of the longest name. Names that are already lowercase
+        # share the string object held by the row.
+        self.names_lower = np.empty(len(rows), dtype=object)
+        for i, name in enumerate(self.names):
+            lowered = name.lower()
+            self.names_lower[i] = name if lowered == name else lowered
+        # Restriction keyword -> foods whose name contains it (see _match)
+        self._restriction_masks = {}
+
+        categories = [row[category_col] or '' for row in rows]
+        self.categories, self.category_ids = np.unique(
+            np.array(categories, dtype=str), return_inverse=True
+        )
+        self.category_ids = self.category_ids.astype(np.int32)
+        self._categories_lower = np.array([c.lower() for c in self.categories], dtype=str)
+
+        self.meal_mask = np.zeros(len(rows), dtype=np.uint32)
+        if meal_mappings and len(rows):
+            food_ids = np.fromiter((m[0] for m in meal_mappings), dtype=np.int64, count=len(meal_mappings))
+            bits = np.fromiter(
+                (meal_type_bits.get(m[1], 0) for m in meal_mappings),
+                dtype=np.uint32,
+                count=len(meal_mappings)
+            )
+            positions = np.searchsorted(self.ids, food_ids)
+            positions = np.clip(positions, 0, len(self.ids) - 1)
+            known = self.ids[positions] == food_ids
+            np.bitwise_or.at(self.meal_mask, positions[known], bits[known])
+
+        # Positions of the foods mapped to each meal type, for O(k) sampling
+        self._empty_positions = np.zeros(0, dtype=np.int64)
+        self.meal_type_positions = {
+            name: np.flatnonzero((self.meal_mask & np.uint32(bit)) != 0)
+            for name, bit in meal_type_bits.items()
+        }
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> 'FoodCatalog':
+        """
+        Load a snapshot of the food tables
+
+        Args:
+            conn: Open SQLite connection to the food database
+
+        Returns:
+            New FoodCatalog instance
+        """
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT id, name FROM meal_types ORDER BY id")
+        meal_type_bits = {row[1]: 1 << i for i, row in enumerate(cursor.fetchall())}
+
+        cursor.execute("SELECT * FROM foods ORDER BY id")
+        columns = [d[0] for d in cursor.description]
+        rows = [tuple(row) for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT fmt.food_id, mt.name
+            FROM food_meal_types fmt
+            JOIN meal_types mt ON fmt.meal_type_id = mt.id
+        """)
+        meal_mappings = [tuple(row) for row in cursor.fetchall()]
+
+        catalog = cls(columns, rows, meal_type_bits, meal_mappings)
+        logger.info(f"Loaded food catalog with {len(catalog)} foods")
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def filter_indices(self,
+                       meal_type: Optional[str] = None,
+                       min_calories: Optional[float] = None,
+                       max_calories: Optional[float] = None,
+                       dietary_restrictions: Optional[List[str]] = None,
+                       exclude_foods: Optional[List[str]] = None,
+                       categories: Optional[List[str]] = None,
+                       exclude_ids: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Get positions of the foods matching all given filters
+
+        Args:
+            meal_type: Only foods mapped to this meal type
+            min_calories: Minimum calories
+            max_calories: Maximum calories
+            dietary_restrictions: Foods whose name contains any of these are dropped
+            exclude_foods: Exact food names to drop
+            categories: Keep foods whose category contains any of these
+            exclude_ids: Food ids to drop
+
+        Returns:
+            Array of row positions, in food id order
+        """
+        mask = self._match(
+            None, meal_type, min_calories, max_calories,
+            dietary_restrictions, exclude_foods, categories, exclude_ids
+        )
+        return np.flatnonzero(mask)
+
+    def positions_of(self, food_ids: Sequence[int]) -> np.ndarray:
+        """
+        Row positions of food ids
+
+        Args:
+            food_ids: Food ids
+
+        Returns:
+            Array of row positions in the given order; unknown ids are dropped
+        """
+        ids = np.asarray(food_ids, dtype=np.int64)
+        if not len(ids) or not len(self):
+            return np.zeros(0, dtype=np.int64)
+        positions = np.clip(np.searchsorted(self.ids, ids), 0, len(self) - 1)
+        return positions[self.ids[positions] == ids]
+
+    def filter_positions(self,
+                         positions: Sequence[int],
+                         meal_type: Optional[str] = None,
+                         min_calories: Optional[float] = None,
+                         max_calories: Optional[float] = None,
+                         dietary_restrictions: Optional[List[str]] = None,
+                         exclude_foods: Optional[List[str]] = None,
+                         categories: Optional[List[str]] = None,
+                         exclude_ids: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Keep the given positions that match all filters (same filters as
+        filter_indices), checking only those rows
+
+        Returns:
+            Array of row positions, in the given order
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return positions
+        return positions[self._match(
+            positions, meal_type, min_calories, max_calories,
+            dietary_restrictions, exclude_foods, categories, exclude_ids
+        )]
+
+    def sample_indices(self,
+                       k: int,
+                       rng: random.Random,
+                       meal_type: Optional[str] = None,
+                       min_calories: Optional[float] = None,
+                       max_calories: Optional[float] = None,
+                       dietary_restrictions: Optional[List[str]] = None,
+                       exclude_foods: Optional[List[str]] = None,
+                       categories: Optional[List[str]] = None,
+                       exclude_ids: Optional[Sequence[int]] = None) -> List[int]:
+        """
+        Pick up to k random positions matching the filters (same filters as
+        filter_indices)
+
+        Candidates are drawn from the precomputed position array of the meal
+        type (or from the whole catalog) and checked only as they are drawn,
+        so the cost is proportional to k rather than to the number of
+        matching foods. When filters reject too many draws, the full mask is
+        computed and sampled instead.
+
+        Args:
+            k: Number of foods to pick
+            rng: Random number generator (seed it for reproducible picks)
+
+        Returns:
+            List of distinct row positions in random order
+        """
+        filters = (min_calories, max_calories, dietary_restrictions,
+                   exclude_foods, categories, exclude_ids)
+        if meal_type is not None:
+            pool = self.meal_type_positions.get(meal_type, self._empty_positions)
+            pool_size = len(pool)
+        else:
+            pool = None
+            pool_size = len(self)
+
+        if k <= 0 or pool_size == 0:
+            return []
+
+        # Small pools: one full mask is cheaper than repeated draws
+        if k * self.SAMPLE_DENSE_RATIO < pool_size:
+            accepted = []
+            seen = set()
+            draws_left = max(self.SAMPLE_MIN_DRAWS, k * self.SAMPLE_DRAWS_PER_ITEM)
+
+            while len(accepted) < k and draws_left > 0 and len(seen) < pool_size:
+                batch_size = min(draws_left, 2 * (k - len(accepted)))
+                draws_left -= batch_size
+
+                batch = []
+                for _ in range(batch_size):
+                    offset = rng.randrange(pool_size)
+                    if offset not in seen:
+                        seen.add(offset)
+                        batch.append(offset)
+                if not batch:
+                    continue
+
+                positions = np.asarray(batch, dtype=np.int64)
+                if pool is not None:
+                    positions = pool[positions]
+                matched = positions[self._match(positions, None, *filters)]
+                accepted.extend(int(i) for i in matched[:k - len(accepted)])
+
+            if len(accepted) == k:
+                return accepted
+
+        # Filters too selective (or pool small): sample from the exact matches
+        indices = self.filter_indices(meal_type, *filters)
+        if len(indices) <= k:
+            picked = [int(i) for i in indices]
+            rng.shuffle(picked)
+            return picked
+        return [int(indices[i]) for i in rng.sample(range(len(indices)), k)]
+
+    def _match(self,
+               positions: Optional[np.ndarray],
+               meal_type: Optional[str],
+               min_calories: Optional[float],
+               max_calories: Optional[float],
+               dietary_restrictions: Optional[List[str]],
+               exclude_foods: Optional[List[str]],
+               categories: Optional[List[str]],
+               exclude_ids: Optional[Sequence[int]]) -> np.ndarray:
+        """Boolean mask of the filters, over all rows or only ``positions``"""
+        rows = slice(None) if positions is None else positions
+        size = len(self) if positions is None else len(positions)
+        mask = np.ones(size, dtype=bool)
+
+        if meal_type is not None:
+            bit = self.meal_type_bits.get(meal_type, 0)
+            mask &= (self.meal_mask[rows] & np.uint32(bit)) != 0
+        if min_calories is not None:
+            mask &= self.calories[rows] >= min_calories
+        if max_calories is not None:
+            mask &= self.calories[rows] <= max_calories
+        if categories:
+            matching = np.zeros(len(self.categories), dtype=bool)
+            for category in categories:
+                matching |= np.char.find(self._categories_lower, category.lower()) >= 0
+            mask &= matching[self.category_ids[rows]]
+        if exclude_foods:
+            excluded = [name for name in exclude_foods if name]
+            if excluded:
+                mask &= ~np.isin(self.names[rows], excluded)
+        if exclude_ids is not None and len(exclude_ids):
+            mask &= ~np.isin(self.ids[rows], np.asarray(exclude_ids, dtype=np.int64))
+        if dietary_restrictions:
+            for restriction in dietary_restrictions:
+                if restriction:
+                    self._exclude_name_matches(mask, rows, restriction.lower())
+
+        return mask
+
+    def _exclude_name_matches(self, mask: np.ndarray, rows, needle: str):
+        """
+        Clear ``mask`` where the lowercase name contains ``needle``
+
+        The first RESTRICTION_CACHE_SIZE keywords get a mask over all foods,
+        built once. Substring tests run in Python, so without a cached mask
+        only the rows the vectorized filters kept are tested.
+        """
+        matches = self._restriction_masks.get(needle)
+        if matches is None and len(self._restriction_masks) < self.RESTRICTION_CACHE_SIZE:
+            matches = np.fromiter((needle in name for name in self.names_lower),
+                                  dtype=bool, count=len(self.names_lower))
+            self._restriction_masks[needle] = matches
+        if matches is not None:
+            mask &= ~matches[rows]
+            return
+
+        candidates = np.flatnonzero(mask)
+        names_lower = self.names_lower[rows][candidates]
+        hits = np.fromiter((needle in name for name in names_lower),
+                           dtype=bool, count=len(candidates))
+        mask[candidates[hits]] = False
+
+    def get_rows(self, indices: Sequence[int]) -> List[Dict]:
+        """
+        Materialize foods as dictionaries (same keys as ``SELECT * FROM foods``)
+
+        Args:
+            indices: Row positions returned by filter_indices
+
+        Returns:
+            List of food dictionaries
+        """
+        columns = self.columns
+        return [dict(zip(columns, self._rows[i])) for i in indices]
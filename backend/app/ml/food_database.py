@@ -1,13 +1,21 @@
 import os
 import json
 import csv
+import random
 import requests
 import sqlite3
-import pandas as pd
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Callable, TYPE_CHECKING
 import logging
+import threading
+import math
+import time
+import difflib
 from datetime import datetime
 
+if TYPE_CHECKING:
+    # numpy-backed; imported on first use so the search routes don't load numpy
+    from app.ml.food_catalog import FoodCatalog
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -16,31 +24,262 @@ logging.basicConfig(
 )
 logger = logging.getLogger('food_database')
 
+
+class SQLiteConnectionManager:
+    """
+    Hands out one SQLite connection per thread for a database file and
+    remembers whether the schema has already been created in this process.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.schema_initialized = False
+        self.schema_lock = threading.Lock()
+        # Whether the FTS5 search table exists (None = not checked yet)
+        self.search_index_available = None
+        # In-memory snapshot of the foods tables, shared by all threads
+        self.catalog = None
+        self.catalog_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """Get (or open) the connection owned by the calling thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close_connection(self):
+        """Close the connection owned by the calling thread, if any"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            with self._connections_lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.close()
+    
+    def close_all(self):
+        """Close every connection opened through this manager"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Connection belongs to another (possibly finished) thread
+                pass
+        self._local = threading.local()
+
+
+# Connection managers per absolute database path (shared by all instances)
+_connection_managers = {}
+_connection_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str) -> SQLiteConnectionManager:
+    """Get the process-wide connection manager for a database file"""
+    key = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    with _connection_managers_lock:
+        manager = _connection_managers.get(key)
+        if manager is None:
+            manager = SQLiteConnectionManager(db_path)
+            _connection_managers[key] = manager
+        return manager
+
+
+def _reset_connection_managers_after_fork():
+    """Connections opened before fork must not be reused by the child"""
+    global _connection_managers_lock
+    _connection_managers_lock = threading.Lock()
+    _connection_managers.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_connection_managers_after_fork)
+
+
+FOOD_SEARCH_TABLE = 'foods_fts'
+FOOD_SEARCH_TRIGGERS = ('foods_fts_ai', 'foods_fts_ad', 'foods_fts_au')
+# Upper bound of a search latency budget, in milliseconds
+MAX_SEARCH_BUDGET_MS = 1000
+
+
+def _create_food_search_index(conn: sqlite3.Connection):
+    """
+    Create the FTS5 trigram index over food names and categories
+    
+    The trigram tokenizer matches arbitrary substrings case-insensitively,
+    i.e. the same rows as ``LIKE '%term%'`` for terms of 3+ characters. The
+    index uses ``foods`` as external content and triggers keep it in sync.
+    SQLite builds without FTS5/trigram keep working on the LIKE fallback.
+    """
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {FOOD_SEARCH_TABLE} USING fts5(
+                name, category,
+                content='foods', content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 trigram search unavailable, using LIKE filters: {e}")
+        return
+    
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS foods_fts_ai AFTER INSERT ON foods BEGIN
+            INSERT INTO {FOOD_SEARCH_TABLE} (rowid, name, category)
+            VALUES (new.id, new.name, new.category);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS foods_fts_ad AFTER DELETE ON foods BEGIN
+            INSERT INTO {FOOD_SEARCH_TABLE} ({FOOD_SEARCH_TABLE}, rowid, name, category)
+            VALUES ('delete', old.id, old.name, old.category);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS foods_fts_au AFTER UPDATE OF name, category ON foods BEGIN
+            INSERT INTO {FOOD_SEARCH_TABLE} ({FOOD_SEARCH_TABLE}, rowid, name, category)
+            VALUES ('delete', old.id, old.name, old.category);
+            INSERT INTO {FOOD_SEARCH_TABLE} (rowid, name, category)
+            VALUES (new.id, new.name, new.category);
+        END
+    """)
+    # Index the rows that already exist
+    conn.execute(f"INSERT INTO {FOOD_SEARCH_TABLE} ({FOOD_SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+# Versioned schema changes for the food database. Each entry is
+# (version, description, statements); a statement is either SQL or a
+# callable taking the connection. The applied version is tracked in
+# ``PRAGMA user_version`` so every migration runs exactly once per file.
+# Append new entries, never edit ones that have already shipped.
+FOOD_SCHEMA_MIGRATIONS = [
+    (1, 'secondary indexes for meal type and calorie lookups', [
+        # Meal type joins start from meal_types.name (already unique) and walk
+        # food_meal_types by meal_type_id; carrying food_id makes it covering
+        "CREATE INDEX IF NOT EXISTS idx_food_meal_types_meal_type_food "
+        "ON food_meal_types (meal_type_id, food_id)",
+        # Calorie range filters on foods
+        "CREATE INDEX IF NOT EXISTS idx_foods_calories ON foods (calories)",
+        # Category lookups by exact value / prefix (LIKE '%x%' cannot use it)
+        "CREATE INDEX IF NOT EXISTS idx_foods_category ON foods (category)",
+        # Refresh planner statistics so the new indexes are actually chosen
+        "ANALYZE",
+    ]),
+    (2, 'FTS5 search index over food names and categories', [
+        _create_food_search_index,
+    ]),
+    (3, 'case-insensitive name index for exact and prefix search', [
+        "CREATE INDEX IF NOT EXISTS idx_foods_name_nocase ON foods (name COLLATE NOCASE)",
+    ]),
+]
+
+FOOD_SCHEMA_VERSION = FOOD_SCHEMA_MIGRATIONS[-1][0]
+
+
+def get_food_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema migration version recorded in a food database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate_food_schema(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending food schema migrations
+    
+    Args:
+        conn: Open SQLite connection; base tables must already exist
+        
+    Returns:
+        Number of migrations applied
+    """
+    current = get_food_schema_version(conn)
+    applied = 0
+    
+    for version, description, statements in FOOD_SCHEMA_MIGRATIONS:
+        if version <= current:
+            continue
+        
+        logger.info(f"Applying food schema migration {version}: {description}")
+        try:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            # PRAGMA does not accept bound parameters
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logger.exception(f"Food schema migration {version} failed")
+            raise
+        applied += 1
+    
+    return applied
+
+
 class USDAFoodDatabase:
     """
     A class to manage the USDA food database for the meal recommendation system.
     This handles downloading, processing, and querying food data from USDA FoodData Central.
     """
     
-    def __init__(self, db_path='food_database.db', api_key=None):
+    # Category heuristics used when a meal type has no mapped foods
+    MEAL_TYPE_CATEGORIES = {
+        'breakfast': ['Breakfast Foods', 'Cereals', 'Bakery', 'Dairy'],
+        'lunch': ['Sandwiches', 'Salads', 'Soups', 'Fast Food'],
+        'dinner': ['Meat', 'Poultry', 'Seafood', 'Pasta', 'Rice', 'Vegetables'],
+        'snack': ['Snacks', 'Fruits', 'Nuts', 'Seeds', 'Candy']
+    }
+    
+    # Broader category heuristics used to top up random selections
+    RANDOM_FILL_CATEGORIES = {
+        'breakfast': ['Breakfast', 'Cereal', 'Bakery', 'Dairy'],
+        'lunch': ['Sandwich', 'Salad', 'Soup', 'Fast Food'],
+        'dinner': ['Meat', 'Poultry', 'Seafood', 'Pasta', 'Rice', 'Vegetable'],
+        'snack': ['Snack', 'Fruit', 'Nut', 'Seed', 'Candy']
+    }
+    
+    # Local search: trigram candidates scored for fuzzy matches, minimum similarity
+    FUZZY_SEARCH_CANDIDATES = 200
+    FUZZY_SEARCH_MIN_SCORE = 0.6
+    
+    def __init__(self, db_path='food_database.db', api_key=None, use_catalog=False, seed=None):
         """
         Initialize the USDA food database handler
         
         Args:
             db_path: Path to SQLite database file
             api_key: USDA FoodData Central API key
+            use_catalog: Serve meal/calorie queries from the in-memory
+                FoodCatalog instead of querying SQLite every time
+            seed: Seed for random food selection (None = nondeterministic)
         """
         self.db_path = db_path
+        self.use_catalog = use_catalog
+        self.rng = random.Random(seed)
         self.api_key = api_key or os.environ.get('USDA_API_KEY')
         self.base_url = "https://api.nal.usda.gov/fdc/v1"
         self.foods_cache = {}
-        self._conn = None
+        self._connections = get_connection_manager(db_path)
         
-        # Create database if it doesn't exist
-        self._initialize_database()
+        # Create database tables once per process for this database file
+        if not self._connections.schema_initialized:
+            with self._connections.schema_lock:
+                if not self._connections.schema_initialized:
+                    self._initialize_database()
+                    self._connections.schema_initialized = True
         
     def _initialize_database(self):
-        """Create database tables if they don't exist"""
+        """Create database tables if they don't exist and apply schema migrations"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -118,20 +357,280 @@ class USDAFoodDatabase:
             )
         
         conn.commit()
+        
+        migrate_food_schema(conn)
     
     def _get_connection(self):
-        """Get SQLite database connection"""
-        if self._conn is None:
-            self._conn = sqlite3.connect(self.db_path)
-            self._conn.row_factory = sqlite3.Row
-        return self._conn
+        """Get the SQLite connection owned by the calling thread"""
+        return self._connections.get_connection()
     
     def close(self):
-        """Close the database connection"""
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        """Close the calling thread's database connection"""
+        self._connections.close_connection()
+    
+    def get_catalog(self) -> 'FoodCatalog':
+        """
+        Get the in-memory food catalog, loading it on first use
+        
+        The snapshot is shared by every handle on this database file in the
+        process. Writes made through this class call refresh_catalog();
+        writes made by other processes (e.g. import scripts) become visible
+        after an explicit refresh_catalog() or a worker restart.
+        """
+        manager = self._connections
+        catalog = manager.catalog
+        if catalog is None:
+            with manager.catalog_lock:
+                catalog = manager.catalog
+                if catalog is None:
+                    from app.ml.food_catalog import FoodCatalog
+                    catalog = FoodCatalog.load(self._get_connection())
+                    manager.catalog = catalog
+        return catalog
+    
+    def refresh_catalog(self):
+        """Drop the catalog snapshot so it is reloaded on next use"""
+        self._connections.catalog = None
+    
+    def has_search_index(self) -> bool:
+        """Check whether the FTS5 food search index exists"""
+        manager = self._connections
+        if manager.search_index_available is None:
+            cursor = self._get_connection().cursor()
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (FOOD_SEARCH_TABLE,)
+            )
+            manager.search_index_available = cursor.fetchone() is not None
+        return manager.search_index_available
+    
+    def rebuild_search_index(self):
+        """Rebuild the FTS5 index from the foods table and restore its sync triggers"""
+        if not self.has_search_index():
+            logger.warning("Food search index is not available")
+            return
+        conn = self._get_connection()
+        # Recreates missing sync triggers (e.g. after a fast import) and reindexes
+        _create_food_search_index(conn)
+        conn.commit()
+        logger.info("Food search index rebuilt")
+    
+    @staticmethod
+    def _fts_terms(column: str, terms: List[str]) -> str:
+        """Build an FTS5 query matching any of the terms as substrings of a column"""
+        phrases = ['"' + term.replace('"', '""') + '"' for term in terms]
+        return f"{column} : ({' OR '.join(phrases)})"
+    
+    def _split_search_terms(self, terms: Optional[List[str]]) -> Tuple[List[str], List[str]]:
+        """Split terms into (index-searchable, LIKE-only); trigrams need 3+ characters"""
+        terms = [term for term in (terms or []) if term]
+        if not self.has_search_index():
+            return [], terms
+        indexed = [term for term in terms if len(term) >= 3]
+        return indexed, [term for term in terms if len(term) < 3]
+    
+    def _name_exclusion_conditions(self,
+                                   dietary_restrictions: Optional[List[str]],
+                                   name_column: str = 'name') -> Tuple[List[str], List]:
+        """
+        SQL conditions dropping foods whose name contains a restriction
+        
+        Exclusions stay on LIKE: a negated MATCH cannot drive the query, so
+        ``id NOT IN (SELECT rowid ... MATCH ...)`` materializes every food
+        containing the term (tens of thousands for "chicken") while the LIKE
+        only runs on the rows the indexed filters already selected.
+        
+        Returns:
+            Tuple of (conditions to AND together, parameters)
+        """
+        conditions = []
+        params = []
+        for restriction in dietary_restrictions or []:
+            if restriction:
+                conditions.append(f"{name_column} NOT LIKE ?")
+                params.append(f"%{restriction}%")
+        return conditions, params
+    
+    def _category_condition(self,
+                            categories: List[str],
+                            id_column: str = 'id',
+                            category_column: str = 'category') -> Tuple[str, List]:
+        """
+        SQL condition keeping foods whose category contains any of the terms
+        
+        Returns:
+            Tuple of (parenthesized condition, parameters)
+        """
+        indexed, unindexed = self._split_search_terms(categories)
+        conditions = []
+        params = []
+        if indexed:
+            conditions.append(
+                f"{id_column} IN (SELECT rowid FROM {FOOD_SEARCH_TABLE} "
+                f"WHERE {FOOD_SEARCH_TABLE} MATCH ?)"
+            )
+            params.append(self._fts_terms('category', indexed))
+        for category in unindexed:
+            conditions.append(f"{category_column} LIKE ?")
+            params.append(f"%{category}%")
+        return f"({' OR '.join(conditions) or '0'})", params
+    
+    def search_local_foods(self,
+                           query: str,
+                           limit: int = 20,
+                           offset: int = 0,
+                           budget_ms: float = None) -> Dict[str, Any]:
+        """
+        Search foods stored in the local database by name (no USDA API call)
+        
+        Matches are ranked in tiers: exact name, name prefix, substring
+        (FTS5 trigram index) and finally fuzzy matches sharing trigrams with
+        the query, for typos. Lower tiers are only queried while the
+        requested page is not full. SQLite work is aborted once
+        ``budget_ms`` is spent; whatever was found so far is returned and
+        ``partial`` is set.
+        
+        Args:
+            query: Text typed by the user
+            limit: Page size
+            offset: Number of ranked results to skip
+            budget_ms: Latency budget in milliseconds, clamped to
+                1..MAX_SEARCH_BUDGET_MS (None = unlimited)
             
+        Returns:
+            Dict with ``foods`` (each with a ``match`` tier), ``has_more``
+            and ``partial``
+        """
+        query = ' '.join((query or '').split())
+        if not query:
+            return {'foods': [], 'has_more': False, 'partial': False}
+        
+        if budget_ms is not None:
+            # A NaN deadline never passes, so non-finite budgets get the cap
+            if not math.isfinite(budget_ms):
+                budget_ms = MAX_SEARCH_BUDGET_MS
+            budget_ms = min(max(budget_ms, 1), MAX_SEARCH_BUDGET_MS)
+        
+        started = time.perf_counter()
+        deadline = None if budget_ms is None else started + budget_ms / 1000.0
+        # One extra row tells whether another page exists
+        wanted = offset + limit + 1
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        like_prefix = self._escape_like(query) + '%'
+        tiers = [
+            ('exact', "SELECT * FROM foods WHERE name = ? COLLATE NOCASE ORDER BY id LIMIT ?",
+             [query]),
+            ('prefix', "SELECT * FROM foods WHERE name LIKE ? ESCAPE '\\' "
+                       "ORDER BY length(name), name LIMIT ?",
+             [like_prefix]),
+        ]
+        if self.has_search_index() and len(query) >= 3:
+            tiers.append(('substring', f"""
+                SELECT f.* FROM {FOOD_SEARCH_TABLE}
+                JOIN foods f ON f.id = {FOOD_SEARCH_TABLE}.rowid
+                WHERE {FOOD_SEARCH_TABLE} MATCH ?
+                ORDER BY {FOOD_SEARCH_TABLE}.rank
+                LIMIT ?
+            """, [self._fts_terms('name', [query])]))
+        else:
+            tiers.append(('substring', "SELECT * FROM foods WHERE name LIKE ? ESCAPE '\\' "
+                                       "ORDER BY length(name) LIMIT ?",
+                          ['%' + self._escape_like(query) + '%']))
+        
+        results = []
+        seen = set()
+        partial = False
+        
+        if deadline is not None:
+            conn.set_progress_handler(lambda: time.perf_counter() > deadline, 1000)
+        try:
+            for tier, sql, params in tiers:
+                if len(results) >= wanted:
+                    break
+                cursor.execute(sql, params + [wanted + len(seen)])
+                self._add_search_results(results, seen, cursor.fetchall(), tier)
+            
+            if len(results) < wanted and len(query) >= 4 and self.has_search_index():
+                partial = not self._add_fuzzy_results(cursor, query, results, seen, wanted, deadline)
+        except sqlite3.OperationalError as e:
+            if 'interrupted' not in str(e):
+                raise
+            partial = True
+        finally:
+            if deadline is not None:
+                conn.set_progress_handler(None, 0)
+        
+        if partial:
+            logger.info(f"Food search for '{query}' hit its {budget_ms} ms budget")
+        
+        return {
+            'foods': results[offset:offset + limit],
+            'has_more': len(results) > offset + limit,
+            'partial': partial
+        }
+    
+    @staticmethod
+    def _escape_like(text: str) -> str:
+        """Escape LIKE wildcards (used with ESCAPE '\\')"""
+        return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    
+    @staticmethod
+    def _add_search_results(results: List[Dict], seen: set, rows, tier: str, score: float = None):
+        """Append rows not returned by a better tier"""
+        for row in rows:
+            food = {key: row[key] for key in row.keys()}
+            if food['id'] in seen:
+                continue
+            seen.add(food['id'])
+            food['match'] = tier
+            if score is not None:
+                food['score'] = score
+            results.append(food)
+    
+    def _add_fuzzy_results(self, cursor, query: str, results: List[Dict], seen: set,
+                           wanted: int, deadline: Optional[float]) -> bool:
+        """
+        Add foods sharing trigrams with the query, ranked by string similarity
+        
+        Returns:
+            False if the deadline passed before all candidates were scored
+        """
+        lowered = query.lower()
+        trigrams = sorted({lowered[i:i + 3] for i in range(len(lowered) - 2)})
+        cursor.execute(f"""
+            SELECT f.* FROM {FOOD_SEARCH_TABLE}
+            JOIN foods f ON f.id = {FOOD_SEARCH_TABLE}.rowid
+            WHERE {FOOD_SEARCH_TABLE} MATCH ?
+            ORDER BY {FOOD_SEARCH_TABLE}.rank
+            LIMIT ?
+        """, (self._fts_terms('name', trigrams), self.FUZZY_SEARCH_CANDIDATES))
+        
+        scored = []
+        complete = True
+        for row in cursor.fetchall():
+            if deadline is not None and time.perf_counter() > deadline:
+                complete = False
+                break
+            if row['id'] in seen:
+                continue
+            name = (row['name'] or '').lower()
+            # Compare against the name prefix of the query's length so long
+            # names are not penalized for their extra words
+            score = max(
+                difflib.SequenceMatcher(None, lowered, name).ratio(),
+                difflib.SequenceMatcher(None, lowered, name[:len(lowered)]).ratio()
+            )
+            if score >= self.FUZZY_SEARCH_MIN_SCORE:
+                scored.append((score, row))
+        
+        scored.sort(key=lambda item: (-item[0], len(item[1]['name'] or '')))
+        for score, row in scored[:wanted - len(results)]:
+            self._add_search_results(results, seen, [row], 'fuzzy', round(score, 3))
+        return complete
+    
     def count_foods(self) -> int:
         """Get the total number of foods in the database"""
         conn = self._get_connection()
@@ -322,50 +821,75 @@ class USDAFoodDatabase:
             logger.error(f"Error getting food details: {e}")
             return {}
     
+    # Insert-or-update of one food keyed by its USDA fdc_id
+    UPSERT_FOOD_SQL = """
+        INSERT INTO foods 
+        (fdc_id, name, category, calories, protein, carbs, fat, 
+        fiber, sugar, sodium, serving_size, serving_unit, data_source, data_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (fdc_id) DO UPDATE SET
+        name = excluded.name,
+        category = excluded.category,
+        calories = excluded.calories,
+        protein = excluded.protein,
+        carbs = excluded.carbs,
+        fat = excluded.fat,
+        fiber = excluded.fiber,
+        sugar = excluded.sugar,
+        sodium = excluded.sodium,
+        serving_size = excluded.serving_size,
+        serving_unit = excluded.serving_unit,
+        data_source = excluded.data_source,
+        data_type = excluded.data_type
+    """
+    
+    UPSERT_NUTRIENT_SQL = """
+        INSERT OR REPLACE INTO nutrients
+        (food_id, nutrient_id, name, amount, unit)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _food_params(food: Dict) -> Tuple:
+        """Parameters of UPSERT_FOOD_SQL for a food dict"""
+        return (
+            food.get('fdc_id'),
+            food.get('name'),
+            food.get('category'),
+            food.get('calories'),
+            food.get('protein'),
+            food.get('carbs'),
+            food.get('fat'),
+            food.get('fiber'),
+            food.get('sugar'),
+            food.get('sodium'),
+            food.get('serving_size'),
+            food.get('serving_unit'),
+            food.get('data_source', 'USDA'),
+            food.get('data_type')
+        )
+    
+    @staticmethod
+    def _nutrient_params(food_id: int, nutrients: List[Dict]) -> List[Tuple]:
+        """Parameters of UPSERT_NUTRIENT_SQL for a food's nutrients"""
+        return [
+            (
+                food_id,
+                nutrient.get('id'),
+                nutrient.get('name'),
+                nutrient.get('amount'),
+                nutrient.get('unit')
+            )
+            for nutrient in nutrients
+        ]
+    
     def _save_food_to_db(self, food: Dict):
         """Save food data to the database"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute(
-                """
-                INSERT INTO foods 
-                (fdc_id, name, category, calories, protein, carbs, fat, 
-                fiber, sugar, sodium, serving_size, serving_unit, data_source, data_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT (fdc_id) DO UPDATE SET
-                name = excluded.name,
-                category = excluded.category,
-                calories = excluded.calories,
-                protein = excluded.protein,
-                carbs = excluded.carbs,
-                fat = excluded.fat,
-                fiber = excluded.fiber,
-                sugar = excluded.sugar,
-                sodium = excluded.sodium,
-                serving_size = excluded.serving_size,
-                serving_unit = excluded.serving_unit,
-                data_source = excluded.data_source,
-                data_type = excluded.data_type
-                """,
-                (
-                    food.get('fdc_id'),
-                    food.get('name'),
-                    food.get('category'),
-                    food.get('calories'),
-                    food.get('protein'),
-                    food.get('carbs'),
-                    food.get('fat'),
-                    food.get('fiber'),
-                    food.get('sugar'),
-                    food.get('sodium'),
-                    food.get('serving_size'),
-                    food.get('serving_unit'),
-                    'USDA',
-                    food.get('data_type')
-                )
-            )
+            cursor.execute(self.UPSERT_FOOD_SQL, self._food_params(food))
             
             # Get the food ID
             food_id = cursor.lastrowid
@@ -378,27 +902,176 @@ class USDAFoodDatabase:
                 food_id = row['id']
             
             # Save nutrients
-            for nutrient in food.get('nutrients', []):
-                cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO nutrients
-                    (food_id, nutrient_id, name, amount, unit)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (
-                        food_id,
-                        nutrient.get('id'),
-                        nutrient.get('name'),
-                        nutrient.get('amount'),
-                        nutrient.get('unit')
-                    )
-                )
+            cursor.executemany(
+                self.UPSERT_NUTRIENT_SQL,
+                self._nutrient_params(food_id, food.get('nutrients', []))
+            )
             
             conn.commit()
+            self.refresh_catalog()
         except Exception as e:
             conn.rollback()
             logger.error(f"Error saving food to database: {e}")
     
+    def bulk_insert_foods(self,
+                          foods: Iterable[Dict],
+                          batch_size: int = 5000,
+                          fast_import: bool = False,
+                          on_batch: Callable[[Dict], None] = None) -> Dict[str, Any]:
+        """
+        Insert or update many foods with one transaction per batch
+        
+        Foods use the same upsert as _save_food_to_db (keyed by fdc_id) but
+        are written with executemany, so an import is bound by batches
+        rather than by one fsync per food. A batch that fails is rolled
+        back and retried row by row, skipping only the bad rows.
+        
+        Args:
+            foods: Iterable of food dicts (any generator works; it is
+                consumed lazily, one batch at a time)
+            batch_size: Number of foods per transaction
+            fast_import: Trade durability for speed while importing:
+                synchronous=OFF, in-memory journal, and the FTS triggers are
+                dropped and the search index rebuilt once at the end. Only
+                use on an offline database; a crash mid-import can corrupt it.
+            on_batch: Called with each batch's stats as soon as it commits
+            
+        Returns:
+            Dict with ``inserted``, ``failed``, ``seconds`` and ``batches``
+            (per-batch ``foods``, ``failed``, ``seconds``, ``foods_per_second``)
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        stats = {'inserted': 0, 'failed': 0, 'seconds': 0.0, 'batches': []}
+        started = time.perf_counter()
+        
+        previous_pragmas = None
+        if fast_import:
+            conn.commit()
+            previous_pragmas = self._enable_fast_import(conn)
+        
+        try:
+            batch = []
+            for food in foods:
+                batch.append(food)
+                if len(batch) >= batch_size:
+                    self._write_food_batch(conn, cursor, batch, stats, on_batch)
+                    batch = []
+            if batch:
+                self._write_food_batch(conn, cursor, batch, stats, on_batch)
+        finally:
+            if fast_import:
+                self._disable_fast_import(conn, previous_pragmas)
+            self.refresh_catalog()
+        
+        stats['seconds'] = time.perf_counter() - started
+        logger.info(
+            f"Bulk insert: {stats['inserted']} foods in {len(stats['batches'])} batches, "
+            f"{stats['failed']} failed, {stats['seconds']:.1f}s "
+            f"({stats['inserted'] / max(stats['seconds'], 1e-9):.0f} foods/s)"
+        )
+        return stats
+    
+    def _write_food_batch(self, conn, cursor, batch: List[Dict], stats: Dict, on_batch=None):
+        """Write one batch in a single transaction (see bulk_insert_foods)"""
+        batch_started = time.perf_counter()
+        try:
+            written = self._upsert_foods(cursor, batch)
+            failed = 0
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.warning(f"Batch of {len(batch)} foods failed ({e}), retrying row by row")
+            written = 0
+            failed = 0
+            for food in batch:
+                try:
+                    written += self._upsert_foods(cursor, [food])
+                except sqlite3.Error as row_error:
+                    failed += 1
+                    logger.warning(f"Skipping food {food.get('fdc_id') or food.get('name')}: {row_error}")
+            conn.commit()
+        
+        seconds = time.perf_counter() - batch_started
+        batch_stats = {
+            'batch': len(stats['batches']) + 1,
+            'foods': written,
+            'failed': failed,
+            'seconds': seconds,
+            'foods_per_second': written / max(seconds, 1e-9)
+        }
+        stats['batches'].append(batch_stats)
+        stats['inserted'] += written
+        stats['failed'] += failed
+        if on_batch:
+            on_batch(batch_stats)
+    
+    def _upsert_foods(self, cursor, foods: List[Dict]) -> int:
+        """Upsert foods and their nutrients; returns the number of foods written"""
+        keyed = [food for food in foods if food.get('fdc_id') is not None]
+        unkeyed = [food for food in foods if food.get('fdc_id') is None]
+        
+        cursor.executemany(self.UPSERT_FOOD_SQL, [self._food_params(food) for food in keyed])
+        
+        # Nutrient rows need the food ids; look them up once per batch
+        with_nutrients = [food for food in keyed if food.get('nutrients')]
+        if with_nutrients:
+            food_ids = {}
+            fdc_ids = [food['fdc_id'] for food in with_nutrients]
+            # Stay below SQLite's bound-variable limit
+            for i in range(0, len(fdc_ids), 900):
+                chunk = fdc_ids[i:i + 900]
+                placeholders = ','.join(['?'] * len(chunk))
+                cursor.execute(f"SELECT id, fdc_id FROM foods WHERE fdc_id IN ({placeholders})", chunk)
+                food_ids.update((str(row[1]), row[0]) for row in cursor.fetchall())
+            
+            nutrient_rows = []
+            for food in with_nutrients:
+                food_id = food_ids.get(str(food['fdc_id']))
+                if food_id is not None:
+                    nutrient_rows.extend(self._nutrient_params(food_id, food['nutrients']))
+            cursor.executemany(self.UPSERT_NUTRIENT_SQL, nutrient_rows)
+        
+        # Foods without fdc_id cannot conflict; insert them one by one for their ids
+        for food in unkeyed:
+            cursor.execute(self.UPSERT_FOOD_SQL, self._food_params(food))
+            cursor.executemany(
+                self.UPSERT_NUTRIENT_SQL,
+                self._nutrient_params(cursor.lastrowid, food.get('nutrients', []))
+            )
+        
+        return len(foods)
+    
+    def _enable_fast_import(self, conn) -> Dict[str, Any]:
+        """Switch to import-speed pragmas; returns the settings to restore"""
+        previous = {
+            'synchronous': conn.execute("PRAGMA synchronous").fetchone()[0],
+            'journal_mode': conn.execute("PRAGMA journal_mode").fetchone()[0],
+            'cache_size': conn.execute("PRAGMA cache_size").fetchone()[0],
+        }
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")  # 256 MB
+        
+        # Maintaining the FTS index row by row costs more than the inserts;
+        # it is rebuilt in one pass at the end instead
+        if self.has_search_index():
+            for trigger in FOOD_SEARCH_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.commit()
+        
+        logger.info("Fast import enabled (synchronous=OFF, journal_mode=MEMORY)")
+        return previous
+    
+    def _disable_fast_import(self, conn, previous: Dict[str, Any]):
+        """Restore pragmas changed by _enable_fast_import and rebuild the search index"""
+        conn.commit()
+        if self.has_search_index():
+            self.rebuild_search_index()
+        conn.execute(f"PRAGMA journal_mode = {previous['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {int(previous['synchronous'])}")
+        conn.execute(f"PRAGMA cache_size = {int(previous['cache_size'])}")
+    
     def import_from_csv(self, file_path: str, data_type: str = 'custom') -> int:
         """
         Import food data from a CSV file
@@ -411,6 +1084,8 @@ class USDAFoodDatabase:
             Number of records imported
         """
         try:
+            import pandas as pd
+            
             # Read CSV file
             df = pd.read_csv(file_path)
             
@@ -453,6 +1128,7 @@ class USDAFoodDatabase:
                     logger.warning(f"Error importing row: {e}")
             
             conn.commit()
+            self.refresh_catalog()
             logger.info(f"Successfully imported {count} foods from CSV")
             return count
             
@@ -491,9 +1167,10 @@ class USDAFoodDatabase:
         conn = self._get_connection()
         cursor = conn.cursor()
         
+        category_condition, params = self._category_condition([category])
         cursor.execute(
-            "SELECT * FROM foods WHERE category LIKE ? LIMIT ?",
-            (f"%{category}%", limit)
+            f"SELECT * FROM foods WHERE {category_condition} LIMIT ?",
+            params + [limit]
         )
         
         rows = cursor.fetchall()
@@ -520,6 +1197,23 @@ class USDAFoodDatabase:
         Returns:
             List of food items for the meal type
         """
+        if self.use_catalog:
+            catalog = self.get_catalog()
+            filters = {
+                'min_calories': min_calories,
+                'max_calories': max_calories,
+                'dietary_restrictions': dietary_restrictions,
+                'exclude_foods': exclude_foods
+            }
+            indices = catalog.filter_indices(meal_type=meal_type, **filters)
+            
+            # If no mappings exist, return foods based on category heuristics
+            categories = self.MEAL_TYPE_CATEGORIES.get(meal_type, [])
+            if len(indices) == 0 and categories:
+                indices = catalog.filter_indices(categories=categories, **filters)
+            
+            return catalog.get_rows(indices[:limit])
+        
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -542,14 +1236,12 @@ class USDAFoodDatabase:
             params.append(max_calories)
             
         # Add dietary restrictions filtering
-        if dietary_restrictions and len(dietary_restrictions) > 0:
-            restrictions_conditions = []
-            for restriction in dietary_restrictions:
-                if restriction:
-                    restrictions_conditions.append("f.name NOT LIKE ?")
-                    params.append(f"%{restriction}%")
-            if restrictions_conditions:
-                query_parts.append(f"AND ({' AND '.join(restrictions_conditions)})")
+        restriction_conditions, restriction_params = self._name_exclusion_conditions(
+            dietary_restrictions, name_column='f.name'
+        )
+        if restriction_conditions:
+            query_parts.append(f"AND ({' AND '.join(restriction_conditions)})")
+            params.extend(restriction_params)
                 
         # Add exclude foods filtering
         if exclude_foods and len(exclude_foods) > 0:
@@ -574,25 +1266,16 @@ class USDAFoodDatabase:
         
         # If no mappings exist, return foods based on category heuristics
         if not result:
-            meal_type_categories = {
-                'breakfast': ['Breakfast Foods', 'Cereals', 'Bakery', 'Dairy'],
-                'lunch': ['Sandwiches', 'Salads', 'Soups', 'Fast Food'],
-                'dinner': ['Meat', 'Poultry', 'Seafood', 'Pasta', 'Rice', 'Vegetables'],
-                'snack': ['Snacks', 'Fruits', 'Nuts', 'Seeds', 'Candy']
-            }
-            
-            categories = meal_type_categories.get(meal_type, [])
+            categories = self.MEAL_TYPE_CATEGORIES.get(meal_type, [])
             if categories:
                 query = "SELECT * FROM foods WHERE "
                 conditions = []
                 params = []
                 
                 # Category conditions
-                category_conditions = []
-                for cat in categories:
-                    category_conditions.append("category LIKE ?")
-                    params.append(f"%{cat}%")
-                conditions.append(f"({' OR '.join(category_conditions)})")
+                category_condition, category_params = self._category_condition(categories)
+                conditions.append(category_condition)
+                params.extend(category_params)
                 
                 # Calorie conditions
                 if min_calories is not None:
@@ -603,11 +1286,9 @@ class USDAFoodDatabase:
                     params.append(max_calories)
                     
                 # Dietary restrictions
-                if dietary_restrictions and len(dietary_restrictions) > 0:
-                    for restriction in dietary_restrictions:
-                        if restriction:
-                            conditions.append("name NOT LIKE ?")
-                            params.append(f"%{restriction}%")
+                restriction_conditions, restriction_params = self._name_exclusion_conditions(dietary_restrictions)
+                conditions.extend(restriction_conditions)
+                params.extend(restriction_params)
                             
                 # Exclude foods
                 if exclude_foods and len(exclude_foods) > 0:
@@ -644,6 +1325,16 @@ class USDAFoodDatabase:
         Returns:
             List of food items within calorie range
         """
+        if self.use_catalog:
+            catalog = self.get_catalog()
+            indices = catalog.filter_indices(
+                min_calories=min_calories,
+                max_calories=max_calories,
+                dietary_restrictions=dietary_restrictions,
+                exclude_foods=exclude_foods
+            )
+            return catalog.get_rows(indices[:limit])
+        
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -659,11 +1350,9 @@ class USDAFoodDatabase:
             params.append(max_calories)
             
         # Add dietary restrictions filtering
-        if dietary_restrictions and len(dietary_restrictions) > 0:
-            for restriction in dietary_restrictions:
-                if restriction:
-                    query_parts.append("AND name NOT LIKE ?")
-                    params.append(f"%{restriction}%")
+        restriction_conditions, restriction_params = self._name_exclusion_conditions(dietary_restrictions)
+        query_parts.extend(f"AND {condition}" for condition in restriction_conditions)
+        params.extend(restriction_params)
                 
         # Add exclude foods filtering
         if exclude_foods and len(exclude_foods) > 0:
@@ -732,6 +1421,7 @@ class USDAFoodDatabase:
                 )
             
             conn.commit()
+            self.refresh_catalog()
             return food_id
             
         except Exception as e:
@@ -745,10 +1435,15 @@ class USDAFoodDatabase:
                                      min_calories: float = None, 
                                      max_calories: float = None,
                                      dietary_restrictions: List[str] = None,
-                                     exclude_foods: List[str] = None) -> List[Dict]:
+                                     exclude_foods: List[str] = None,
+                                     seed: int = None) -> List[Dict]:
         """
         Get random foods for a specific meal type with filtering options
         
+        Foods are sampled from the matching ids instead of sorting every
+        matching row with ORDER BY RANDOM(); with the catalog enabled only
+        about ``count`` candidates are examined.
+        
         Args:
             meal_type: Meal type (breakfast, lunch, dinner, snack)
             count: Number of random foods to return
@@ -756,16 +1451,25 @@ class USDAFoodDatabase:
             max_calories: Maximum calories
             dietary_restrictions: List of dietary restrictions to avoid
             exclude_foods: List of food names to exclude
+            seed: Seed for this call only (defaults to the instance RNG)
             
         Returns:
             List of random food items for the meal type
         """
+        rng = self.rng if seed is None else random.Random(seed)
+        
+        if self.use_catalog:
+            return self._get_random_foods_from_catalog(
+                meal_type, count, min_calories, max_calories,
+                dietary_restrictions, exclude_foods, rng
+            )
+        
         conn = self._get_connection()
         cursor = conn.cursor()
         
         query_parts = [
             """
-            SELECT f.* FROM foods f
+            SELECT f.id FROM foods f
             JOIN food_meal_types fmt ON f.id = fmt.food_id
             JOIN meal_types mt ON fmt.meal_type_id = mt.id
             WHERE mt.name = ?
@@ -782,11 +1486,11 @@ class USDAFoodDatabase:
             params.append(max_calories)
             
         # Add dietary restrictions filtering
-        if dietary_restrictions and len(dietary_restrictions) > 0:
-            for restriction in dietary_restrictions:
-                if restriction:
-                    query_parts.append("AND f.name NOT LIKE ?")
-                    params.append(f"%{restriction}%")
+        restriction_conditions, restriction_params = self._name_exclusion_conditions(
+            dietary_restrictions, name_column='f.name'
+        )
+        query_parts.extend(f"AND {condition}" for condition in restriction_conditions)
+        params.extend(restriction_params)
                 
         # Add exclude foods filtering
         if exclude_foods and len(exclude_foods) > 0:
@@ -794,17 +1498,10 @@ class USDAFoodDatabase:
                 if exclude:
                     query_parts.append("AND f.name != ?")
                     params.append(exclude)
-                
-        # Add randomization and limit
-        query_parts.append("ORDER BY RANDOM() LIMIT ?")
-        params.append(count)
         
         # Combine all query parts
         full_query = " ".join(query_parts)
-        cursor.execute(full_query, params)
-        
-        rows = cursor.fetchall()
-        result = [{key: row[key] for key in row.keys()} for row in rows]
+        result = self._sample_rows(cursor, full_query, params, count, rng, id_column='f.id')
         
         # If not enough results, get additional foods based on categories
         if len(result) < count:
@@ -814,25 +1511,16 @@ class USDAFoodDatabase:
             # IDs we already have
             existing_ids = [food.get('id') for food in result]
             
-            meal_type_categories = {
-                'breakfast': ['Breakfast', 'Cereal', 'Bakery', 'Dairy'],
-                'lunch': ['Sandwich', 'Salad', 'Soup', 'Fast Food'],
-                'dinner': ['Meat', 'Poultry', 'Seafood', 'Pasta', 'Rice', 'Vegetable'],
-                'snack': ['Snack', 'Fruit', 'Nut', 'Seed', 'Candy']
-            }
-            
-            categories = meal_type_categories.get(meal_type, [])
+            categories = self.RANDOM_FILL_CATEGORIES.get(meal_type, [])
             if categories:
-                query = "SELECT * FROM foods WHERE "
+                query = "SELECT id FROM foods WHERE "
                 conditions = []
                 params = []
                 
                 # Category conditions
-                category_conditions = []
-                for cat in categories:
-                    category_conditions.append("category LIKE ?")
-                    params.append(f"%{cat}%")
-                conditions.append(f"({' OR '.join(category_conditions)})")
+                category_condition, category_params = self._category_condition(categories)
+                conditions.append(category_condition)
+                params.extend(category_params)
                 
                 # Exclude existing IDs
                 if existing_ids:
@@ -849,11 +1537,9 @@ class USDAFoodDatabase:
                     params.append(max_calories)
                     
                 # Dietary restrictions
-                if dietary_restrictions and len(dietary_restrictions) > 0:
-                    for restriction in dietary_restrictions:
-                        if restriction:
-                            conditions.append("name NOT LIKE ?")
-                            params.append(f"%{restriction}%")
+                restriction_conditions, restriction_params = self._name_exclusion_conditions(dietary_restrictions)
+                conditions.extend(restriction_conditions)
+                params.extend(restriction_params)
                             
                 # Exclude foods
                 if exclude_foods and len(exclude_foods) > 0:
@@ -862,12 +1548,8 @@ class USDAFoodDatabase:
                             conditions.append("name != ?")
                             params.append(exclude)
                 
-                query += " AND ".join(conditions) + " ORDER BY RANDOM() LIMIT ?"
-                params.append(remaining)
-                
-                cursor.execute(query, params)
-                additional_rows = cursor.fetchall()
-                result.extend([{key: row[key] for key in row.keys()} for row in additional_rows])
+                query += " AND ".join(conditions)
+                result.extend(self._sample_rows(cursor, query, params, remaining, rng))
         
         # If still not enough, get random foods
         if len(result) < count:
@@ -877,7 +1559,7 @@ class USDAFoodDatabase:
             # IDs we already have
             existing_ids = [food.get('id') for food in result]
             
-            query_parts = ["SELECT * FROM foods WHERE 1=1"]
+            query_parts = ["SELECT id FROM foods WHERE 1=1"]
             params = []
             
             # Exclude existing IDs
@@ -895,11 +1577,9 @@ class USDAFoodDatabase:
                 params.append(max_calories)
                 
             # Dietary restrictions
-            if dietary_restrictions and len(dietary_restrictions) > 0:
-                for restriction in dietary_restrictions:
-                    if restriction:
-                        query_parts.append("AND name NOT LIKE ?")
-                        params.append(f"%{restriction}%")
+            restriction_conditions, restriction_params = self._name_exclusion_conditions(dietary_restrictions)
+            query_parts.extend(f"AND {condition}" for condition in restriction_conditions)
+            params.extend(restriction_params)
                         
             # Exclude foods
             if exclude_foods and len(exclude_foods) > 0:
@@ -908,18 +1588,127 @@ class USDAFoodDatabase:
                         query_parts.append("AND name != ?")
                         params.append(exclude)
             
-            query_parts.append("ORDER BY RANDOM() LIMIT ?")
-            params.append(remaining)
-            
             # Combine all query parts
             full_query = " ".join(query_parts)
-            cursor.execute(full_query, params)
-            
-            additional_rows = cursor.fetchall()
-            result.extend([{key: row[key] for key in row.keys()} for row in additional_rows])
+            result.extend(self._sample_rows(cursor, full_query, params, remaining, rng))
         
         return result
+    
+    def _sample_rows(self, cursor, id_query: str, params: List, count: int,
+                     rng: random.Random, id_column: str = 'id') -> List[Dict]:
+        """
+        Pick ``count`` random foods among the ids returned by ``id_query``
+        
+        Random rowids are drawn between 1 and MAX(id) and checked in batches
+        by appending ``AND <id_column> IN (...)`` to the query, so each draw
+        costs a primary-key/index lookup and the total work is proportional
+        to ``count``. If the filters reject too many draws, the matching ids
+        are scanned once and sampled in Python. Either way no row is sorted.
+        
+        Args:
+            cursor: Cursor on the food database
+            id_query: ``SELECT <id_column> ... WHERE ...`` without ORDER/LIMIT
+            params: Parameters of id_query
+            count: Number of foods to pick
+            rng: Random number generator
+            id_column: Id column as referenced in id_query
+            
+        Returns:
+            List of food dictionaries in random order
+        """
+        if count <= 0:
+            return []
+        
+        # Plain tuples: building sqlite3.Row objects would dominate for large id sets
+        id_cursor = cursor.connection.cursor()
+        id_cursor.row_factory = None
+        
+        max_id = id_cursor.execute("SELECT MAX(id) FROM foods").fetchone()[0]
+        if max_id is None:
+            return []
+        
+        from app.ml.food_catalog import FoodCatalog
+        
+        ids = []
+        if count * FoodCatalog.SAMPLE_DENSE_RATIO < max_id:
+            seen = set()
+            draws_left = max(FoodCatalog.SAMPLE_MIN_DRAWS, count * FoodCatalog.SAMPLE_DRAWS_PER_ITEM)
+            
+            while len(ids) < count and draws_left > 0:
+                batch_size = min(draws_left, 4 * (count - len(ids)))
+                draws_left -= batch_size
+                
+                batch = []
+                for _ in range(batch_size):
+                    food_id = rng.randint(1, max_id)
+                    if food_id not in seen:
+                        seen.add(food_id)
+                        batch.append(food_id)
+                if not batch:
+                    continue
+                
+                placeholders = ','.join(['?'] * len(batch))
+                id_cursor.execute(f"{id_query} AND {id_column} IN ({placeholders})", list(params) + batch)
+                matched = {row[0] for row in id_cursor.fetchall()}
+                ids.extend([food_id for food_id in batch if food_id in matched][:count - len(ids)])
+        
+        if len(ids) < count:
+            # Filters too selective (or table small): sample the exact matches
+            ids = [row[0] for row in id_cursor.execute(id_query, params)]
+            if len(ids) > count:
+                ids = rng.sample(ids, count)
+            else:
+                rng.shuffle(ids)
+        if not ids:
+            return []
+        
+        placeholders = ','.join(['?'] * len(ids))
+        cursor.execute(f"SELECT * FROM foods WHERE id IN ({placeholders})", ids)
+        rows_by_id = {row['id']: {key: row[key] for key in row.keys()} for row in cursor.fetchall()}
+        return [rows_by_id[food_id] for food_id in ids if food_id in rows_by_id]
 
+    def _get_random_foods_from_catalog(self,
+                                       meal_type: str,
+                                       count: int,
+                                       min_calories: float = None,
+                                       max_calories: float = None,
+                                       dietary_restrictions: List[str] = None,
+                                       exclude_foods: List[str] = None,
+                                       rng: random.Random = None) -> List[Dict]:
+        """Catalog-backed version of get_random_foods_by_meal_type"""
+        rng = rng or self.rng
+        catalog = self.get_catalog()
+        filters = {
+            'min_calories': min_calories,
+            'max_calories': max_calories,
+            'dietary_restrictions': dietary_restrictions,
+            'exclude_foods': exclude_foods
+        }
+        
+        # Same fallback order as the SQL version: meal type mapping,
+        # then category heuristics, then any food
+        stages = [{'meal_type': meal_type}]
+        categories = self.RANDOM_FILL_CATEGORIES.get(meal_type, [])
+        if categories:
+            stages.append({'categories': categories})
+        stages.append({})
+        
+        chosen = []
+        for stage in stages:
+            remaining = count - len(chosen)
+            if remaining <= 0:
+                break
+            
+            chosen.extend(catalog.sample_indices(
+                remaining,
+                rng,
+                exclude_ids=catalog.ids[chosen] if chosen else None,
+                **stage,
+                **filters
+            ))
+        
+        return catalog.get_rows(chosen)
+    
     def seed_default_foods(self):
         """Seed the database with default foods if empty"""
         conn = self._get_connection()
@@ -1123,6 +1912,7 @@ class USDAFoodDatabase:
                 logger.error(f"Error seeding food: {e}")
         
         conn.commit()
+        self.refresh_catalog()
         logger.info(f"Seeded {len(all_foods)} default foods")
         return True 
 
@@ -0,0 +1,182 @@
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.ml.ann_index import ANNIndex, ExactCosineIndex
+from app.ml.model_serializer import ModelSerializer
+
+logger = logging.getLogger('food_similarity')
+
+# Neighbours kept per food; similar_foods can return at most this many
+DEFAULT_TOP_K = 20
+
+# Larger catalogs take minutes to index: build them with
+# scripts/build_food_similarity.py instead of at worker startup
+MAX_STARTUP_BUILD_FOODS = 5000
+
+
+def food_text(food) -> str:
+    """Text a food is vectorized from (name and category)"""
+    return f"{food.get('name') or ''} {food.get('category') or ''}"
+
+
+class FoodSimilarityIndex:
+    """
+    Precomputed nearest neighbours of every food in the catalog
+
+    Foods are embedded with the TF-IDF vectorizer and the top-k most similar
+    foods (cosine similarity) of each one are computed once, so a lookup at
+    request time only reads k ids. Neighbours are stored as food ids with
+    -1 padding for foods that have fewer than k similar foods.
+    """
+
+    def __init__(self,
+                 food_ids: np.ndarray,
+                 neighbor_ids: np.ndarray,
+                 scores: np.ndarray,
+                 vocabulary_size: int):
+        """
+        Args:
+            food_ids: Sorted ids of the indexed foods (catalog order)
+            neighbor_ids: (foods, k) neighbour ids, most similar first
+            scores: (foods, k) cosine similarity of each neighbour
+            vocabulary_size: Vocabulary size of the vectorizer used
+        """
+        self.food_ids = food_ids
+        self.neighbor_ids = neighbor_ids
+        self.scores = scores
+        self.vocabulary_size = vocabulary_size
+
+    @property
+    def k(self) -> int:
+        return self.neighbor_ids.shape[1]
+
+    @classmethod
+    def build(cls, catalog, vectorizer, k: int = DEFAULT_TOP_K,
+              ann_index: Optional[ANNIndex] = None) -> 'FoodSimilarityIndex':
+        """
+        Compute the top-k neighbours of every food in a catalog
+
+        The catalog is transformed into one sparse TF-IDF matrix (rows are
+        L2-normalized, so a dot product is the cosine similarity) and every
+        food is searched in a nearest-neighbour index of that matrix.
+
+        Args:
+            catalog: FoodCatalog snapshot
+            vectorizer: Fitted TfidfVectorizer
+            k: Neighbours to keep per food
+            ann_index: Index of this catalog to search with (default: exact
+                search); an approximate one makes large catalogs much faster
+                to index at the cost of some missed neighbours
+
+        Returns:
+            New FoodSimilarityIndex
+        """
+        start = time.perf_counter()
+        n = len(catalog)
+        k = max(0, min(k, n - 1))
+
+        rows = catalog.get_rows(range(n))
+        matrix = vectorizer.transform([food_text(food) for food in rows])
+        index = ann_index if ann_index is not None else ExactCosineIndex().build(matrix, catalog.ids)
+
+        # One extra neighbour: a food is normally its own best match
+        found_ids, found_scores = index.search(matrix, k + 1)
+        neighbor_ids = np.full((n, k), -1, dtype=np.int64)
+        scores = np.zeros((n, k), dtype=np.float32)
+        for row in range(n):
+            keep = found_ids[row] != catalog.ids[row]
+            ids = found_ids[row][keep][:k]
+            neighbor_ids[row, :len(ids)] = ids
+            scores[row, :len(ids)] = found_scores[row][keep][:k]
+
+        logger.info(f"Built food similarity index for {n} foods (k={k}, {index.name} search) "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return cls(catalog.ids.copy(), neighbor_ids, scores, len(vectorizer.vocabulary_))
+
+    def is_current(self, catalog, vectorizer) -> bool:
+        """Whether the index was built from this catalog and vectorizer"""
+        return (self.vocabulary_size == len(vectorizer.vocabulary_)
+                and np.array_equal(self.food_ids, catalog.ids))
+
+    def _position(self, food_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self.food_ids, food_id))
+        if position >= len(self.food_ids) or self.food_ids[position] != food_id:
+            return None
+        return position
+
+    def contains(self, food_id: int) -> bool:
+        """Whether the food was in the catalog the index was built from"""
+        return self._position(food_id) is not None
+
+    def similar(self, food_id: int, k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Most similar foods of a food
+
+        Args:
+            food_id: Food id
+            k: Number of neighbours (default and maximum: the index's k)
+
+        Returns:
+            List of (food_id, similarity), most similar first; empty for
+            unknown foods
+        """
+        position = self._position(food_id)
+        if position is None:
+            return []
+        ids = self.neighbor_ids[position, :k]
+        scores = self.scores[position, :k]
+        return [(int(i), float(s)) for i, s in zip(ids, scores) if i >= 0]
+
+    def save(self, path: str) -> bool:
+        """Persist the index (next to the vectorizer) as memory-mappable .npy files"""
+        return ModelSerializer.save_arrays({
+            'food_ids': self.food_ids,
+            'neighbor_ids': self.neighbor_ids,
+            'scores': self.scores,
+            'vocabulary_size': self.vocabulary_size,
+        }, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['FoodSimilarityIndex']:
+        """Load a saved index (memory-mapped, shared by the workers), None if there is none"""
+        data = ModelSerializer.load_arrays(path)
+        if data is None:
+            return None
+        return cls(data['food_ids'], data['neighbor_ids'], data['scores'], data['vocabulary_size'])
+
+    @classmethod
+    def load_or_build(cls, path: str, catalog, vectorizer,
+                      k: int = DEFAULT_TOP_K,
+                      max_build_foods: Optional[int] = None) -> Optional['FoodSimilarityIndex']:
+        """
+        Load the saved index, rebuilding (and saving) it when it is missing
+        or was built from a different catalog or vectorizer
+
+        Args:
+            path: Index directory
+            catalog: Current FoodCatalog snapshot
+            vectorizer: Fitted TfidfVectorizer
+            k: Neighbours per food for a rebuilt index
+            max_build_foods: Don't rebuild catalogs larger than this
+
+        Returns:
+            FoodSimilarityIndex matching the catalog, or None if it would
+            have to be rebuilt for a catalog above max_build_foods
+        """
+        index = cls.load(path)
+        if index is not None and index.is_current(catalog, vectorizer):
+            return index
+
+        if max_build_foods is not None and len(catalog) > max_build_foods:
+            logger.warning(f"Food similarity index at {path} is missing or out of date; "
+                           f"run scripts/build_food_similarity.py to build it for {len(catalog)} foods")
+            return None
+        if index is not None:
+            logger.info("Food similarity index is out of date, rebuilding")
+        index = cls.build(catalog, vectorizer, k)
+        index.save(path)
+        return index
+
@@ -0,0 +1,186 @@
+import re
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger('meal_type_classifier')
+
+# Keywords (lowercase) that assign a food to a meal type when they occur
+# anywhere in its name or category
+MEAL_TYPE_KEYWORDS = {
+    'breakfast': [
+        'breakfast', 'cereal', 'oatmeal', 'pancake', 'waffle', 'egg',
+        'toast', 'bagel', 'muffin', 'yogurt', 'milk', 'bread',
+        'coffee', 'tea', 'juice', 'morning',
+        # Indonesian
+        'bubur', 'nasi uduk', 'nasi kuning', 'lontong', 'ketupat',
+        'roti', 'serabi', 'kue', 'gudeg', 'kolak'
+    ],
+    'lunch': [
+        'sandwich', 'soup', 'salad', 'wrap', 'burger', 'pasta',
+        'lunch', 'noon', 'midday', 'roll', 'bowl', 'taco',
+        'burrito', 'noon meal',
+        # Indonesian
+        'nasi', 'bakso', 'soto', 'gado-gado', 'pecel', 'rendang',
+        'ayam', 'sate', 'ikan', 'sayur', 'sambal', 'tumis'
+    ],
+    'dinner': [
+        'dinner', 'steak', 'fish', 'chicken', 'pork', 'beef',
+        'roast', 'curry', 'evening', 'supper', 'casserole',
+        'stew', 'hearty', 'nighttime',
+        # Indonesian
+        'lele', 'bakar', 'goreng', 'geprek', 'rica', 'teri',
+        'tahu', 'tempe', 'terong', 'lalapan', 'sup'
+    ],
+    'snack': [
+        'snack', 'chip', 'cracker', 'nut', 'seed', 'bar',
+        'popcorn', 'pretzel', 'candy', 'chocolate', 'cookie',
+        'between meal', 'trail mix', 'dried fruit', 'jerky',
+        # Indonesian
+        'keripik', 'kerupuk', 'kacang', 'gorengan', 'cireng',
+        'bakwan', 'pisang', 'tempe mendoan', 'tahu gejrot'
+    ],
+}
+
+
+def _keyword_pattern(words: Sequence[str]) -> str:
+    """
+    Regex matching any of the words, factored as a prefix trie
+
+    ``re`` tries the alternatives of a flat ``a|b|c`` one by one at every
+    position; nesting them by common prefix lets it reject most positions
+    after a single character.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A word ends here: the longer continuations are optional
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+class MealTypeClassifier:
+    """
+    Keyword classifier assigning foods to meal types.
+
+    Every meal type's keyword list is compiled into one regex, so classifying
+    a food costs one C-level scan per meal type instead of a Python ``in``
+    check per keyword. Matching keeps the substring semantics of the original
+    heuristics ('nut' matches 'peanut'). Categories repeat across thousands
+    of foods, so their meal types are cached.
+    """
+
+    def __init__(self, keywords: Optional[Dict[str, Sequence[str]]] = None):
+        """
+        Args:
+            keywords: Meal type -> keywords (default: MEAL_TYPE_KEYWORDS)
+        """
+        keywords = keywords or MEAL_TYPE_KEYWORDS
+        self.patterns = {}
+        for meal_type, words in keywords.items():
+            words = {word.lower() for word in words if word}
+            if words:
+                self.patterns[meal_type] = re.compile(_keyword_pattern(words))
+        self._category_cache = {}
+
+    def _match(self, text: str) -> Set[str]:
+        """Meal types whose keywords occur in lowercase text"""
+        return {meal_type for meal_type, pattern in self.patterns.items() if pattern.search(text)}
+
+    def classify(self, name: Optional[str], category: Optional[str] = None) -> List[str]:
+        """
+        Meal types matching a food
+
+        Args:
+            name: Food name
+            category: Food category
+
+        Returns:
+            Matching meal types, in keyword table order
+        """
+        category_types = self._category_cache.get(category)
+        if category_types is None:
+            category_types = self._match((category or '').lower())
+            self._category_cache[category] = category_types
+
+        matched = category_types | self._match((name or '').lower()) if name else category_types
+        return [meal_type for meal_type in self.patterns if meal_type in matched]
+
+
+def map_foods_to_meal_types(conn,
+                            classifier: Optional[MealTypeClassifier] = None,
+                            batch_size: int = 10000,
+                            on_progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Classify every food and store its meal types in food_meal_types
+
+    Foods are read in batches with fetchmany and each batch's mappings are
+    written with a single executemany, all in one transaction. Existing
+    mappings are kept (INSERT OR IGNORE).
+
+    Args:
+        conn: sqlite3 connection to the food database
+        classifier: MealTypeClassifier to use (default keywords if None)
+        batch_size: Foods classified per batch
+        on_progress: Called with (foods processed, mappings) after each batch
+
+    Returns:
+        Dict with foods, mappings and seconds
+    """
+    classifier = classifier or MealTypeClassifier()
+    started_at = time.perf_counter()
+
+    meal_type_ids = {
+        row[1]: row[0] for row in conn.execute("SELECT id, name FROM meal_types")
+    }
+    missing = [meal_type for meal_type in classifier.patterns if meal_type not in meal_type_ids]
+    if missing:
+        logger.warning(f"Meal types not in database, skipped: {', '.join(missing)}")
+
+    read_cursor = conn.cursor()
+    read_cursor.execute("SELECT id, name, category FROM foods")
+    write_cursor = conn.cursor()
+
+    foods = 0
+    mappings = 0
+    try:
+        while True:
+            rows = read_cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            batch = [
+                (row[0], meal_type_ids[meal_type])
+                for row in rows
+                for meal_type in classifier.classify(row[1], row[2])
+                if meal_type in meal_type_ids
+            ]
+            if batch:
+                write_cursor.executemany(
+                    "INSERT OR IGNORE INTO food_meal_types (food_id, meal_type_id) VALUES (?, ?)",
+                    batch
+                )
+
+            foods += len(rows)
+            mappings += len(batch)
+            if on_progress:
+                on_progress(foods, mappings)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    seconds = time.perf_counter() - started_at
+    logger.info(f"Mapped {foods} foods to meal types ({mappings} mappings) in {seconds:.1f}s")
+    return {'foods': foods, 'mappings': mappings, 'seconds': seconds}
@@ -1,10 +1,9 @@
 import pickle
 import os
-import joblib
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import json
+import shutil
 import logging
+import warnings
 
 # Configure logging
 logging.basicConfig(
@@ -18,23 +17,43 @@ class ModelSerializer:
     """
     Class untuk menyimpan dan memuat model ML secara terpisah
     agar backend lebih ringan
+    
+    Ada dua format artifact:
+    - File joblib (save_model/load_model). Default-nya terkompresi; dengan
+      mmap=True array NumPy disimpan tanpa kompresi dan dimuat dengan
+      mmap_mode='r'.
+    - Direktori file .npy (save_arrays/load_arrays) untuk dict berisi array
+      dan matriks sparse, yang selalu di-memory-map saat dimuat.
+    
+    Artifact yang di-memory-map dibaca langsung dari page cache, jadi semua
+    worker gunicorn berbagi satu salinan di memori. Artifact selalu ditulis
+    ke file sementara lalu di-rename, agar worker yang sedang me-map versi
+    lama tidak membaca file setengah jadi.
     """
     
+    # Metadata direktori artifact .npy (nilai non-array dan matriks sparse)
+    ARRAYS_META_FILE = 'meta.json'
+    
     @staticmethod
-    def save_model(model, model_path):
+    def save_model(model, model_path, mmap=False):
         """
         Menyimpan model ML ke file
         
         Args:
             model: Model ML yang akan disimpan
             model_path: Path untuk menyimpan model
+            mmap: Simpan tanpa kompresi agar array bisa di-memory-map saat
+                dimuat dengan load_model(..., mmap=True)
         """
         try:
             # Buat direktori jika belum ada
-            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
             
             # Simpan model dengan joblib (lebih efisien untuk model sklearn)
-            joblib.dump(model, model_path, compress=3)
+            import joblib
+            tmp_path = f"{model_path}.tmp-{os.getpid()}"
+            joblib.dump(model, tmp_path, compress=0 if mmap else 3)
+            os.replace(tmp_path, model_path)
             logger.info(f"Model berhasil disimpan ke {model_path}")
             return True
         except Exception as e:
@@ -42,20 +61,26 @@ class ModelSerializer:
             return False
     
     @staticmethod
-    def load_model(model_path):
+    def load_model(model_path, mmap=False):
         """
         Memuat model ML dari file
         
         Args:
             model_path: Path file model yang akan dimuat
+            mmap: Memory-map array NumPy (read-only) alih-alih menyalinnya;
+                file terkompresi tetap dimuat biasa
             
         Returns:
             Model ML yang dimuat
         """
         try:
             if os.path.exists(model_path):
-                # Muat model dengan joblib
-                model = joblib.load(model_path)
+                # Muat model dengan joblib (di-import saat dipakai saja)
+                import joblib
+                with warnings.catch_warnings():
+                    # Artifact lama terkompresi tidak bisa di-map, itu tidak masalah
+                    warnings.filterwarnings('ignore', message='mmap_mode .* compressed file')
+                    model = joblib.load(model_path, mmap_mode='r' if mmap else None)
                 logger.info(f"Model berhasil dimuat dari {model_path}")
                 return model
             else:
@@ -65,6 +90,95 @@ class ModelSerializer:
             logger.error(f"Gagal memuat model: {str(e)}")
             return None
     
+    @staticmethod
+    def save_arrays(arrays, directory):
+        """
+        Menyimpan dict array sebagai direktori file .npy tanpa kompresi
+        
+        Array NumPy disimpan sebagai <nama>.npy, matriks sparse scipy sebagai
+        <nama>.data.npy, <nama>.indices.npy dan <nama>.indptr.npy (format
+        CSR), dan nilai lain (angka, string, list, dict) di meta.json.
+        
+        Args:
+            arrays: Dict nama -> array, matriks sparse, atau nilai JSON
+            directory: Direktori artifact (diganti seluruhnya)
+        """
+        tmp_dir = f"{directory.rstrip(os.sep)}.tmp-{os.getpid()}"
+        try:
+            import numpy as np
+            from scipy.sparse import issparse
+            
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            meta = {'arrays': [], 'sparse': {}, 'values': {}}
+            for name, value in arrays.items():
+                if issparse(value):
+                    value = value.tocsr()
+                    for part in ('data', 'indices', 'indptr'):
+                        np.save(os.path.join(tmp_dir, f"{name}.{part}.npy"), getattr(value, part))
+                    meta['sparse'][name] = list(value.shape)
+                elif isinstance(value, np.ndarray):
+                    np.save(os.path.join(tmp_dir, f"{name}.npy"), value)
+                    meta['arrays'].append(name)
+                else:
+                    meta['values'][name] = value
+            with open(os.path.join(tmp_dir, ModelSerializer.ARRAYS_META_FILE), 'w') as f:
+                json.dump(meta, f)
+            
+            # Ganti direktori lama; worker yang masih me-map file lama tetap
+            # bisa membacanya sampai file itu ditutup
+            old_dir = f"{directory.rstrip(os.sep)}.old-{os.getpid()}"
+            if os.path.exists(directory):
+                os.rename(directory, old_dir)
+            os.rename(tmp_dir, directory)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            logger.info(f"Array berhasil disimpan ke {directory}")
+            return True
+        except Exception as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            logger.error(f"Gagal menyimpan array: {str(e)}")
+            return False
+    
+    @staticmethod
+    def load_arrays(directory, mmap=True):
+        """
+        Memuat dict array dari direktori yang ditulis save_arrays
+        
+        Args:
+            directory: Direktori artifact
+            mmap: Memory-map file .npy (read-only) alih-alih menyalinnya
+            
+        Returns:
+            Dict nama -> array, matriks CSR, atau nilai; None jika tidak ada
+        """
+        meta_path = os.path.join(directory, ModelSerializer.ARRAYS_META_FILE)
+        if not os.path.exists(meta_path):
+            logger.warning(f"Artifact tidak ditemukan di {directory}")
+            return None
+        try:
+            import numpy as np
+            from scipy.sparse import csr_matrix
+            
+            mmap_mode = 'r' if mmap else None
+            with open(meta_path) as f:
+                meta = json.load(f)
+            
+            arrays = dict(meta['values'])
+            for name in meta['arrays']:
+                arrays[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name, shape in meta['sparse'].items():
+                data, indices, indptr = (
+                    np.load(os.path.join(directory, f"{name}.{part}.npy"), mmap_mode=mmap_mode)
+                    for part in ('data', 'indices', 'indptr')
+                )
+                # copy=False: matriks tetap memakai file yang di-map
+                arrays[name] = csr_matrix((data, indices, indptr), shape=tuple(shape), copy=False)
+            logger.info(f"Array berhasil dimuat dari {directory}")
+            return arrays
+        except Exception as e:
+            logger.error(f"Gagal memuat array: {str(e)}")
+            return None
+    
     @staticmethod
     def initialize_vectorizer(food_data=None, model_path="models/tfidf_vectorizer.joblib"):
         """
@@ -78,15 +192,51 @@ class ModelSerializer:
             TfidfVectorizer yang sudah diinisialisasi
         """
         # Coba muat model yang sudah ada
-        vectorizer = ModelSerializer.load_model(model_path)
+        vectorizer = ModelSerializer.load_model(model_path, mmap=True)
         
         # Jika tidak ada, buat model baru
         if vectorizer is None and food_data is not None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
             vectorizer = TfidfVectorizer(stop_words='english')
             # Fit vectorizer dengan data makanan
             food_texts = [f"{food.get('name', '')} {food.get('description', '')}" for food in food_data]
             vectorizer.fit(food_texts)
             # Simpan model baru
-            ModelSerializer.save_model(vectorizer, model_path)
+            ModelSerializer.save_model(vectorizer, model_path, mmap=True)
+        
+        return vectorizer
+    
+    @staticmethod
+    def initialize_ann_index(vectorizer, food_data=None, model_path="models/food_ann_index",
+                             index_type='inverted', rebuild=False, **params):
+        """
+        Muat nearest-neighbour index makanan, atau bangun dari output vectorizer
+        
+        Args:
+            vectorizer: TfidfVectorizer yang sudah di-fit
+            food_data: Data makanan (dengan 'id') untuk membangun index jika
+                belum ada; None berarti hanya memuat
+            model_path: Direktori artifact index (file .npy, di-memory-map)
+            index_type: Jenis index di ANN_INDEX_TYPES ('inverted', 'lsh', 'exact')
+            rebuild: Bangun ulang walaupun index sudah ada
+            **params: Parameter index (mis. max_postings untuk 'inverted',
+                n_tables dan n_bits untuk 'lsh')
+            
+        Returns:
+            ANNIndex, atau None jika belum ada dan food_data tidak diberikan
+        """
+        from app.ml.ann_index import create_ann_index, load_ann_index
+        
+        # Index dari vectorizer lain tidak bisa dipakai (dimensi berbeda)
+        state = None if rebuild else ModelSerializer.load_arrays(model_path)
+        if state is not None and state['matrix'].shape[1] == len(vectorizer.vocabulary_):
+            return load_ann_index(state)
+        
+        if food_data is None:
+            return None
         
-        return vectorizer 
\ No newline at end of file
+        from app.ml.food_similarity import food_text
+        matrix = vectorizer.transform([food_text(food) for food in food_data])
+        index = create_ann_index(index_type, **params).build(matrix, [food['id'] for food in food_data])
+        ModelSerializer.save_arrays(index.get_state(), model_path)
+        return index
@@ -1,4 +1,7 @@
 # backend/app/models/__init__.py
 from .user import User, UserProfile
 from .food import Food, Activity
-from .recommendation import DailyRecommendation, DailyCheckin
\ No newline at end of file
+from .recommendation import (
+    DailyRecommendation, RecommendationMeal, RecommendationActivity,
+    DailyCheckin, UserCheckinStats, PlanJob
+)
\ No newline at end of file
@@ -1,9 +1,33 @@
 from app import db
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 import json
 
+# Plan columns of DailyRecommendation mirrored in the item tables
+PLAN_COLUMNS = ('breakfast', 'lunch', 'dinner', 'activities')
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner')
+
+def _number(value):
+    """Float value of a nutrition field, None if missing or not numeric"""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _load_json(value):
+    """Decode a JSON column, None if empty or invalid"""
+    try:
+        return json.loads(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
 class DailyRecommendation(db.Model):
     __tablename__ = 'daily_recommendations'
+    __table_args__ = (
+        # One recommendation per user per day; also serves every user + date lookup
+        db.Index('ix_daily_recommendations_user_id_date', 'user_id', 'date', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -19,6 +43,47 @@ class DailyRecommendation(db.Model):
     
     # Relationships
     user = db.relationship('User', backref=db.backref('recommendations', lazy=True))
+    # Structured copy of the JSON plan columns, rebuilt on every change
+    # (see _sync_recommendation_items)
+    meal_items = db.relationship('RecommendationMeal', backref='recommendation', lazy=True,
+                                 cascade='all, delete-orphan')
+    activity_items = db.relationship('RecommendationActivity', backref='recommendation', lazy=True,
+                                     cascade='all, delete-orphan',
+                                     order_by='RecommendationActivity.position')
+    
+    @staticmethod
+    def item_values(breakfast, lunch, dinner, activities):
+        """
+        Column values of the meal and activity items for the JSON plan columns
+        
+        Args:
+            breakfast, lunch, dinner, activities: JSON strings as stored
+            
+        Returns:
+            Tuple of (meal values, activity values), lists of dicts without
+            recommendation_id
+        """
+        meals = []
+        for meal_type, meal in zip(MEAL_TYPES, (breakfast, lunch, dinner)):
+            meal = _load_json(meal)
+            if isinstance(meal, dict):
+                meals.append(RecommendationMeal.values_for(meal_type, meal))
+        
+        activity_list = _load_json(activities)
+        if not isinstance(activity_list, list):
+            activity_list = []
+        activity_values = [
+            RecommendationActivity.values_for(position, activity)
+            for position, activity in enumerate(activity_list)
+            if isinstance(activity, dict)
+        ]
+        return meals, activity_values
+    
+    def sync_items(self):
+        """Rebuild meal_items and activity_items from the JSON plan columns"""
+        meals, activities = self.item_values(self.breakfast, self.lunch, self.dinner, self.activities)
+        self.meal_items = [RecommendationMeal(**values) for values in meals]
+        self.activity_items = [RecommendationActivity(**values) for values in activities]
     
     def to_dict(self):
         """Convert model to dictionary for API responses"""
@@ -41,13 +106,102 @@ class DailyRecommendation(db.Model):
             'is_completed': self.is_completed
         }
 
+class RecommendationMeal(db.Model):
+    """One meal of a daily recommendation, with its nutrition as columns"""
+    __tablename__ = 'recommendation_meals'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recommendation_id = db.Column(db.Integer, db.ForeignKey('daily_recommendations.id'),
+                                  nullable=False, index=True)
+    meal_type = db.Column(db.String(16), nullable=False)
+    food_id = db.Column(db.Integer)  # ID in the food database
+    name = db.Column(db.String(255))
+    category = db.Column(db.String(100))
+    calories = db.Column(db.Float)
+    protein = db.Column(db.Float)
+    carbs = db.Column(db.Float)
+    fat = db.Column(db.Float)
+
+    @staticmethod
+    def values_for(meal_type, meal):
+        """Column values for a meal dict as produced by the recommendation engine"""
+        food_id = meal.get('id')
+        return {
+            'meal_type': meal_type,
+            'food_id': food_id if isinstance(food_id, int) else None,
+            'name': meal.get('name'),
+            'category': meal.get('category'),
+            'calories': _number(meal.get('calories')),
+            'protein': _number(meal.get('protein')),
+            'carbs': _number(meal.get('carbs')),
+            'fat': _number(meal.get('fat'))
+        }
+
+    def to_dict(self):
+        """Meal fields used by progress analysis"""
+        return {
+            'id': self.food_id,
+            'name': self.name,
+            'category': self.category,
+            'calories': self.calories or 0,
+            'protein': self.protein or 0,
+            'carbs': self.carbs or 0,
+            'fat': self.fat or 0
+        }
+
+class RecommendationActivity(db.Model):
+    """One activity of a daily recommendation"""
+    __tablename__ = 'recommendation_activities'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recommendation_id = db.Column(db.Integer, db.ForeignKey('daily_recommendations.id'),
+                                  nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    name = db.Column(db.String(100))
+    duration_minutes = db.Column(db.Float)
+    calories_burned = db.Column(db.Float)
+    intensity = db.Column(db.String(20))
+
+    @staticmethod
+    def values_for(position, activity):
+        """Column values for an activity dict as produced by the recommendation engine"""
+        return {
+            'position': position,
+            'name': activity.get('name'),
+            'duration_minutes': _number(activity.get('duration_minutes')),
+            'calories_burned': _number(activity.get('calories_burned')),
+            'intensity': activity.get('intensity')
+        }
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            'name': self.name,
+            'duration_minutes': self.duration_minutes,
+            'calories_burned': self.calories_burned,
+            'intensity': self.intensity
+        }
+
+@event.listens_for(Session, 'before_flush')
+def _sync_recommendation_items(session, flush_context, instances):
+    """Keep the item tables in step with the JSON columns of changed recommendations"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, DailyRecommendation):
+            continue
+        state = inspect(obj)
+        if state.pending or any(state.attrs[column].history.has_changes() for column in PLAN_COLUMNS):
+            obj.sync_items()
+
 class DailyCheckin(db.Model):
     """Daily check-in model for tracking user adherence to recommendations"""
     __tablename__ = 'daily_checkins'
+    __table_args__ = (
+        db.Index('ix_daily_checkins_user_id_date', 'user_id', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    recommendation_id = db.Column(db.Integer, db.ForeignKey('daily_recommendations.id'))
+    recommendation_id = db.Column(db.Integer, db.ForeignKey('daily_recommendations.id'), index=True)
     date = db.Column(db.Date, nullable=False, default=date.today)
     food_completed = db.Column(db.Boolean, default=False)
     activity_completed = db.Column(db.Boolean, default=False)
@@ -70,4 +224,129 @@ class DailyCheckin(db.Model):
             'activity_completed': self.activity_completed,
             'notes': self.notes,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class UserCheckinStats(db.Model):
+    """Check-in statistics per user, kept up to date by every check-in"""
+    __tablename__ = 'user_checkin_stats'
+
+    # Check-ins in this many days before today count as 'last_week'
+    LAST_WEEK_DAYS = 7
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_completed = db.Column(db.Integer, nullable=False, default=0)
+    # Latest run of consecutive days with a completed check-in
+    streak_end = db.Column(db.Date)
+    streak_days = db.Column(db.Integer, nullable=False, default=0)
+    # Completed check-ins per date (JSON) for the week up to streak_end
+    recent_completed = db.Column(db.Text, nullable=False, default='{}')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    user = db.relationship('User', backref=db.backref('checkin_stats', uselist=False, lazy=True))
+
+    def add_completed(self, checkin_date):
+        """
+        Count one more completed check-in on checkin_date
+        
+        Only valid for dates on or after streak_end; older dates need a
+        rebuild (see app.utils.checkin_stats.rebuild_user_checkin_stats).
+        """
+        self.total_completed = (self.total_completed or 0) + 1
+        
+        if self.streak_end is None or checkin_date > self.streak_end + timedelta(days=1):
+            self.streak_end = checkin_date
+            self.streak_days = 1
+        elif checkin_date == self.streak_end + timedelta(days=1):
+            self.streak_end = checkin_date
+            self.streak_days = (self.streak_days or 0) + 1
+        
+        recent = json.loads(self.recent_completed or '{}')
+        key = checkin_date.isoformat()
+        recent[key] = recent.get(key, 0) + 1
+        self.recent_completed = json.dumps(self._trim_recent(recent, self.streak_end))
+
+    @classmethod
+    def _trim_recent(cls, recent, newest):
+        """Drop dates that can no longer fall in the last week of a later day"""
+        oldest = (newest - timedelta(days=cls.LAST_WEEK_DAYS)).isoformat()
+        return {key: count for key, count in sorted(recent.items()) if key >= oldest}
+
+    def to_stats(self, today):
+        """
+        Stats as seen on a given day, in the format of compute_checkin_stats
+        
+        Returns:
+            Dict with total_completed, streak and last_week, or None when
+            there are check-ins after today (only a full query can tell the
+            streak then)
+        """
+        if self.streak_end is not None and self.streak_end > today:
+            return None
+        
+        # The streak shown ends yesterday: a completed check-in today is
+        # already part of the stored run
+        if self.streak_end == today - timedelta(days=1):
+            streak = self.streak_days
+        elif self.streak_end == today:
+            streak = self.streak_days - 1
+        else:
+            streak = 0
+        
+        last_week_start = (today - timedelta(days=self.LAST_WEEK_DAYS)).isoformat()
+        today_key = today.isoformat()
+        recent = json.loads(self.recent_completed or '{}')
+        
+        return {
+            'total_completed': self.total_completed or 0,
+            'streak': streak,
+            'last_week': sum(count for key, count in recent.items() if last_week_start <= key < today_key)
+        }
+
+class PlanJob(db.Model):
+    """Background job generating a user's recommendations for a date range"""
+    __tablename__ = 'plan_jobs'
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    __table_args__ = (
+        # At most one active job per user, enforced for concurrent enqueue_plan_job calls
+        db.Index('ix_plan_jobs_active_user_id', 'user_id', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default=STATUS_QUEUED, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_count = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    # Relationships
+    user = db.relationship('User', backref=db.backref('plan_jobs', lazy=True))
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'status': self.status,
+            'attempts': self.attempts,
+            'created_count': self.created_count,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,72 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from app.ml.food_database import USDAFoodDatabase, MAX_SEARCH_BUDGET_MS
+import math
+import time
+import traceback
+
+foods_bp = Blueprint('foods', __name__)
+
+# Batas parameter pencarian
+MAX_PER_PAGE = 50
+
+# Kolom yang dikirim ke frontend untuk autocomplete
+SEARCH_FIELDS = (
+    'id', 'name', 'category', 'calories', 'protein', 'carbs', 'fat',
+    'serving_size', 'serving_unit', 'match', 'score'
+)
+
+@foods_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_foods():
+    """Search foods in the local database (offline, for autocomplete)"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+        
+        try:
+            page = int(request.args.get('page', 1))
+            per_page = int(request.args.get('per_page', 20))
+            budget_ms = float(request.args.get('budget_ms', current_app.config['FOOD_SEARCH_BUDGET_MS']))
+        except ValueError:
+            return jsonify({'error': 'page, per_page and budget_ms must be numbers'}), 400
+        
+        if page < 1 or per_page < 1:
+            return jsonify({'error': 'page and per_page must be positive'}), 400
+        # float() accepts 'nan' and 'inf', which would disable the budget
+        if not math.isfinite(budget_ms):
+            return jsonify({'error': 'budget_ms must be a finite number'}), 400
+        per_page = min(per_page, MAX_PER_PAGE)
+        budget_ms = min(max(budget_ms, 1), MAX_SEARCH_BUDGET_MS)
+        
+        started = time.perf_counter()
+        food_db = USDAFoodDatabase()
+        result = food_db.search_local_foods(
+            query,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            budget_ms=budget_ms
+        )
+        took_ms = (time.perf_counter() - started) * 1000
+        
+        foods = [
+            {key: food[key] for key in SEARCH_FIELDS if key in food}
+            for food in result['foods']
+        ]
+        
+        return jsonify({
+            'status': 'success',
+            'query': query,
+            'foods': foods,
+            'page': page,
+            'per_page': per_page,
+            'has_more': result['has_more'],
+            'partial': result['partial'],
+            'took_ms': round(took_ms, 1)
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error searching foods: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': 'Failed to search foods', 'message': str(e)}), 500
@@ -4,8 +4,9 @@ from app import db
 from app.models.user import User, UserProfile
 from app.models.recommendation import DailyRecommendation, DailyCheckin
 from app.ml.diet_progress_analyzer import DietProgressAnalyzer
+from app.utils.meal_history import get_meal_history
+from app.utils.progress_aggregates import get_macro_averages, get_average_calories, get_checkin_counts
 from datetime import date, datetime, timedelta
-import json
 import traceback
 from flask import current_app
 
@@ -50,27 +51,8 @@ def get_progress_analysis():
         # For now, just use the current weight as a stand-in
         weight_history.append((date.today(), user.profile.weight))
         
-        # Get meal history
-        recommendations = DailyRecommendation.query.filter(
-            DailyRecommendation.user_id == user_id,
-            DailyRecommendation.date >= start_date,
-            DailyRecommendation.date <= date.today()
-        ).order_by(DailyRecommendation.date).all()
-        
-        meal_history = []
-        for rec in recommendations:
-            try:
-                meal_data = {
-                    'date': rec.date.isoformat(),
-                    'breakfast': json.loads(rec.breakfast),
-                    'lunch': json.loads(rec.lunch),
-                    'dinner': json.loads(rec.dinner),
-                    'total_calories': rec.total_calories
-                }
-                meal_history.append(meal_data)
-            except:
-                # Skip invalid data
-                continue
+        # Get meal history (from the structured meal rows)
+        meal_history = get_meal_history(user_id, start_date, date.today())
         
         # Get checkin history
         checkins = DailyCheckin.query.filter(
@@ -165,30 +147,16 @@ def get_nutritional_balance():
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
         
-        # Get meal history
-        recommendations = DailyRecommendation.query.filter(
-            DailyRecommendation.user_id == user_id,
-            DailyRecommendation.date >= start_date,
-            DailyRecommendation.date <= end_date
-        ).order_by(DailyRecommendation.date).all()
-        
-        meal_history = []
-        for rec in recommendations:
-            try:
-                meal_data = {
-                    'date': rec.date.isoformat(),
-                    'breakfast': json.loads(rec.breakfast),
-                    'lunch': json.loads(rec.lunch),
-                    'dinner': json.loads(rec.dinner),
-                    'total_calories': rec.total_calories
-                }
-                meal_history.append(meal_data)
-            except:
-                # Skip invalid data
-                continue
+        # Average macro distribution, aggregated in the database
+        macros = get_macro_averages(user_id, start_date, end_date)
         
         # Analyze nutritional balance
-        analysis = progress_analyzer.analyze_nutritional_balance(meal_history)
+        analysis = progress_analyzer.analyze_macro_averages(
+            macros['days'],
+            macros['protein_percent'],
+            macros['carb_percent'],
+            macros['fat_percent']
+        )
         
         return jsonify({
             'status': 'success',
@@ -264,37 +232,23 @@ def get_calorie_adjustment():
         end_date = date.today()
         start_date = end_date - timedelta(days=days_to_check)
         
-        recommendations = DailyRecommendation.query.filter(
-            DailyRecommendation.user_id == user_id,
-            DailyRecommendation.date >= start_date,
-            DailyRecommendation.date <= end_date
-        ).all()
-        
         # Calculate average caloric intake
-        if recommendations:
-            current_calories = sum(r.total_calories for r in recommendations) / len(recommendations)
-        else:
+        current_calories = get_average_calories(user_id, start_date, end_date)
+        if current_calories is None:
             # Fallback to target calories from the most recent recommendation
-            latest_rec = DailyRecommendation.query.filter_by(
+            current_calories = db.session.query(DailyRecommendation.target_calories).filter_by(
                 user_id=user_id
-            ).order_by(DailyRecommendation.date.desc()).first()
+            ).order_by(DailyRecommendation.date.desc()).limit(1).scalar()
             
-            if latest_rec:
-                current_calories = latest_rec.target_calories
-            else:
+            if current_calories is None:
                 return jsonify({'error': 'No recommendation history found'}), 404
         
         # Get adherence data for adjustment calculation
-        checkins = DailyCheckin.query.filter(
-            DailyCheckin.user_id == user_id,
-            DailyCheckin.date >= start_date,
-            DailyCheckin.date <= end_date
-        ).all()
+        checkin_counts = get_checkin_counts(user_id, start_date, end_date)
         
         # Calculate adherence percentage
-        total_days = len(checkins)
-        completed_days = sum(1 for c in checkins 
-                           if c.food_completed and c.activity_completed)
+        total_days = checkin_counts['total_days']
+        completed_days = checkin_counts['completed_days']
         
         adherence_percent = (completed_days / total_days) * 100 if total_days > 0 else 50
         
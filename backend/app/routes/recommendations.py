@@ -1,84 +1,37 @@
 # backend/app/routes/recommendations.py
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models.user import User, UserProfile
-from app.models.recommendation import DailyRecommendation, DailyCheckin
-from app.ml.advanced_recommendation_engine import AdvancedRecommendationEngine
+from app.models.recommendation import DailyRecommendation, DailyCheckin, PlanJob
+from app.ml.engine_registry import get_recommendation_engine
 from app.ml.diet_progress_analyzer import DietProgressAnalyzer
+from app.utils.checkin_stats import get_checkin_stats, empty_checkin_stats, record_checkin
+from app.utils.month_planner import plan_recommendations, save_recommendation
+from app.utils.plan_jobs import ensure_future_recommendations
+from app.utils.response_cache import cached_json_response
 from datetime import date, datetime, timedelta
 import json
 import calendar
 import traceback
 from flask import current_app
-import os
 import random
 
 recommendations_bp = Blueprint('recommendations', __name__)
-# Initialize the advanced recommendation engine with USDA API key from environment
-api_key = os.environ.get('USDA_API_KEY')
-ml_engine = AdvancedRecommendationEngine(api_key=api_key)
+# The recommendation engine is built lazily, once per worker process,
+# by get_recommendation_engine() (uses USDA_API_KEY from environment)
 progress_analyzer = DietProgressAnalyzer()
 
-# Function to generate a month of recommendations for a user
-def generate_month_recommendations(user_id):
+def queue_month_plan(user_id, today):
+    """Queue background generation of the coming month if needed; job info for the response"""
     try:
-        # Check if user exists and has a profile
-        user = User.query.get(user_id)
-        if not user or not user.profile:
-            return False, "User profile not found"
-        
-        # Start from today
-        start_date = date.today()
-        
-        # Generate for 30 days ahead
-        end_date = start_date + timedelta(days=30)
-        
-        current_date = start_date
-        created_count = 0
-        
-        # Create a local instance of the engine for thread safety
-        local_ml_engine = AdvancedRecommendationEngine()
-        
-        while current_date <= end_date:
-            # Check if recommendation already exists for this date
-            existing_rec = DailyRecommendation.query.filter_by(
-                user_id=user_id, 
-                date=current_date
-            ).first()
-            
-            if not existing_rec:
-                # Generate new recommendation
-                user_profile_dict = user.profile.to_dict()
-                recommendation_data = local_ml_engine.generate_daily_recommendation(user_profile_dict)
-                
-                # Save to database
-                new_recommendation = DailyRecommendation(
-                    user_id=user_id,
-                    date=current_date,
-                    breakfast=json.dumps(recommendation_data['meals']['breakfast']),
-                    lunch=json.dumps(recommendation_data['meals']['lunch']),
-                    dinner=json.dumps(recommendation_data['meals']['dinner']),
-                    activities=json.dumps(recommendation_data['activities']),
-                    total_calories=recommendation_data['meals']['total_calories'],
-                    target_calories=recommendation_data['meals']['target_calories']
-                )
-                
-                db.session.add(new_recommendation)
-                created_count += 1
-            
-            current_date += timedelta(days=1)
-        
-        # Commit all changes at once
-        db.session.commit()
-        
-        return True, f"Generated {created_count} days of recommendations"
-        
+        job = ensure_future_recommendations(user_id, today)
+        return job.to_dict() if job else None
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error auto-generating month: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
-        return False, str(e)
+        current_app.logger.warning(f"Could not queue month plan: {str(e)}")
+        return None
 
 @recommendations_bp.route('/today', methods=['GET'])
 @jwt_required()
@@ -97,74 +50,17 @@ def get_today_recommendations():
         day_in_program = (today - start_date).days + 1  # Hari pertama = 1
         days_remaining = max(0, diet_duration - day_in_program + 1)
         
-        # Check if we need to generate a month of recommendations
-        recommendations_count = DailyRecommendation.query.filter(
-            DailyRecommendation.user_id == user_id,
-            DailyRecommendation.date >= date.today()
-        ).count()
-        
-        if recommendations_count < 30:
-            # Generate a month of recommendations if fewer than 30 days exist
-            success, message = generate_month_recommendations(user_id)
-            if not success:
-                current_app.logger.warning(f"Could not auto-generate month: {message}")
-        
         # Cek apakah sudah ada rekomendasi hari ini
         existing_rec = DailyRecommendation.query.filter_by(
             user_id=user_id, 
             date=today
         ).first()
         
-        # Dapatkan data check-in
-        checkin_stats = {
-            'total_completed': 0,
-            'streak': 0,
-            'last_week': 0
-        }
-        
         # Dapatkan statistik check-in
         try:
-            # Hitung total check-in yang selesai (food dan activity)
-            total_completed = DailyCheckin.query.filter(
-                DailyCheckin.user_id == user_id,
-                DailyCheckin.food_completed == True,
-                DailyCheckin.activity_completed == True
-            ).count()
-            
-            # Hitung streak saat ini
-            streak = 0
-            check_date = today - timedelta(days=1)  # Mulai dari kemarin
-            
-            while True:
-                checkin = DailyCheckin.query.filter(
-                    DailyCheckin.user_id == user_id,
-                    DailyCheckin.date == check_date,
-                    DailyCheckin.food_completed == True,
-                    DailyCheckin.activity_completed == True
-                ).first()
-                
-                if not checkin:
-                    break
-                    
-                streak += 1
-                check_date -= timedelta(days=1)
-            
-            # Hitung check-ins minggu lalu
-            last_week_start = today - timedelta(days=7)
-            last_week_completed = DailyCheckin.query.filter(
-                DailyCheckin.user_id == user_id,
-                DailyCheckin.date >= last_week_start,
-                DailyCheckin.date < today,
-                DailyCheckin.food_completed == True,
-                DailyCheckin.activity_completed == True
-            ).count()
-            
-            checkin_stats = {
-                'total_completed': total_completed,
-                'streak': streak,
-                'last_week': last_week_completed
-            }
+            checkin_stats = get_checkin_stats(user_id, today)
         except Exception as e:
+            checkin_stats = empty_checkin_stats()
             current_app.logger.error(f"Error calculating checkin stats: {str(e)}")
         
         if existing_rec:
@@ -187,43 +83,34 @@ def get_today_recommendations():
                     'diet_duration': diet_duration,
                     'days_remaining': days_remaining
                 },
-                'checkin_stats': checkin_stats
+                'checkin_stats': checkin_stats,
+                'plan_job': queue_month_plan(user_id, today)
             }), 200
         
         # Generate new recommendation
         user_profile_dict = user.profile.to_dict()
         
-        # Create a new instance to avoid thread issues
-        local_ml_engine = AdvancedRecommendationEngine()
+        # Shared engine, database handles are per thread
+        local_ml_engine = get_recommendation_engine()
         recommendation_data = local_ml_engine.generate_daily_recommendation(user_profile_dict)
         
-        # Save to database
-        new_recommendation = DailyRecommendation(
-            user_id=user_id,
-            date=today,
-            breakfast=json.dumps(recommendation_data['meals']['breakfast']),
-            lunch=json.dumps(recommendation_data['meals']['lunch']),
-            dinner=json.dumps(recommendation_data['meals']['dinner']),
-            activities=json.dumps(recommendation_data['activities']),
-            total_calories=recommendation_data['meals']['total_calories'],
-            target_calories=recommendation_data['meals']['target_calories']
-        )
-        
-        db.session.add(new_recommendation)
+        # Save to database (a concurrent request may have created it first)
+        new_recommendation, is_new = save_recommendation(user_id, today, recommendation_data, overwrite=False)
         db.session.commit()
         
         return jsonify({
             'recommendations': new_recommendation.to_dict(),
             'user_stats': recommendation_data['user_stats'],
-            'is_new': True,
+            'is_new': is_new,
             'already_checked_in': False,
             'program_progress': {
                 'day_in_program': day_in_program,
                 'diet_duration': diet_duration,
                 'days_remaining': days_remaining
             },
-            'checkin_stats': checkin_stats
-        }), 201
+            'checkin_stats': checkin_stats,
+            'plan_job': queue_month_plan(user_id, today)
+        }), 201 if is_new else 200
         
     except Exception as e:
         current_app.logger.error(f"Error getting today recommendations: {str(e)}")
@@ -258,8 +145,8 @@ def regenerate_recommendation(meal_type):
             except:
                 dietary_restrictions = []
                 
-        # Create a new instance to avoid thread issues
-        local_ml_engine = AdvancedRecommendationEngine()
+        # Shared engine, database handles are per thread
+        local_ml_engine = get_recommendation_engine()
         
         if meal_type in ['breakfast', 'lunch', 'dinner']:
             # Get current meal to exclude
@@ -271,7 +158,8 @@ def regenerate_recommendation(meal_type):
                 meal_type, 
                 recommendation.target_calories,
                 dietary_restrictions,
-                exclude_previous
+                exclude_previous,
+                previous_food_id=current_meal.get('id')
             )
             
             # Update database
@@ -365,6 +253,8 @@ def daily_checkin():
         recommendation.is_completed = data['food_completed'] and data['activity_completed']
         
         db.session.add(checkin)
+        # Stats are saved in the same transaction as the check-in
+        record_checkin(checkin)
         db.session.commit()
         
         # Calculate next day's recommendation
@@ -410,8 +300,8 @@ def daily_checkin():
                                  checkin_dict[r.date].food_completed and 
                                  checkin_dict[r.date].activity_completed)
             
-            # Create a recommendation engine instance
-            ml_engine_local = AdvancedRecommendationEngine()
+            # Shared recommendation engine
+            ml_engine_local = get_recommendation_engine()
             
             # Calculate new target calories based on adherence
             user_profile_dict = user.profile.to_dict()
@@ -475,18 +365,8 @@ def daily_checkin():
                     existing_recommendation.target_calories = recommendation_data['meals']['target_calories']
                     next_day_recommendation = existing_recommendation
                 else:
-                    # Create new
-                    next_day_recommendation = DailyRecommendation(
-                        user_id=user_id,
-                        date=tomorrow,
-                        breakfast=json.dumps(recommendation_data['meals']['breakfast']),
-                        lunch=json.dumps(recommendation_data['meals']['lunch']),
-                        dinner=json.dumps(recommendation_data['meals']['dinner']),
-                        activities=json.dumps(recommendation_data['activities']),
-                        total_calories=recommendation_data['meals']['total_calories'],
-                        target_calories=recommendation_data['meals']['target_calories']
-                    )
-                    db.session.add(next_day_recommendation)
+                    # Create new (updates it if a plan job created it meanwhile)
+                    next_day_recommendation, _ = save_recommendation(user_id, tomorrow, recommendation_data)
             else:
                 # All activities completed, keep recommendation as is
                 next_day_recommendation = existing_recommendation
@@ -512,36 +392,68 @@ def daily_checkin():
         current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+# Page size of the history endpoint
+HISTORY_DEFAULT_LIMIT = 7
+HISTORY_MAX_LIMIT = 100
+
 @recommendations_bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_recommendation_history():
+    """
+    Get past recommendations with their check-ins, newest first
+    
+    Query params: limit (default 7, max 100) and before (YYYY-MM-DD cursor,
+    exclusive; use next_cursor of the previous page).
+    """
     try:
         user_id = get_jwt_identity()
         
-        # Get last 7 days of recommendations
-        recommendations = DailyRecommendation.query.filter_by(
-            user_id=user_id
-        ).order_by(DailyRecommendation.date.desc()).limit(7).all()
+        try:
+            limit = int(request.args.get('limit', HISTORY_DEFAULT_LIMIT))
+            if not 1 <= limit <= HISTORY_MAX_LIMIT:
+                raise ValueError
+        except ValueError:
+            return jsonify({'error': f'limit must be between 1 and {HISTORY_MAX_LIMIT}'}), 400
+        
+        before_str = request.args.get('before')
+        try:
+            before = datetime.strptime(before_str, '%Y-%m-%d').date() if before_str else None
+        except ValueError:
+            return jsonify({'error': 'Invalid before date format. Use YYYY-MM-DD'}), 400
+        
+        # One query for the page and its check-ins; dates are unique per user,
+        # so the last date of a page is an exact cursor for the next one
+        query = DailyRecommendation.query.options(
+            joinedload(DailyRecommendation.checkins)
+        ).filter(DailyRecommendation.user_id == user_id)
+        if before is not None:
+            query = query.filter(DailyRecommendation.date < before)
+        recommendations = query.order_by(DailyRecommendation.date.desc()).limit(limit + 1).all()
+        
+        has_more = len(recommendations) > limit
+        recommendations = recommendations[:limit]
         
         history = []
         for rec in recommendations:
             rec_dict = rec.to_dict()
             
-            # Get checkin for this date
-            checkin = DailyCheckin.query.filter_by(
-                user_id=user_id,
-                recommendation_id=rec.id
-            ).first()
+            # Check-in for this recommendation (the first one if there are several)
+            checkins = [c for c in rec.checkins if c.user_id == rec.user_id]
+            checkin = min(checkins, key=lambda c: c.id) if checkins else None
             
             rec_dict['checkin'] = checkin.to_dict() if checkin else None
             history.append(rec_dict)
         
         return jsonify({
             'history': history,
-            'total_days': len(history)
+            'total_days': len(history),
+            'has_more': has_more,
+            'next_cursor': recommendations[-1].date.isoformat() if has_more else None
         }), 200
         
     except Exception as e:
+        current_app.logger.error(f"Error getting recommendation history: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
 # Add a test endpoint without JWT for debugging
@@ -579,58 +491,13 @@ def get_today_recommendations_test():
             date=today
         ).first()
         
-        # Dapatkan data check-in untuk test
-        checkin_stats = {
-            'total_completed': 0,
-            'streak': 0,
-            'last_week': 0
-        }
-        
         # Dapatkan statistik check-in untuk test
         try:
-            # Hitung total check-in yang selesai (food dan activity)
-            total_completed = DailyCheckin.query.filter(
-                DailyCheckin.user_id == user_id,
-                DailyCheckin.food_completed == True,
-                DailyCheckin.activity_completed == True
-            ).count()
-            
-            # Hitung streak saat ini
-            streak = 0
-            check_date = today - timedelta(days=1)  # Mulai dari kemarin
-            
-            while True:
-                checkin = DailyCheckin.query.filter(
-                    DailyCheckin.user_id == user_id,
-                    DailyCheckin.date == check_date,
-                    DailyCheckin.food_completed == True,
-                    DailyCheckin.activity_completed == True
-                ).first()
-                
-                if not checkin:
-                    break
-                    
-                streak += 1
-                check_date -= timedelta(days=1)
-            
-            # Hitung check-ins minggu lalu
-            last_week_start = today - timedelta(days=7)
-            last_week_completed = DailyCheckin.query.filter(
-                DailyCheckin.user_id == user_id,
-                DailyCheckin.date >= last_week_start,
-                DailyCheckin.date < today,
-                DailyCheckin.food_completed == True,
-                DailyCheckin.activity_completed == True
-            ).count()
-            
-            checkin_stats = {
-                'total_completed': total_completed,
-                'streak': streak,
-                'last_week': last_week_completed
-            }
-            
-            print(f"TEST - Checkin stats: Total={total_completed}, Streak={streak}, Last Week={last_week_completed}")
+            checkin_stats = get_checkin_stats(user_id, today)
+            print(f"TEST - Checkin stats: Total={checkin_stats['total_completed']}, "
+                  f"Streak={checkin_stats['streak']}, Last Week={checkin_stats['last_week']}")
         except Exception as e:
+            checkin_stats = empty_checkin_stats()
             print(f"TEST - Error calculating checkin stats: {str(e)}")
         
         if existing_rec:
@@ -661,23 +528,12 @@ def get_today_recommendations_test():
         print(f"TEST - Generating new recommendation for user {user_id}")
         user_profile_dict = profile.to_dict()  # Use profile directly instead of user.profile
         
-        # Create a local instance to avoid thread issues
-        local_ml_engine = AdvancedRecommendationEngine()
+        # Shared engine, database handles are per thread
+        local_ml_engine = get_recommendation_engine()
         recommendation_data = local_ml_engine.generate_daily_recommendation(user_profile_dict)
         
-        # Save to database
-        new_recommendation = DailyRecommendation(
-            user_id=user_id,
-            date=today,
-            breakfast=json.dumps(recommendation_data['meals']['breakfast']),
-            lunch=json.dumps(recommendation_data['meals']['lunch']),
-            dinner=json.dumps(recommendation_data['meals']['dinner']),
-            activities=json.dumps(recommendation_data['activities']),
-            total_calories=recommendation_data['meals']['total_calories'],
-            target_calories=recommendation_data['meals']['target_calories']
-        )
-        
-        db.session.add(new_recommendation)
+        # Save to database (a concurrent request may have created it first)
+        new_recommendation, is_new = save_recommendation(user_id, today, recommendation_data, overwrite=False)
         db.session.commit()
         
         print(f"TEST - New recommendation created for user {user_id}")
@@ -685,7 +541,7 @@ def get_today_recommendations_test():
         return jsonify({
             'recommendations': new_recommendation.to_dict(),
             'user_stats': recommendation_data['user_stats'],
-            'is_new': True,
+            'is_new': is_new,
             'already_checked_in': False,
             'program_progress': {
                 'day_in_program': day_in_program,
@@ -693,7 +549,7 @@ def get_today_recommendations_test():
                 'days_remaining': days_remaining
             },
             'checkin_stats': checkin_stats
-        }), 201
+        }), 201 if is_new else 200
         
     except Exception as e:
         print(f"TEST - Error getting recommendations: {str(e)}")
@@ -740,8 +596,8 @@ def regenerate_recommendation_test(meal_type):
         
         print(f"TEST - Processing regeneration for {meal_type}")
         
-        # Create a new instance of the recommendation engine to avoid thread issues
-        local_ml_engine = AdvancedRecommendationEngine()
+        # Shared engine, database handles are per thread
+        local_ml_engine = get_recommendation_engine()
 
         if meal_type in ['breakfast', 'lunch', 'dinner']:
             # Get current meal to exclude
@@ -753,7 +609,8 @@ def regenerate_recommendation_test(meal_type):
                 meal_type, 
                 recommendation.target_calories,
                 dietary_restrictions,
-                exclude_previous
+                exclude_previous,
+                previous_food_id=current_meal.get('id')
             )
             
             # Update database
@@ -853,6 +710,7 @@ def daily_checkin_test():
                 activity_completed=data['activity_completed']
             )
             db.session.add(checkin)
+            record_checkin(checkin)
         
         # Update recommendation completion status
         recommendation.is_completed = data['food_completed'] and data['activity_completed']
@@ -906,8 +764,8 @@ def daily_checkin_test():
             
             print(f"TEST - Adherence: {successful_days}/{days_passed} days successful")
             
-            # Create a recommendation engine instance
-            ml_engine_local = AdvancedRecommendationEngine()
+            # Shared recommendation engine
+            ml_engine_local = get_recommendation_engine()
             
             # Calculate new target calories based on adherence
             user_profile_dict = profile.to_dict()
@@ -977,18 +835,8 @@ def daily_checkin_test():
                     next_day_recommendation = existing_recommendation
                     print(f"TEST - Updated recommendation for tomorrow")
                 else:
-                    # Create new
-                    next_day_recommendation = DailyRecommendation(
-                        user_id=user_id,
-                        date=tomorrow,
-                        breakfast=json.dumps(recommendation_data['meals']['breakfast']),
-                        lunch=json.dumps(recommendation_data['meals']['lunch']),
-                        dinner=json.dumps(recommendation_data['meals']['dinner']),
-                        activities=json.dumps(recommendation_data['activities']),
-                        total_calories=recommendation_data['meals']['total_calories'],
-                        target_calories=recommendation_data['meals']['target_calories']
-                    )
-                    db.session.add(next_day_recommendation)
+                    # Create new (updates it if a plan job created it meanwhile)
+                    next_day_recommendation, _ = save_recommendation(user_id, tomorrow, recommendation_data)
                     print(f"TEST - Created new recommendation for tomorrow")
             else:
                 # All activities completed or insufficient data, keep recommendation as is
@@ -1017,6 +865,45 @@ def daily_checkin_test():
         print(f"TEST - Error during check-in: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def build_month_payload(user_id, start_date, end_date):
+    """Month calendar payload: recommendations with their check-in status"""
+    # Query recommendations for the month
+    recommendations = DailyRecommendation.query.filter(
+        DailyRecommendation.user_id == user_id,
+        DailyRecommendation.date >= start_date,
+        DailyRecommendation.date <= end_date
+    ).all()
+    
+    # Get check-ins for the month
+    checkins = DailyCheckin.query.filter(
+        DailyCheckin.user_id == user_id,
+        DailyCheckin.date >= start_date,
+        DailyCheckin.date <= end_date
+    ).all()
+    
+    # Create a lookup dictionary for checkins based on recommendation_id
+    checkin_dict = {c.recommendation_id: c for c in checkins}
+    
+    # Convert recommendations to dict and add checkin data
+    result = []
+    for rec in recommendations:
+        rec_dict = rec.to_dict()
+        
+        # Add checkin data if exists for this specific recommendation
+        if rec.id in checkin_dict:
+            checkin = checkin_dict[rec.id]
+            rec_dict['checkin'] = {
+                'food_completed': checkin.food_completed,
+                'activity_completed': checkin.activity_completed
+            }
+        
+        result.append(rec_dict)
+    
+    return {
+        'status': 'success',
+        'recommendations': result
+    }, 200
+
 @recommendations_bp.route('/month/<int:year>/<int:month>', methods=['GET'])
 @jwt_required()
 def get_month_recommendations(year, month):
@@ -1033,48 +920,58 @@ def get_month_recommendations(year, month):
         start_date = date(year, month, 1)
         end_date = date(year, month, last_day)
         
-        # Query recommendations for the month
-        recommendations = DailyRecommendation.query.filter(
-            DailyRecommendation.user_id == user_id,
-            DailyRecommendation.date >= start_date,
-            DailyRecommendation.date <= end_date
-        ).all()
-        
-        # Get check-ins for the month
-        checkins = DailyCheckin.query.filter(
-            DailyCheckin.user_id == user_id,
-            DailyCheckin.date >= start_date,
-            DailyCheckin.date <= end_date
-        ).all()
-        
-        # Create a lookup dictionary for checkins based on recommendation_id
-        checkin_dict = {c.recommendation_id: c for c in checkins}
-        
-        # Convert recommendations to dict and add checkin data
-        result = []
-        for rec in recommendations:
-            rec_dict = rec.to_dict()
-            
-            # Add checkin data if exists for this specific recommendation
-            if rec.id in checkin_dict:
-                checkin = checkin_dict[rec.id]
-                rec_dict['checkin'] = {
-                    'food_completed': checkin.food_completed,
-                    'activity_completed': checkin.activity_completed
-                }
-            
-            result.append(rec_dict)
-        
-        return jsonify({
-            'status': 'success',
-            'recommendations': result
-        })
+        # Served from the response cache until the user's data changes
+        return cached_json_response(
+            user_id, f'month:{year}-{month:02d}',
+            lambda: build_month_payload(user_id, start_date, end_date)
+        )
     
     except Exception as e:
         current_app.logger.error(f"Error getting month recommendations: {str(e)}")
         current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+def build_day_payload(user_id, req_date):
+    """Day view payload: the recommendation and its check-in status"""
+    # Query recommendation for the day
+    recommendation = DailyRecommendation.query.filter_by(
+        user_id=user_id,
+        date=req_date
+    ).first()
+    
+    if not recommendation:
+        return {
+            'status': 'not_found',
+            'message': f'No recommendation found for {req_date.isoformat()}'
+        }, 404
+        
+    # Get check-in for this specific recommendation
+    checkin = DailyCheckin.query.filter_by(
+        user_id=user_id,
+        recommendation_id=recommendation.id,
+        date=req_date
+    ).first()
+    
+    result = recommendation.to_dict()
+    
+    # Add checkin data if exists
+    if checkin:
+        checkin_data = {
+            'food_completed': checkin.food_completed,
+            'activity_completed': checkin.activity_completed
+        }
+    else:
+        checkin_data = {
+            'food_completed': False,
+            'activity_completed': False
+        }
+    
+    return {
+        'status': 'success',
+        'recommendation': result,
+        'checkin': checkin_data
+    }, 200
+
 @recommendations_bp.route('/day/<string:date_str>', methods=['GET'])
 @jwt_required()
 def get_day_recommendation(date_str):
@@ -1084,49 +981,15 @@ def get_day_recommendation(date_str):
     try:
         # Parse date from string (format: YYYY-MM-DD)
         try:
-            from datetime import datetime
             req_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
-        # Query recommendation for the day
-        recommendation = DailyRecommendation.query.filter_by(
-            user_id=user_id,
-            date=req_date
-        ).first()
-        
-        if not recommendation:
-            return jsonify({
-                'status': 'not_found',
-                'message': f'No recommendation found for {date_str}'
-            }), 404
-            
-        # Get check-in for this specific recommendation
-        checkin = DailyCheckin.query.filter_by(
-            user_id=user_id,
-            recommendation_id=recommendation.id,
-            date=req_date
-        ).first()
-        
-        result = recommendation.to_dict()
-        
-        # Add checkin data if exists
-        if checkin:
-            checkin_data = {
-                'food_completed': checkin.food_completed,
-                'activity_completed': checkin.activity_completed
-            }
-        else:
-            checkin_data = {
-                'food_completed': False,
-                'activity_completed': False
-            }
-        
-        return jsonify({
-            'status': 'success',
-            'recommendation': result,
-            'checkin': checkin_data
-        })
+        # Served from the response cache until the user's data changes
+        return cached_json_response(
+            user_id, f'day:{req_date.isoformat()}',
+            lambda: build_day_payload(user_id, req_date)
+        )
         
     except Exception as e:
         current_app.logger.error(f"Error getting day recommendation: {str(e)}")
@@ -1171,23 +1034,19 @@ def generate_for_date():
             
         # Generate new recommendation
         user_profile_dict = user.profile.to_dict()
-        recommendation_data = ml_engine.generate_daily_recommendation(user_profile_dict)
+        recommendation_data = get_recommendation_engine().generate_daily_recommendation(user_profile_dict)
         
-        # Save to database
-        new_recommendation = DailyRecommendation(
-            user_id=user_id,
-            date=req_date,
-            breakfast=json.dumps(recommendation_data['meals']['breakfast']),
-            lunch=json.dumps(recommendation_data['meals']['lunch']),
-            dinner=json.dumps(recommendation_data['meals']['dinner']),
-            activities=json.dumps(recommendation_data['activities']),
-            total_calories=recommendation_data['meals']['total_calories'],
-            target_calories=recommendation_data['meals']['target_calories']
-        )
-        
-        db.session.add(new_recommendation)
+        # Save to database (a concurrent request may have created it first)
+        new_recommendation, created = save_recommendation(user_id, req_date, recommendation_data, overwrite=False)
         db.session.commit()
         
+        if not created:
+            return jsonify({
+                'status': 'exists',
+                'recommendation': new_recommendation.to_dict(),
+                'message': f'Recommendation for {data["date"]} already exists'
+            }), 200
+        
         return jsonify({
             'status': 'created',
             'recommendation': new_recommendation.to_dict(),
@@ -1211,51 +1070,16 @@ def generate_month_ahead():
         if not user or not user.profile:
             return jsonify({'error': 'User profile not found'}), 404
         
-        # Start from tomorrow
+        # Start from tomorrow, generate for 30 days ahead
         start_date = date.today() + timedelta(days=1)
-        
-        # Generate for 30 days ahead
         end_date = start_date + timedelta(days=30)
         
-        current_date = start_date
-        created_recommendations = []
-        existing_recommendations = []
-        
-        while current_date <= end_date:
-            # Check if recommendation already exists for this date
-            existing_rec = DailyRecommendation.query.filter_by(
-                user_id=user_id, 
-                date=current_date
-            ).first()
-            
-            if existing_rec:
-                existing_recommendations.append({
-                    'date': current_date.isoformat(),
-                    'id': existing_rec.id
-                })
-            else:
-                # Generate new recommendation
-                user_profile_dict = user.profile.to_dict()
-                recommendation_data = ml_engine.generate_daily_recommendation(user_profile_dict)
-                
-                # Save to database
-                new_recommendation = DailyRecommendation(
-                    user_id=user_id,
-                    date=current_date,
-                    breakfast=json.dumps(recommendation_data['meals']['breakfast']),
-                    lunch=json.dumps(recommendation_data['meals']['lunch']),
-                    dinner=json.dumps(recommendation_data['meals']['dinner']),
-                    activities=json.dumps(recommendation_data['activities']),
-                    total_calories=recommendation_data['meals']['total_calories'],
-                    target_calories=recommendation_data['meals']['target_calories']
-                )
-                
-                db.session.add(new_recommendation)
-                created_recommendations.append({
-                    'date': current_date.isoformat()
-                })
-            
-            current_date += timedelta(days=1)
+        # One query for existing days, one bulk insert for the missing ones
+        plan = plan_recommendations(user, start_date, end_date)
+        created_recommendations = [{'date': day.isoformat()} for day in plan['created']]
+        existing_recommendations = [
+            {'date': day.isoformat(), 'id': rec_id} for day, rec_id in sorted(plan['existing'].items())
+        ]
         
         # Commit all changes at once
         db.session.commit()
@@ -1272,4 +1096,47 @@ def generate_month_ahead():
         db.session.rollback()
         current_app.logger.error(f"Error generating month ahead: {str(e)}")
         current_app.logger.error(traceback.format_exc())
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@recommendations_bp.route('/plan-jobs', methods=['GET'])
+@jwt_required()
+def list_plan_jobs():
+    """List the user's most recent background plan jobs"""
+    user_id = get_jwt_identity()
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        jobs = PlanJob.query.filter_by(user_id=user_id).order_by(PlanJob.id.desc()).limit(limit).all()
+        
+        return jsonify({
+            'status': 'success',
+            'jobs': [job.to_dict() for job in jobs]
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error listing plan jobs: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@recommendations_bp.route('/plan-jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_plan_job(job_id):
+    """Get the status of one background plan job"""
+    user_id = get_jwt_identity()
+    
+    try:
+        job = PlanJob.query.filter_by(id=job_id, user_id=user_id).first()
+        if not job:
+            return jsonify({'error': 'Plan job not found'}), 404
+        
+        return jsonify({
+            'status': 'success',
+            'job': job.to_dict()
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error getting plan job: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
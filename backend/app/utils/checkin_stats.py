@@ -0,0 +1,273 @@
+import json
+import logging
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import Boolean, Date, Integer, bindparam, text
+from sqlalchemy.exc import DBAPIError
+
+from app import db
+from app.models.user import User
+from app.models.recommendation import DailyCheckin, UserCheckinStats
+
+logger = logging.getLogger('checkin_stats')
+
+# Window counted by 'last_week' (the days before today)
+LAST_WEEK_DAYS = UserCheckinStats.LAST_WEEK_DAYS
+
+# Days between :today and a check-in date, per database dialect
+_DAYS_AGO_SQL = {
+    'sqlite': "CAST(julianday(:today) - julianday(date) AS INTEGER)",
+    'postgresql': "(:today - date)",
+}
+
+# Gaps-and-islands: numbering the distinct completed days newest first,
+# the days of the streak ending yesterday are exactly those whose distance
+# from today equals their row number (1, 2, 3, ...). The first gap breaks
+# the equality for every older day.
+_CHECKIN_STATS_SQL = """
+    WITH completed AS (
+        SELECT date FROM daily_checkins
+        WHERE user_id = :user_id
+          AND food_completed = :completed
+          AND activity_completed = :completed
+    ),
+    days AS (
+        SELECT {days_ago} AS days_ago,
+               ROW_NUMBER() OVER (ORDER BY date DESC) AS day_number
+        FROM (SELECT DISTINCT date FROM completed WHERE date < :today) AS completed_days
+    )
+    SELECT
+        (SELECT COUNT(*) FROM completed) AS total_completed,
+        (SELECT COUNT(*) FROM completed
+         WHERE date >= :last_week_start AND date < :today) AS last_week,
+        (SELECT COUNT(*) FROM days WHERE days_ago = day_number) AS streak
+"""
+
+
+def empty_checkin_stats() -> Dict[str, int]:
+    """Stats for a user without completed check-ins"""
+    return {'total_completed': 0, 'streak': 0, 'last_week': 0}
+
+
+def compute_checkin_stats(user_id: int, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Check-in statistics shown on the today page
+
+    A check-in counts when both food and activity are completed.
+
+    Args:
+        user_id: User ID
+        today: Reference date (default: date.today())
+
+    Returns:
+        Dict with total_completed (completed check-ins), streak (consecutive
+        days with a completed check-in, ending yesterday) and last_week
+        (completed check-ins in the 7 days before today)
+    """
+    today = today or date.today()
+
+    days_ago = _DAYS_AGO_SQL.get(db.engine.dialect.name)
+    if days_ago is not None:
+        try:
+            return _checkin_stats_sql(user_id, today, days_ago)
+        except DBAPIError as e:
+            # e.g. SQLite older than 3.25 has no window functions
+            db.session.rollback()
+            logger.warning(f"Check-in stats query failed, using Python fallback: {e}")
+
+    dates = [
+        row[0] for row in db.session.query(DailyCheckin.date).filter(
+            DailyCheckin.user_id == user_id,
+            DailyCheckin.food_completed == True,
+            DailyCheckin.activity_completed == True
+        )
+    ]
+    return checkin_stats_from_dates(dates, today)
+
+
+def _checkin_stats_sql(user_id: int, today: date, days_ago: str) -> Dict[str, int]:
+    """Compute the stats in one statement (see _CHECKIN_STATS_SQL)"""
+    statement = text(_CHECKIN_STATS_SQL.format(days_ago=days_ago)).bindparams(
+        bindparam('user_id', type_=Integer),
+        bindparam('completed', type_=Boolean),
+        bindparam('today', type_=Date),
+        bindparam('last_week_start', type_=Date),
+    )
+    row = db.session.execute(statement, {
+        'user_id': user_id,
+        'completed': True,
+        'today': today,
+        'last_week_start': today - timedelta(days=LAST_WEEK_DAYS),
+    }).one()
+    return {
+        'total_completed': row.total_completed or 0,
+        'streak': row.streak or 0,
+        'last_week': row.last_week or 0,
+    }
+
+
+def checkin_stats_from_dates(dates: Iterable[date], today: date) -> Dict[str, int]:
+    """
+    Compute the stats from the dates of all completed check-ins
+
+    Args:
+        dates: One date per completed check-in (duplicates allowed)
+        today: Reference date
+
+    Returns:
+        Same dict as compute_checkin_stats
+    """
+    dates = list(dates)
+    last_week_start = today - timedelta(days=LAST_WEEK_DAYS)
+
+    completed_days = set(dates)
+    streak = 0
+    check_date = today - timedelta(days=1)  # Mulai dari kemarin
+    while check_date in completed_days:
+        streak += 1
+        check_date -= timedelta(days=1)
+
+    return {
+        'total_completed': len(dates),
+        'streak': streak,
+        'last_week': sum(1 for day in dates if last_week_start <= day < today),
+    }
+
+
+def get_checkin_stats(user_id: int, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Check-in statistics from the user_checkin_stats table
+
+    A single primary-key lookup on the read path. Users without a row yet
+    (created before the table existed) get it built and saved on first read.
+
+    Args:
+        user_id: User ID
+        today: Reference date (default: date.today())
+
+    Returns:
+        Same dict as compute_checkin_stats
+    """
+    today = today or date.today()
+    stats = db.session.get(UserCheckinStats, int(user_id))
+    if stats is None:
+        stats = rebuild_user_checkin_stats(user_id)
+        db.session.commit()
+
+    result = stats.to_stats(today)
+    if result is None:
+        return compute_checkin_stats(user_id, today)
+    return result
+
+
+def record_checkin(checkin: DailyCheckin) -> Optional[UserCheckinStats]:
+    """
+    Update the user's stats for a new check-in, in the caller's transaction
+
+    Call after adding the check-in to the session and before committing, so
+    the check-in and the stats are saved together.
+
+    Args:
+        checkin: The new DailyCheckin
+
+    Returns:
+        The updated UserCheckinStats, or None if the check-in is not completed
+    """
+    if not (checkin.food_completed and checkin.activity_completed):
+        return None
+
+    stats = db.session.get(UserCheckinStats, int(checkin.user_id))
+    if stats is None or (stats.streak_end is not None and checkin.date < stats.streak_end):
+        # First stats for this user or a back-dated check-in: the running
+        # counters can't absorb it, recount from daily_checkins
+        db.session.flush()
+        return rebuild_user_checkin_stats(checkin.user_id)
+
+    stats.add_completed(checkin.date)
+    return stats
+
+
+def _stats_fields(dates: Iterable[date]) -> Dict:
+    """Column values of UserCheckinStats for the dates of completed check-ins"""
+    counts = Counter(dates)
+    if not counts:
+        return {'total_completed': 0, 'streak_end': None, 'streak_days': 0, 'recent_completed': '{}'}
+
+    streak_end = max(counts)
+    streak_days = 0
+    check_date = streak_end
+    while check_date in counts:
+        streak_days += 1
+        check_date -= timedelta(days=1)
+
+    recent = {day.isoformat(): count for day, count in counts.items()}
+    return {
+        'total_completed': sum(counts.values()),
+        'streak_end': streak_end,
+        'streak_days': streak_days,
+        'recent_completed': json.dumps(UserCheckinStats._trim_recent(recent, streak_end)),
+    }
+
+
+def rebuild_user_checkin_stats(user_id: int) -> UserCheckinStats:
+    """
+    Recount one user's stats from daily_checkins (added to the session, not committed)
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        The rebuilt UserCheckinStats
+    """
+    user_id = int(user_id)
+    dates = [
+        row[0] for row in db.session.query(DailyCheckin.date).filter(
+            DailyCheckin.user_id == user_id,
+            DailyCheckin.food_completed == True,
+            DailyCheckin.activity_completed == True
+        )
+    ]
+
+    stats = db.session.get(UserCheckinStats, user_id)
+    if stats is None:
+        stats = UserCheckinStats(user_id=user_id)
+        db.session.add(stats)
+    for column, value in _stats_fields(dates).items():
+        setattr(stats, column, value)
+    return stats
+
+
+def rebuild_all_checkin_stats() -> int:
+    """
+    Rebuild user_checkin_stats for every user from daily_checkins
+
+    Reads all completed check-ins in one query and replaces the table in one
+    transaction.
+
+    Returns:
+        Number of users written
+    """
+    dates_by_user = defaultdict(list)
+    rows = db.session.query(DailyCheckin.user_id, DailyCheckin.date).filter(
+        DailyCheckin.food_completed == True,
+        DailyCheckin.activity_completed == True
+    )
+    for user_id, checkin_date in rows:
+        dates_by_user[user_id].append(checkin_date)
+
+    user_ids = [row[0] for row in db.session.query(User.id)]
+    try:
+        UserCheckinStats.query.delete()
+        db.session.add_all([
+            UserCheckinStats(user_id=user_id, **_stats_fields(dates_by_user.get(user_id, [])))
+            for user_id in user_ids
+        ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Rebuilt check-in stats for {len(user_ids)} users")
+    return len(user_ids)
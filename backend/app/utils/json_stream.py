@@ -0,0 +1,170 @@
+import io
+import json
+import time
+import logging
+from typing import Any, IO, Iterator, Optional
+
+logger = logging.getLogger('json_stream')
+
+_WHITESPACE = ' \t\n\r'
+
+
+class JsonArrayReader:
+    """
+    Incremental reader for one large JSON array of records.
+
+    The file is read in fixed-size chunks and each element is decoded with
+    ``json.JSONDecoder.raw_decode`` (the C scanner) as soon as it is complete,
+    so memory stays bounded by one chunk plus the largest element regardless
+    of file size. Both layouts used by USDA FoodData Central downloads are
+    supported: a top-level array (``[{...}, ...]``) and an object wrapping the
+    array (``{"BrandedFoods": [{...}, ...]}``), in which case the first array
+    found is read.
+
+    Usage::
+
+        with open(path, encoding='utf-8') as file:
+            reader = JsonArrayReader(file, label='branded foods')
+            for food in reader:
+                ...
+            reader.log_progress(final=True)
+    """
+
+    def __init__(self,
+                 file: IO,
+                 chunk_size: int = 1 << 20,
+                 label: str = 'items',
+                 progress_every: Optional[int] = 10000,
+                 max_item_size: int = 64 << 20):
+        """
+        Args:
+            file: Text or binary file object (binary input is decoded as UTF-8)
+            chunk_size: Number of characters read per chunk
+            label: Name used in progress messages
+            progress_every: Log throughput every N elements (None = never)
+            max_item_size: Largest element accepted (guards against reading a
+                malformed file into memory)
+        """
+        if isinstance(file, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(file, 'mode', ''):
+            file = io.TextIOWrapper(file, encoding='utf-8')
+        self.file = file
+        self.chunk_size = chunk_size
+        self.label = label
+        self.progress_every = progress_every
+        self.max_item_size = max_item_size
+
+        self.items_read = 0
+        self.chars_read = 0
+        self.started_at = None
+        self._decoder = json.JSONDecoder()
+
+    def __iter__(self) -> Iterator[Any]:
+        self.started_at = time.perf_counter()
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def read_more(buffer, pos):
+            # Drop the consumed prefix so the buffer never grows with the file
+            chunk = self.file.read(self.chunk_size)
+            self.chars_read += len(chunk)
+            return buffer[pos:] + chunk, 0, not chunk
+
+        # Find the opening bracket of the array
+        while True:
+            start = self._find_array_start(buffer, pos)
+            if start is not None:
+                pos = start + 1
+                break
+            if eof:
+                raise ValueError("No JSON array found in input")
+            # Only the short header before the array is kept here
+            buffer, pos, eof = read_more(buffer, 0)
+
+        while True:
+            # Skip separators between elements
+            while True:
+                while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ','):
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer, pos, eof = read_more(buffer, pos)
+
+            if pos >= len(buffer):
+                raise ValueError(f"Unexpected end of input after {self.items_read} {self.label}")
+            if buffer[pos] == ']':
+                return
+
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+                # The element is only complete once the next separator is in
+                # the buffer: a number split across chunks ("-1." + "5e3")
+                # decodes fine but too early
+                after = end
+                while after < len(buffer) and buffer[after] in _WHITESPACE:
+                    after += 1
+                complete = after < len(buffer) and buffer[after] in ',]'
+                if not complete and eof:
+                    raise ValueError(f"Malformed JSON array after {self.items_read} {self.label}")
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+
+            if not complete:
+                if len(buffer) - pos > self.max_item_size:
+                    raise ValueError(
+                        f"JSON element larger than {self.max_item_size} characters "
+                        f"after {self.items_read} {self.label}"
+                    )
+                buffer, pos, eof = read_more(buffer, pos)
+                continue
+
+            pos = end
+            self.items_read += 1
+            yield item
+
+            if self.progress_every and self.items_read % self.progress_every == 0:
+                self.log_progress()
+
+    @staticmethod
+    def _find_array_start(buffer: str, pos: int) -> Optional[int]:
+        """Position of the first '[' outside a string, or None if not in buffer"""
+        in_string = False
+        escaped = False
+        for i in range(pos, len(buffer)):
+            char = buffer[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '[':
+                return i
+        return None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since iteration started"""
+        if self.started_at is None:
+            return 0.0
+        return time.perf_counter() - self.started_at
+
+    def log_progress(self, final: bool = False):
+        """Log the number of elements read and the throughput so far"""
+        elapsed = max(self.elapsed, 1e-9)
+        megabytes = self.chars_read / (1024 * 1024)
+        logger.info(
+            f"{'Finished' if final else 'Read'} {self.items_read} {self.label}, "
+            f"{megabytes:.1f} MB in {elapsed:.1f}s "
+            f"({megabytes / elapsed:.1f} MB/s, {self.items_read / elapsed:.0f} {self.label}/s)"
+        )
+
+
+def iter_json_array(file: IO, **kwargs) -> Iterator[Any]:
+    """Iterate over the elements of a (possibly wrapped) JSON array; see JsonArrayReader"""
+    return iter(JsonArrayReader(file, **kwargs))
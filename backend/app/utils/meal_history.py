@@ -0,0 +1,49 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, List
+
+from app import db
+from app.models.recommendation import DailyRecommendation, RecommendationMeal
+
+
+def get_meal_history(user_id: int, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """
+    Daily meals of a user in the format used by DietProgressAnalyzer
+
+    Reads the recommendation_meals rows (two queries for the whole range)
+    instead of decoding the JSON meal columns of every recommendation.
+
+    Args:
+        user_id: User ID
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
+
+    Returns:
+        One dict per day, oldest first, with date, total_calories and a dict
+        (name, calories, protein, carbs, fat, ...) per meal type
+    """
+    in_range = (
+        DailyRecommendation.user_id == user_id,
+        DailyRecommendation.date >= start_date,
+        DailyRecommendation.date <= end_date
+    )
+
+    days = db.session.query(
+        DailyRecommendation.id, DailyRecommendation.date, DailyRecommendation.total_calories
+    ).filter(*in_range).order_by(DailyRecommendation.date).all()
+
+    meals_by_recommendation = defaultdict(dict)
+    meals = RecommendationMeal.query.join(
+        DailyRecommendation, RecommendationMeal.recommendation_id == DailyRecommendation.id
+    ).filter(*in_range)
+    for meal in meals:
+        meals_by_recommendation[meal.recommendation_id][meal.meal_type] = meal.to_dict()
+
+    return [
+        dict(
+            meals_by_recommendation.get(recommendation_id, {}),
+            date=day.isoformat(),
+            total_calories=total_calories
+        )
+        for recommendation_id, day, total_calories in days
+    ]
@@ -0,0 +1,155 @@
+import json
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.recommendation import DailyRecommendation, RecommendationMeal, RecommendationActivity
+from app.ml.engine_registry import get_recommendation_engine
+from app.utils.response_cache import invalidate_user_on_commit
+
+logger = logging.getLogger('month_planner')
+
+
+def recommendation_row(user_id: int, day: date, recommendation_data: Dict) -> Dict:
+    """Column values of a DailyRecommendation for engine output"""
+    meals = recommendation_data['meals']
+    return {
+        'user_id': user_id,
+        'date': day,
+        'breakfast': json.dumps(meals['breakfast']),
+        'lunch': json.dumps(meals['lunch']),
+        'dinner': json.dumps(meals['dinner']),
+        'activities': json.dumps(recommendation_data['activities']),
+        'total_calories': meals['total_calories'],
+        'target_calories': meals['target_calories']
+    }
+
+
+def save_recommendation(user_id: int, day: date, recommendation_data: Dict,
+                        overwrite: bool = True) -> Tuple[DailyRecommendation, bool]:
+    """
+    Store a user's recommendation for one day (the caller commits)
+
+    The insert runs in a savepoint: if another request or a plan job created
+    the day first, the unique (user_id, date) index rejects it and the
+    existing row is used instead.
+
+    Args:
+        user_id: User ID
+        day: Recommendation date
+        recommendation_data: Engine output (generate_daily_recommendation)
+        overwrite: Replace the meals of an existing row (False keeps it as is)
+
+    Returns:
+        Tuple of (recommendation, created)
+    """
+    values = recommendation_row(int(user_id), day, recommendation_data)
+    recommendation = DailyRecommendation.query.filter_by(user_id=user_id, date=day).first()
+
+    if recommendation is None:
+        try:
+            with db.session.begin_nested():
+                recommendation = DailyRecommendation(**values)
+                db.session.add(recommendation)
+            return recommendation, True
+        except IntegrityError:
+            logger.info(f"Recommendation for user {user_id} on {day} was created concurrently")
+            recommendation = DailyRecommendation.query.filter_by(user_id=user_id, date=day).one()
+
+    if overwrite:
+        for column, value in values.items():
+            setattr(recommendation, column, value)
+    return recommendation, False
+
+
+def _existing_dates(user_id: int, start_date: date, end_date: date) -> Dict[date, int]:
+    """{date: id} of a user's recommendations in a date range"""
+    return dict(
+        db.session.query(DailyRecommendation.date, DailyRecommendation.id).filter(
+            DailyRecommendation.user_id == user_id,
+            DailyRecommendation.date >= start_date,
+            DailyRecommendation.date <= end_date
+        )
+    )
+
+
+def insert_recommendation_items(recommendation_ids: Dict[date, int], rows: List[Dict]):
+    """
+    Bulk insert the meal and activity items of recommendations written with a
+    Core INSERT (the ORM keeps them in sync for everything else)
+
+    Args:
+        recommendation_ids: {date: id} of the inserted recommendations
+        rows: Their column values (see recommendation_row)
+    """
+    meal_rows, activity_rows = [], []
+    for row in rows:
+        recommendation_id = recommendation_ids[row['date']]
+        meals, activities = DailyRecommendation.item_values(
+            row['breakfast'], row['lunch'], row['dinner'], row['activities']
+        )
+        meal_rows.extend(dict(values, recommendation_id=recommendation_id) for values in meals)
+        activity_rows.extend(dict(values, recommendation_id=recommendation_id) for values in activities)
+
+    if meal_rows:
+        db.session.execute(insert(RecommendationMeal), meal_rows)
+    if activity_rows:
+        db.session.execute(insert(RecommendationActivity), activity_rows)
+
+
+def plan_recommendations(user, start_date: date, end_date: date, engine=None) -> Dict[str, List]:
+    """
+    Create the missing daily recommendations of a user for a date range
+
+    Existing dates are fetched in one query, all missing days are generated
+    in one engine call (shared meal candidates, see
+    generate_daily_recommendations) and written with one bulk INSERT (plus
+    one per item table, see insert_recommendation_items). The caller
+    commits. Days created concurrently by another request are skipped (see
+    the retry below).
+
+    Args:
+        user: User with a profile
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
+        engine: Recommendation engine (default: the shared engine)
+
+    Returns:
+        Dict with 'created' (dates generated) and 'existing' ({date: id} of
+        recommendations that were already there)
+    """
+    existing = _existing_dates(user.id, start_date, end_date)
+
+    missing = []
+    current_date = start_date
+    while current_date <= end_date:
+        if current_date not in existing:
+            missing.append(current_date)
+        current_date += timedelta(days=1)
+
+    if missing:
+        engine = engine or get_recommendation_engine()
+        recommendations = engine.generate_daily_recommendations(user.profile.to_dict(), len(missing))
+        rows = [recommendation_row(user.id, day, data) for day, data in zip(missing, recommendations)]
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(DailyRecommendation), rows)
+        except IntegrityError:
+            # Some days were created meanwhile (e.g. /today or a plan job racing
+            # generate_month_ahead): insert only the days still missing
+            existing = _existing_dates(user.id, start_date, end_date)
+            rows = [row for row in rows if row['date'] not in existing]
+            missing = [row['date'] for row in rows]
+            if rows:
+                db.session.execute(insert(DailyRecommendation), rows)
+        if rows:
+            insert_recommendation_items(_existing_dates(user.id, start_date, end_date), rows)
+            # Core INSERTs are not seen by the ORM change tracking
+            invalidate_user_on_commit(db.session, user.id)
+        logger.info(f"Planned {len(missing)} days for user {user.id} ({len(existing)} already existed)")
+
+    return {'created': missing, 'existing': existing}
@@ -0,0 +1,232 @@
+import os
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.user import User
+from app.models.recommendation import DailyRecommendation, PlanJob
+from app.utils.month_planner import plan_recommendations
+
+logger = logging.getLogger('plan_jobs')
+
+# Number of days kept generated ahead of today
+PLAN_AHEAD_DAYS = 30
+
+# One worker pool per process, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _reset_executor_after_fork():
+    """Worker threads do not survive fork; the child starts its own pool"""
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_executor_after_fork)
+
+
+def _get_executor(app) -> ThreadPoolExecutor:
+    """Get (or start) this process's job worker pool"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('PLAN_JOB_WORKERS', 2),
+                thread_name_prefix='plan-job'
+            )
+        return _executor
+
+
+def _is_stale(job: PlanJob, now: datetime) -> bool:
+    """Whether an active job has been waiting or running too long to still be alive"""
+    stale_after = timedelta(seconds=current_app.config.get('PLAN_JOB_STALE_SECONDS', 600))
+    last_activity = job.started_at or job.created_at
+    return last_activity is not None and now - last_activity > stale_after
+
+
+def submit_plan_job(app, job_id: int):
+    """
+    Hand a queued job to the worker pool
+
+    With PLAN_JOBS_EAGER (tests) the job runs immediately in the caller.
+    """
+    if app.config.get('PLAN_JOBS_EAGER'):
+        run_plan_job(job_id)
+    else:
+        _get_executor(app).submit(_run_in_app_context, app, job_id)
+
+
+def _run_in_app_context(app, job_id: int):
+    """Worker thread entry point"""
+    with app.app_context():
+        try:
+            run_plan_job(job_id)
+        except Exception:
+            logger.error(traceback.format_exc())
+        finally:
+            db.session.remove()
+
+
+def run_plan_job(job_id: int) -> bool:
+    """
+    Claim a queued job and generate its recommendations
+
+    The claim is a conditional UPDATE (queued -> running), so a job submitted
+    by several processes (e.g. requeued at startup by every worker) runs once.
+
+    Args:
+        job_id: PlanJob ID
+
+    Returns:
+        True if this call ran the job
+    """
+    claimed = PlanJob.query.filter_by(id=job_id, status=PlanJob.STATUS_QUEUED).update({
+        'status': PlanJob.STATUS_RUNNING,
+        'started_at': datetime.utcnow(),
+        'attempts': PlanJob.attempts + 1
+    }, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return False
+
+    job = db.session.get(PlanJob, job_id)
+    try:
+        user = db.session.get(User, job.user_id)
+        if not user or not user.profile:
+            raise ValueError("User profile not found")
+
+        plan = plan_recommendations(user, job.start_date, job.end_date)
+        job.status = PlanJob.STATUS_DONE
+        job.created_count = len(plan['created'])
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(f"Plan job {job_id} done: {job.created_count} days for user {job.user_id}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Plan job {job_id} failed: {e}")
+        job = db.session.get(PlanJob, job_id)
+        job.status = PlanJob.STATUS_FAILED
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    return True
+
+
+def enqueue_plan_job(user_id: int, start_date: date, end_date: date) -> PlanJob:
+    """
+    Queue generation of a user's recommendations for a date range
+
+    A user has at most one active job: if one is already queued or running
+    it is returned instead (and resubmitted when it looks abandoned). A
+    partial unique index backs this up against concurrent calls.
+
+    Args:
+        user_id: User ID
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
+
+    Returns:
+        The new or already active PlanJob
+    """
+    app = current_app._get_current_object()
+    now = datetime.utcnow()
+
+    job = _active_plan_job(user_id)
+    if job is not None:
+        if _is_stale(job, now):
+            # The process that owned it is gone: run it again
+            logger.warning(f"Requeueing stale plan job {job.id} ({job.status})")
+            job.status = PlanJob.STATUS_QUEUED
+            db.session.commit()
+            submit_plan_job(app, job.id)
+        return job
+
+    job = PlanJob(user_id=int(user_id), start_date=start_date, end_date=end_date)
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request queued one first (ix_plan_jobs_active_user_id)
+        db.session.rollback()
+        logger.info(f"Plan job for user {user_id} was queued concurrently")
+        job = _active_plan_job(user_id)
+        if job is None:
+            raise
+        return job
+    submit_plan_job(app, job.id)
+    return job
+
+
+def _active_plan_job(user_id: int) -> Optional[PlanJob]:
+    """The user's queued or running job, if any"""
+    return PlanJob.query.filter(
+        PlanJob.user_id == user_id,
+        PlanJob.status.in_(PlanJob.ACTIVE_STATUSES)
+    ).order_by(PlanJob.id.desc()).first()
+
+
+def ensure_future_recommendations(user_id: int, today: Optional[date] = None) -> Optional[PlanJob]:
+    """
+    Queue a job when fewer than PLAN_AHEAD_DAYS days from today are generated
+
+    Args:
+        user_id: User ID
+        today: Reference date (default: date.today())
+
+    Returns:
+        The queued/active PlanJob, or None if the plan is complete
+    """
+    today = today or date.today()
+    planned_days = DailyRecommendation.query.filter(
+        DailyRecommendation.user_id == user_id,
+        DailyRecommendation.date >= today
+    ).count()
+    if planned_days >= PLAN_AHEAD_DAYS:
+        return None
+    return enqueue_plan_job(user_id, today, today + timedelta(days=PLAN_AHEAD_DAYS))
+
+
+def resume_plan_jobs(app) -> int:
+    """
+    Resubmit jobs left queued by a previous run of the application
+
+    Jobs stuck in 'running' longer than PLAN_JOB_STALE_SECONDS belonged to a
+    process that died and are queued again.
+
+    Returns:
+        Number of jobs submitted
+    """
+    with app.app_context():
+        try:
+            stale_before = datetime.utcnow() - timedelta(seconds=app.config.get('PLAN_JOB_STALE_SECONDS', 600))
+            PlanJob.query.filter(
+                PlanJob.status == PlanJob.STATUS_RUNNING,
+                PlanJob.started_at < stale_before
+            ).update({'status': PlanJob.STATUS_QUEUED}, synchronize_session=False)
+            job_ids = [
+                row[0] for row in db.session.query(PlanJob.id).filter(
+                    PlanJob.status == PlanJob.STATUS_QUEUED
+                ).order_by(PlanJob.id)
+            ]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not resume plan jobs: {e}")
+            return 0
+
+        for job_id in job_ids:
+            submit_plan_job(app, job_id)
+        if job_ids:
+            logger.info(f"Resumed {len(job_ids)} queued plan job(s)")
+        return len(job_ids)
@@ -0,0 +1,111 @@
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import case, func
+
+from app import db
+from app.models.recommendation import DailyRecommendation, DailyCheckin, RecommendationMeal
+
+# Calories per gram of each macronutrient
+PROTEIN_CALORIES = 4
+CARB_CALORIES = 4
+FAT_CALORIES = 9
+
+
+def _recommendations_in_range(user_id: int, start_date: date, end_date: date):
+    """Filter criteria for a user's recommendations between two dates (inclusive)"""
+    return (
+        DailyRecommendation.user_id == user_id,
+        DailyRecommendation.date >= start_date,
+        DailyRecommendation.date <= end_date
+    )
+
+
+def get_macro_averages(user_id: int, start_date: date, end_date: date) -> Dict[str, Optional[float]]:
+    """
+    Average macronutrient distribution of a user's meals, computed in SQL
+
+    Meals are summed per day (recommendation), each day's protein/carb/fat
+    share of calories is computed and the shares are averaged over the days
+    with calories, as DietProgressAnalyzer.analyze_nutritional_balance does.
+    Only one row comes back, whatever the length of the range.
+
+    Args:
+        user_id: User ID
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
+
+    Returns:
+        Dict with days (recommendations in the range) and protein_percent,
+        carb_percent, fat_percent (None when no day has calories)
+    """
+    per_day = db.session.query(
+        DailyRecommendation.id.label('recommendation_id'),
+        func.coalesce(func.sum(RecommendationMeal.calories), 0).label('calories'),
+        func.coalesce(func.sum(RecommendationMeal.protein), 0).label('protein'),
+        func.coalesce(func.sum(RecommendationMeal.carbs), 0).label('carbs'),
+        func.coalesce(func.sum(RecommendationMeal.fat), 0).label('fat')
+    ).outerjoin(
+        RecommendationMeal, RecommendationMeal.recommendation_id == DailyRecommendation.id
+    ).filter(
+        *_recommendations_in_range(user_id, start_date, end_date)
+    ).group_by(DailyRecommendation.id).subquery()
+
+    def average_share(grams, calories_per_gram):
+        # AVG skips the NULLs of days without calories
+        return func.avg(case(
+            (per_day.c.calories > 0, grams * (calories_per_gram * 100.0) / per_day.c.calories)
+        ))
+
+    row = db.session.query(
+        func.count(per_day.c.recommendation_id).label('days'),
+        average_share(per_day.c.protein, PROTEIN_CALORIES).label('protein_percent'),
+        average_share(per_day.c.carbs, CARB_CALORIES).label('carb_percent'),
+        average_share(per_day.c.fat, FAT_CALORIES).label('fat_percent')
+    ).one()
+
+    return {
+        'days': row.days or 0,
+        'protein_percent': row.protein_percent,
+        'carb_percent': row.carb_percent,
+        'fat_percent': row.fat_percent
+    }
+
+
+def get_average_calories(user_id: int, start_date: date, end_date: date) -> Optional[float]:
+    """
+    Average planned calories per day of a user's recommendations
+
+    Args:
+        user_id: User ID
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
+
+    Returns:
+        Average total_calories, or None if there are no recommendations
+    """
+    average = db.session.query(
+        func.avg(DailyRecommendation.total_calories)
+    ).filter(*_recommendations_in_range(user_id, start_date, end_date)).scalar()
+    return float(average) if average is not None else None
+
+
+def get_checkin_counts(user_id: int, start_date: date, end_date: date) -> Dict[str, int]:
+    """
+    Check-in counts of a user between two dates (inclusive)
+
+    Returns:
+        Dict with total_days (check-ins) and completed_days (check-ins with
+        both food and activity completed)
+    """
+    row = db.session.query(
+        func.count(DailyCheckin.id).label('total_days'),
+        func.count(case((
+            (DailyCheckin.food_completed == True) & (DailyCheckin.activity_completed == True), 1
+        ))).label('completed_days')
+    ).filter(
+        DailyCheckin.user_id == user_id,
+        DailyCheckin.date >= start_date,
+        DailyCheckin.date <= end_date
+    ).one()
+    return {'total_days': row.total_days or 0, 'completed_days': row.completed_days or 0}
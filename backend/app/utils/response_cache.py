@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import current_app, has_app_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.recommendation import DailyRecommendation, DailyCheckin
+
+logger = logging.getLogger('response_cache')
+
+# session.info key collecting the users whose calendar data changed
+_CHANGED_USERS_KEY = 'response_cache_changed_users'
+
+
+class LRUCacheBackend:
+    """In-process LRU cache with per-entry expiry (one per worker process)"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def bump_version(self, user_id: int):
+        # Entries of older versions are never read again and age out of the LRU
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+
+class RedisCacheBackend:
+    """Cache shared by all worker processes, in Redis (or a compatible server)"""
+
+    def __init__(self, client, prefix: str = 'mealmind:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: int):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def get_version(self, user_id: int) -> int:
+        return int(self.client.get(f'{self.prefix}version:{user_id}') or 0)
+
+    def bump_version(self, user_id: int):
+        self.client.incr(f'{self.prefix}version:{user_id}')
+
+
+class ResponseCache:
+    """
+    Per-user cache of JSON responses
+
+    Keys include a per-user version; invalidating a user bumps the version,
+    so every cached view of that user is dropped at once. Backend errors are
+    logged and treated as cache misses.
+    """
+
+    def __init__(self, backend, ttl: int = 300):
+        self.backend = backend
+        self.ttl = ttl
+
+    def lookup(self, user_id: int, view_key: str) -> Tuple[Optional[str], Optional[Tuple[str, str]]]:
+        """
+        Find a cached response
+
+        Returns:
+            Tuple of (key to store under, (etag, body) or None). The key is
+            None when the backend is unavailable.
+        """
+        try:
+            key = f'{user_id}:{self.backend.get_version(user_id)}:{view_key}'
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None, None
+
+        if value is None:
+            return key, None
+        etag, _, body = value.partition('\n')
+        return key, (etag, body)
+
+    def store(self, key: str, etag: str, body: str):
+        """Cache a response body under a key from lookup"""
+        try:
+            self.backend.set(key, f'{etag}\n{body}', self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached response of a user"""
+        try:
+            self.backend.bump_version(user_id)
+        except Exception as e:
+            logger.warning(f"Response cache invalidation failed for user {user_id}: {e}")
+
+
+def _create_backend(app):
+    """Redis backend when RESPONSE_CACHE_REDIS_URL is set and usable, else LRU"""
+    redis_url = app.config.get('RESPONSE_CACHE_REDIS_URL')
+    if redis_url:
+        try:
+            import redis
+            return RedisCacheBackend(redis.Redis.from_url(redis_url))
+        except ImportError:
+            logger.warning("RESPONSE_CACHE_REDIS_URL is set but the redis package is not installed, "
+                           "using the in-process cache")
+    return LRUCacheBackend(app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 2048))
+
+
+def init_response_cache(app):
+    """Attach the response cache to the app (disabled with RESPONSE_CACHE_ENABLED = False)"""
+    if not app.config.get('RESPONSE_CACHE_ENABLED', True):
+        app.extensions['response_cache'] = None
+        return None
+
+    cache = ResponseCache(_create_backend(app), ttl=app.config.get('RESPONSE_CACHE_TTL', 300))
+    app.extensions['response_cache'] = cache
+    return cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The current app's response cache, None if disabled"""
+    return current_app.extensions.get('response_cache')
+
+
+def _etag(body: str) -> str:
+    return hashlib.blake2b(body.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def cached_json_response(user_id, view_key: str, build: Callable[[], Tuple[Dict, int]]):
+    """
+    JSON response of a per-user view, served from the response cache
+
+    Responses carry an ETag; a request with a matching If-None-Match gets an
+    empty 304. Only 200 responses are cached.
+
+    Args:
+        user_id: Owner of the data (the cache is invalidated per user)
+        view_key: View and its arguments, e.g. 'month:2025-06'
+        build: Returns (payload, status) on a cache miss
+
+    Returns:
+        Flask response
+    """
+    cache = get_response_cache()
+    key, entry = cache.lookup(int(user_id), view_key) if cache else (None, None)
+
+    if entry is None:
+        payload, status = build()
+        response = jsonify(payload)
+        response.status_code = status
+        if status != 200:
+            return response
+        etag = _etag(response.get_data(as_text=True))
+        if key is not None:
+            cache.store(key, etag, response.get_data(as_text=True))
+    else:
+        etag, body = entry
+        response = current_app.response_class(body, mimetype='application/json')
+
+    response.set_etag(etag)
+    # Browsers may keep the response but must revalidate it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+def invalidate_user_on_commit(session, user_id: int):
+    """
+    Invalidate a user's cached responses when the session commits
+
+    Changes made through the ORM are tracked automatically; call this for
+    writes that bypass it (Core INSERT/UPDATE statements).
+    """
+    session.info.setdefault(_CHANGED_USERS_KEY, set()).add(int(user_id))
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_calendar_changes(session, flush_context, instances):
+    """Remember the users whose recommendations or check-ins are written"""
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (DailyRecommendation, DailyCheckin)) and obj.user_id is not None:
+            invalidate_user_on_commit(session, obj.user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    """
+    Invalidate after the data is committed, so a concurrent request can't
+    cache the old rows again (changes rolled back are invalidated anyway on
+    the next commit, which is harmless)
+    """
+    user_ids = session.info.pop(_CHANGED_USERS_KEY, None)
+    if not user_ids or not has_app_context():
+        return
+    cache = get_response_cache()
+    if cache is not None:
+        for user_id in user_ids:
+            cache.invalidate_user(user_id)
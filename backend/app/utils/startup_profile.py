@@ -0,0 +1,130 @@
+"""
+Startup phase timing for create_app
+
+create_app records how long each of its phases takes in a StartupProfile
+(app.extensions['startup_profile']) and prints it when STARTUP_PROFILE is
+enabled. measure_cold_start runs a whole cold start - package import,
+create_app and building the recommendation engine - in a fresh interpreter,
+which is what an autoscaled worker pays before serving its first request.
+
+Run directly to profile one cold start:
+    python app/utils/startup_profile.py --env testing
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+class StartupProfile:
+    """Ordered wall-clock durations of named startup phases"""
+
+    def __init__(self):
+        self.phases: List[Dict] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as one phase (recorded even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.phases.append({'name': name, 'ms': round(seconds * 1000, 2)})
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(phase['ms'] for phase in self.phases), 2)
+
+    def format_report(self) -> str:
+        lines = ["=== STARTUP PROFILE ==="]
+        lines += [f"{phase['name']:<16}{phase['ms']:>10.1f} ms" for phase in self.phases]
+        lines.append(f"{'total':<16}{self.total_ms:>10.1f} ms")
+        return '\n'.join(lines)
+
+
+def measure_cold_start(config_env: str = 'testing', engine: bool = True,
+                       fresh: bool = False) -> List[Dict]:
+    """
+    Profile one cold start in a new Python process
+
+    Args:
+        config_env: Configuration passed to create_app
+        engine: Also build the recommendation engine ('engine init' phase)
+        fresh: Run in an empty working directory, so the food database is
+            seeded and the TF-IDF vectorizer fitted instead of loaded
+
+    Returns:
+        List of phases ({'name', 'ms'}), starting with 'import'
+    """
+    with tempfile.TemporaryDirectory(prefix='startup_profile_') as workdir:
+        output = os.path.join(workdir, 'profile.json')
+        # Run as a script, not with -m: -m would import the app package
+        # before the child can time it
+        command = [sys.executable, os.path.abspath(__file__),
+                   '--env', config_env, '--output', output]
+        if not engine:
+            command.append('--no-engine')
+
+        env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+        result = subprocess.run(command, cwd=workdir if fresh else BACKEND_DIR,
+                                env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Cold start failed:\n{result.stderr[-2000:]}")
+
+        with open(output) as f:
+            return json.load(f)
+
+
+def summarize(runs: List[List[Dict]]) -> List[Dict]:
+    """Median duration of each phase over several runs (phases in first-run order)"""
+    summary = []
+    for phase in runs[0]:
+        durations = [p['ms'] for run in runs for p in run if p['name'] == phase['name']]
+        summary.append({'name': phase['name'], 'ms': round(statistics.median(durations), 2)})
+    return summary
+
+
+def _profile_current_process(config_env: str, engine: bool, output: Optional[str]):
+    """Child side of measure_cold_start: nothing from app is imported yet"""
+    # Keep create_app's own report quiet, it is merged into this one
+    os.environ['STARTUP_PROFILE'] = '0'
+
+    profile = StartupProfile()
+    with profile.phase('import'):
+        from app import create_app
+
+    app = create_app(config_env)
+    profile.phases += app.extensions['startup_profile'].phases
+
+    if engine:
+        from app.ml.engine_registry import get_recommendation_engine
+        with app.app_context(), profile.phase('engine init'):
+            get_recommendation_engine()
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(profile.phases, f)
+    else:
+        print(profile.format_report())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile one cold start of the backend')
+    parser.add_argument('--env', default=os.environ.get('FLASK_ENV', 'development'),
+                        help='Configuration passed to create_app')
+    parser.add_argument('--no-engine', action='store_true',
+                        help='Skip building the recommendation engine')
+    parser.add_argument('--output', help='Write the phases as JSON to this file')
+    args = parser.parse_args()
+    _profile_current_process(args.env, not args.no_engine, args.output)
@@ -10,6 +10,22 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour for production (can be adjusted)
+    # Latency budget for local food search / autocomplete (milliseconds)
+    FOOD_SEARCH_BUDGET_MS = int(os.environ.get('FOOD_SEARCH_BUDGET_MS', 150))
+    # Background generation of month-ahead plans (see app/utils/plan_jobs.py)
+    PLAN_JOB_WORKERS = int(os.environ.get('PLAN_JOB_WORKERS', 2))
+    PLAN_JOB_STALE_SECONDS = int(os.environ.get('PLAN_JOB_STALE_SECONDS', 600))
+    # Per-user cache of the calendar views (see app/utils/response_cache.py).
+    # The in-process LRU is per worker; set RESPONSE_CACHE_REDIS_URL to share
+    # it (and its invalidation) between worker processes
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', '1') != '0'
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 2048))
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL')
+    # Startup output of create_app: the per-phase timing report (see
+    # app/utils/startup_profile.py) and the list of registered routes
+    STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE', '0') == '1'
+    PRINT_ROUTES = os.environ.get('PRINT_ROUTES', '0') == '1'
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -26,6 +42,8 @@ class TestingConfig(Config):
     # Use in-memory SQLite for tests
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     JWT_ACCESS_TOKEN_EXPIRES = False
+    # Run plan jobs inline so tests see their results immediately
+    PLAN_JOBS_EAGER = True
 
 class ProductionConfig(Config):
     """Production configuration."""
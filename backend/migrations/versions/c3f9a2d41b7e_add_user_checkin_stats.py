@@ -0,0 +1,102 @@
+"""add user_checkin_stats table
+
+Revision ID: c3f9a2d41b7e
+Revises: a1547ff8be11
+Create Date: 2026-10-17 08:30:00.000000
+
+"""
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f9a2d41b7e'
+down_revision = 'a1547ff8be11'
+branch_labels = None
+depends_on = None
+
+
+# Same window as UserCheckinStats.LAST_WEEK_DAYS
+LAST_WEEK_DAYS = 7
+
+users = sa.table('user', sa.column('id', sa.Integer))
+daily_checkins = sa.table(
+    'daily_checkins',
+    sa.column('user_id', sa.Integer),
+    sa.column('date', sa.Date),
+    sa.column('food_completed', sa.Boolean),
+    sa.column('activity_completed', sa.Boolean),
+)
+
+
+def _stats_row(user_id, dates):
+    """user_checkin_stats row for the dates of completed check-ins (as rebuild_user_checkin_stats)"""
+    counts = Counter(dates)
+    row = {'user_id': user_id, 'total_completed': 0, 'streak_end': None, 'streak_days': 0,
+           'recent_completed': '{}', 'updated_at': datetime.utcnow()}
+    if not counts:
+        return row
+
+    streak_end = max(counts)
+    streak_days = 0
+    check_date = streak_end
+    while check_date in counts:
+        streak_days += 1
+        check_date -= timedelta(days=1)
+
+    oldest = streak_end - timedelta(days=LAST_WEEK_DAYS)
+    recent = {day.isoformat(): count for day, count in sorted(counts.items()) if day >= oldest}
+    row.update(total_completed=sum(counts.values()), streak_end=streak_end,
+               streak_days=streak_days, recent_completed=json.dumps(recent))
+    return row
+
+
+def upgrade():
+    # The app's db.create_all() may have created the table already
+    if not sa.inspect(op.get_bind()).has_table('user_checkin_stats'):
+        op.create_table('user_checkin_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_completed', sa.Integer(), nullable=False),
+        sa.Column('streak_end', sa.Date(), nullable=True),
+        sa.Column('streak_days', sa.Integer(), nullable=False),
+        sa.Column('recent_completed', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+        )
+
+    # Fill the stats of users that have no row yet
+    # (`flask rebuild-checkin-stats` recounts everyone)
+    connection = op.get_bind()
+    stats_table = sa.table(
+        'user_checkin_stats',
+        sa.column('user_id', sa.Integer),
+        sa.column('total_completed', sa.Integer),
+        sa.column('streak_end', sa.Date),
+        sa.column('streak_days', sa.Integer),
+        sa.column('recent_completed', sa.Text),
+        sa.column('updated_at', sa.DateTime),
+    )
+    existing = {row[0] for row in connection.execute(sa.select(stats_table.c.user_id))}
+    user_ids = [row[0] for row in connection.execute(sa.select(users.c.id)) if row[0] not in existing]
+    if not user_ids:
+        return
+
+    dates_by_user = defaultdict(list)
+    completed = connection.execute(
+        sa.select(daily_checkins.c.user_id, daily_checkins.c.date).where(
+            daily_checkins.c.food_completed == sa.true(),
+            daily_checkins.c.activity_completed == sa.true()
+        )
+    )
+    for user_id, checkin_date in completed:
+        dates_by_user[user_id].append(checkin_date)
+    op.bulk_insert(stats_table, [_stats_row(user_id, dates_by_user.get(user_id, [])) for user_id in user_ids])
+
+
+def downgrade():
+    op.drop_table('user_checkin_stats')
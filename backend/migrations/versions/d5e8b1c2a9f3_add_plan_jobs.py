@@ -0,0 +1,68 @@
+"""add plan_jobs table
+
+Revision ID: d5e8b1c2a9f3
+Revises: c3f9a2d41b7e
+Create Date: 2026-10-17 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8b1c2a9f3'
+down_revision = 'c3f9a2d41b7e'
+branch_labels = None
+depends_on = None
+
+
+# Same condition as PlanJob.ACTIVE_STATUSES
+ACTIVE_JOB_SQL = "status IN ('queued', 'running')"
+
+
+def upgrade():
+    # The app's db.create_all() may have created the table already
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('plan_jobs'):
+        op.create_table('plan_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_count', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('plan_jobs')}
+
+    # Jobs queued twice for a user by concurrent requests: keep the newest
+    op.execute(f"""
+        UPDATE plan_jobs SET status = 'failed', error = 'Superseded by a newer job'
+        WHERE {ACTIVE_JOB_SQL}
+          AND id NOT IN (SELECT MAX(id) FROM plan_jobs WHERE {ACTIVE_JOB_SQL} GROUP BY user_id)
+    """)
+
+    with op.batch_alter_table('plan_jobs', schema=None) as batch_op:
+        if batch_op.f('ix_plan_jobs_status') not in indexes:
+            batch_op.create_index(batch_op.f('ix_plan_jobs_status'), ['status'], unique=False)
+        if batch_op.f('ix_plan_jobs_user_id') not in indexes:
+            batch_op.create_index(batch_op.f('ix_plan_jobs_user_id'), ['user_id'], unique=False)
+        if 'ix_plan_jobs_active_user_id' not in indexes:
+            batch_op.create_index('ix_plan_jobs_active_user_id', ['user_id'], unique=True,
+                                  sqlite_where=sa.text(ACTIVE_JOB_SQL),
+                                  postgresql_where=sa.text(ACTIVE_JOB_SQL))
+
+
+def downgrade():
+    with op.batch_alter_table('plan_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_plan_jobs_active_user_id')
+        batch_op.drop_index(batch_op.f('ix_plan_jobs_user_id'))
+        batch_op.drop_index(batch_op.f('ix_plan_jobs_status'))
+
+    op.drop_table('plan_jobs')
@@ -0,0 +1,67 @@
+"""add (user_id, date) indexes to daily_recommendations and daily_checkins
+
+Revision ID: e7a4c9d3f1b6
+Revises: d5e8b1c2a9f3
+Create Date: 2026-10-17 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a4c9d3f1b6'
+down_revision = 'd5e8b1c2a9f3'
+branch_labels = None
+depends_on = None
+
+
+# Oldest recommendation of each (user_id, date) pair, the one kept
+KEPT_RECOMMENDATION_SQL = """
+    SELECT MIN(kept.id) FROM daily_recommendations kept
+    JOIN daily_recommendations duplicate
+      ON duplicate.user_id = kept.user_id AND duplicate.date = kept.date
+    WHERE duplicate.id = daily_checkins.recommendation_id
+"""
+
+
+def upgrade():
+    # Days generated twice by concurrent requests: move their check-ins to the
+    # oldest recommendation of the day and drop the others
+    op.execute(f"""
+        UPDATE daily_checkins SET recommendation_id = ({KEPT_RECOMMENDATION_SQL})
+        WHERE recommendation_id IS NOT NULL
+          AND recommendation_id NOT IN (
+              SELECT MIN(id) FROM daily_recommendations GROUP BY user_id, date
+          )
+    """)
+    op.execute("""
+        DELETE FROM daily_recommendations
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM daily_recommendations GROUP BY user_id, date
+        )
+    """)
+
+    # db.create_all() builds these indexes when it creates the tables itself
+    inspector = sa.inspect(op.get_bind())
+    recommendation_indexes = {index['name'] for index in inspector.get_indexes('daily_recommendations')}
+    checkin_indexes = {index['name'] for index in inspector.get_indexes('daily_checkins')}
+
+    with op.batch_alter_table('daily_recommendations', schema=None) as batch_op:
+        if 'ix_daily_recommendations_user_id_date' not in recommendation_indexes:
+            batch_op.create_index('ix_daily_recommendations_user_id_date', ['user_id', 'date'], unique=True)
+
+    with op.batch_alter_table('daily_checkins', schema=None) as batch_op:
+        if 'ix_daily_checkins_user_id_date' not in checkin_indexes:
+            batch_op.create_index('ix_daily_checkins_user_id_date', ['user_id', 'date'], unique=False)
+        if batch_op.f('ix_daily_checkins_recommendation_id') not in checkin_indexes:
+            batch_op.create_index(batch_op.f('ix_daily_checkins_recommendation_id'), ['recommendation_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_checkins', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_checkins_recommendation_id'))
+        batch_op.drop_index('ix_daily_checkins_user_id_date')
+
+    with op.batch_alter_table('daily_recommendations', schema=None) as batch_op:
+        batch_op.drop_index('ix_daily_recommendations_user_id_date')
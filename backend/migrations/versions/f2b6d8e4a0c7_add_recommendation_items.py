@@ -0,0 +1,184 @@
+"""add recommendation_meals and recommendation_activities tables
+
+Revision ID: f2b6d8e4a0c7
+Revises: e7a4c9d3f1b6
+Create Date: 2026-10-17 13:20:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d8e4a0c7'
+down_revision = 'e7a4c9d3f1b6'
+branch_labels = None
+depends_on = None
+
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner')
+BACKFILL_BATCH_SIZE = 1000
+
+daily_recommendations = sa.table(
+    'daily_recommendations',
+    sa.column('id', sa.Integer),
+    sa.column('breakfast', sa.Text),
+    sa.column('lunch', sa.Text),
+    sa.column('dinner', sa.Text),
+    sa.column('activities', sa.Text),
+)
+recommendation_meals = sa.table(
+    'recommendation_meals',
+    sa.column('recommendation_id', sa.Integer),
+    sa.column('meal_type', sa.String),
+    sa.column('food_id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('category', sa.String),
+    sa.column('calories', sa.Float),
+    sa.column('protein', sa.Float),
+    sa.column('carbs', sa.Float),
+    sa.column('fat', sa.Float),
+)
+recommendation_activities = sa.table(
+    'recommendation_activities',
+    sa.column('recommendation_id', sa.Integer),
+    sa.column('position', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('duration_minutes', sa.Float),
+    sa.column('calories_burned', sa.Float),
+    sa.column('intensity', sa.String),
+)
+
+
+def _load_json(value):
+    try:
+        return json.loads(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _item_rows(recommendation):
+    """Meal and activity rows of one recommendation (same mapping as the models)"""
+    meals = []
+    for meal_type in MEAL_TYPES:
+        meal = _load_json(getattr(recommendation, meal_type))
+        if not isinstance(meal, dict):
+            continue
+        food_id = meal.get('id')
+        meals.append({
+            'recommendation_id': recommendation.id,
+            'meal_type': meal_type,
+            'food_id': food_id if isinstance(food_id, int) else None,
+            'name': meal.get('name'),
+            'category': meal.get('category'),
+            'calories': _number(meal.get('calories')),
+            'protein': _number(meal.get('protein')),
+            'carbs': _number(meal.get('carbs')),
+            'fat': _number(meal.get('fat')),
+        })
+
+    activities = _load_json(recommendation.activities)
+    if not isinstance(activities, list):
+        activities = []
+    activity_rows = [
+        {
+            'recommendation_id': recommendation.id,
+            'position': position,
+            'name': activity.get('name'),
+            'duration_minutes': _number(activity.get('duration_minutes')),
+            'calories_burned': _number(activity.get('calories_burned')),
+            'intensity': activity.get('intensity'),
+        }
+        for position, activity in enumerate(activities)
+        if isinstance(activity, dict)
+    ]
+    return meals, activity_rows
+
+
+def upgrade():
+    # The app's db.create_all() may have created the tables already
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('recommendation_meals'):
+        op.create_table('recommendation_meals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recommendation_id', sa.Integer(), nullable=False),
+        sa.Column('meal_type', sa.String(length=16), nullable=False),
+        sa.Column('food_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('calories', sa.Float(), nullable=True),
+        sa.Column('protein', sa.Float(), nullable=True),
+        sa.Column('carbs', sa.Float(), nullable=True),
+        sa.Column('fat', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['recommendation_id'], ['daily_recommendations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    meal_indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('recommendation_meals')}
+    with op.batch_alter_table('recommendation_meals', schema=None) as batch_op:
+        if batch_op.f('ix_recommendation_meals_recommendation_id') not in meal_indexes:
+            batch_op.create_index(batch_op.f('ix_recommendation_meals_recommendation_id'), ['recommendation_id'], unique=False)
+
+    if not inspector.has_table('recommendation_activities'):
+        op.create_table('recommendation_activities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recommendation_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=True),
+        sa.Column('duration_minutes', sa.Float(), nullable=True),
+        sa.Column('calories_burned', sa.Float(), nullable=True),
+        sa.Column('intensity', sa.String(length=20), nullable=True),
+        sa.ForeignKeyConstraint(['recommendation_id'], ['daily_recommendations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    activity_indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('recommendation_activities')}
+    with op.batch_alter_table('recommendation_activities', schema=None) as batch_op:
+        if batch_op.f('ix_recommendation_activities_recommendation_id') not in activity_indexes:
+            batch_op.create_index(batch_op.f('ix_recommendation_activities_recommendation_id'), ['recommendation_id'], unique=False)
+
+    # Backfill from the JSON columns, a batch of recommendations at a time.
+    # Recommendations saved by the new code already have their items.
+    has_items = sa.or_(
+        sa.exists().where(recommendation_meals.c.recommendation_id == daily_recommendations.c.id),
+        sa.exists().where(recommendation_activities.c.recommendation_id == daily_recommendations.c.id),
+    )
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            sa.select(daily_recommendations)
+            .where(daily_recommendations.c.id > last_id, ~has_items)
+            .order_by(daily_recommendations.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        meal_rows, activity_rows = [], []
+        for recommendation in batch:
+            meals, activities = _item_rows(recommendation)
+            meal_rows.extend(meals)
+            activity_rows.extend(activities)
+        if meal_rows:
+            op.bulk_insert(recommendation_meals, meal_rows)
+        if activity_rows:
+            op.bulk_insert(recommendation_activities, activity_rows)
+
+
+def downgrade():
+    with op.batch_alter_table('recommendation_activities', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recommendation_activities_recommendation_id'))
+
+    op.drop_table('recommendation_activities')
+    with op.batch_alter_table('recommendation_meals', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recommendation_meals_recommendation_id'))
+
+    op.drop_table('recommendation_meals')
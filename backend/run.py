@@ -14,7 +14,7 @@ def make_shell_context():
     # Import models for shell context
     from app.models.user import User, UserProfile
     from app.models.food import Food, Activity
-    from app.models.recommendation import DailyRecommendation, DailyCheckin
+    from app.models.recommendation import DailyRecommendation, DailyCheckin, UserCheckinStats
     
     return {
         'db': db, 
@@ -23,7 +23,8 @@ def make_shell_context():
         'Food': Food, 
         'Activity': Activity,
         'DailyRecommendation': DailyRecommendation,
-        'DailyCheckin': DailyCheckin
+        'DailyCheckin': DailyCheckin,
+        'UserCheckinStats': UserCheckinStats
     }
 
 @app.cli.command("create-db")
@@ -79,14 +80,34 @@ def seed_db():
     db.session.commit()
     click.echo("Database seeded with initial data!")
 
+@app.cli.command("rebuild-checkin-stats")
+def rebuild_checkin_stats():
+    """Rebuild user_checkin_stats from daily_checkins."""
+    from app.utils.checkin_stats import rebuild_all_checkin_stats
+    
+    count = rebuild_all_checkin_stats()
+    click.echo(f"Check-in stats rebuilt for {count} users!")
+
+@app.cli.command("startup-profile")
+@click.option('--repeat', default=3, show_default=True, help='Cold starts to run (the median is shown).')
+@click.option('--engine/--no-engine', default=True, show_default=True,
+              help='Include building the recommendation engine.')
+@click.option('--fresh', is_flag=True,
+              help='Start in an empty directory (seed foods and fit the vectorizer).')
+def startup_profile(repeat, engine, fresh):
+    """Time each startup phase of a cold worker start."""
+    from app.utils.startup_profile import StartupProfile, measure_cold_start, summarize
+    
+    config_env = os.getenv('FLASK_ENV', 'development')
+    runs = [measure_cold_start(config_env, engine=engine, fresh=fresh) for _ in range(repeat)]
+    
+    profile = StartupProfile()
+    profile.phases = summarize(runs)
+    click.echo(f"Median of {repeat} cold start(s) with {config_env} configuration")
+    click.echo(profile.format_report())
+
 # Main execution
 if __name__ == '__main__':
-    # Print routes
-    with app.app_context():
-        print("\n=== REGISTERED ROUTES ===")
-        for rule in app.url_map.iter_rules():
-            print(f"{rule.methods} {rule.rule}")
-        print("========================\n")
-    
+    # Routes are printed by create_app when PRINT_ROUTES=1
     # Run the application
     app.run(host="0.0.0.0", debug=True)
\ No newline at end of file
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+"""
+Benchmark food database queries before and after the schema migrations.
+
+Script ini membuat database makanan sintetis seukuran import USDA (ratusan
+ribu baris), lalu menjalankan query yang sama dengan USDAFoodDatabase dua
+kali: tanpa index sekunder (user_version = 0) dan setelah migrasi schema
+diterapkan. Untuk setiap query ditampilkan EXPLAIN QUERY PLAN dan waktu
+rata-rata.
+
+Contoh:
+    python scripts/benchmark_food_indexes.py --foods 300000
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ml.food_database import (
+    USDAFoodDatabase,
+    FOOD_SCHEMA_MIGRATIONS,
+    migrate_food_schema,
+)
+
+CATEGORIES = [
+    'Breakfast Cereals', 'Bakery', 'Dairy and Egg Products', 'Sandwiches',
+    'Salads', 'Soups', 'Fast Foods', 'Beef Products', 'Poultry Products',
+    'Finfish and Shellfish Products', 'Pasta', 'Rice', 'Vegetables',
+    'Snacks', 'Fruits', 'Nut and Seed Products', 'Sweets', 'Beverages',
+]
+WORDS = [
+    'chicken', 'beef', 'pork', 'rice', 'bread', 'milk', 'cheese', 'apple',
+    'banana', 'egg', 'salad', 'soup', 'pasta', 'tofu', 'fish', 'shrimp',
+    'yogurt', 'oat', 'potato', 'tomato', 'spinach', 'peanut', 'almond',
+]
+
+# (label, sql, params) - mirrors the queries issued by USDAFoodDatabase
+QUERIES = [
+    ('meal type + calories', """
+        SELECT f.* FROM foods f
+        JOIN food_meal_types fmt ON f.id = fmt.food_id
+        JOIN meal_types mt ON fmt.meal_type_id = mt.id
+        WHERE mt.name = ? AND f.calories >= ? AND f.calories <= ?
+        AND (f.name NOT LIKE ?)
+        LIMIT ?
+    """, ('lunch', 400, 420, '%pork%', 100)),
+    ('meal type random', """
+        SELECT f.* FROM foods f
+        JOIN food_meal_types fmt ON f.id = fmt.food_id
+        JOIN meal_types mt ON fmt.meal_type_id = mt.id
+        WHERE mt.name = ?
+        ORDER BY RANDOM() LIMIT ?
+    """, ('snack', 20)),
+    ('meal type count', """
+        SELECT COUNT(*) FROM food_meal_types fmt
+        JOIN meal_types mt ON fmt.meal_type_id = mt.id
+        WHERE mt.name = ?
+    """, ('dinner',)),
+    ('calorie range', """
+        SELECT * FROM foods WHERE 1=1 AND calories >= ? AND calories <= ?
+        LIMIT ?
+    """, (250, 252, 100)),
+    ('category exact', """
+        SELECT * FROM foods WHERE category = ? LIMIT ?
+    """, ('Rice', 100)),
+]
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark food database indexes')
+    parser.add_argument('--foods', type=int, default=300000,
+                        help='Number of synthetic foods to generate')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Number of runs per query')
+    parser.add_argument('--db-path', default=None,
+                        help='Database file to use (default: temporary file)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    return parser.parse_args()
+
+
+def populate(db_path, n_foods, seed):
+    """Fill a fresh food database with synthetic foods and meal mappings"""
+    rng = random.Random(seed)
+    food_db = USDAFoodDatabase(db_path=db_path)
+    conn = food_db._get_connection()
+
+    meal_type_ids = [row[0] for row in conn.execute("SELECT id FROM meal_types ORDER BY id")]
+
+    start = time.perf_counter()
+    foods = (
+        (
+            f"synthetic-{i}",
+            f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+            rng.choice(CATEGORIES),
+            round(rng.uniform(20, 900), 1),
+            round(rng.uniform(0, 60), 1),
+            round(rng.uniform(0, 120), 1),
+            round(rng.uniform(0, 50), 1),
+        )
+        for i in range(n_foods)
+    )
+    conn.executemany(
+        "INSERT INTO foods (fdc_id, name, category, calories, protein, carbs, fat, data_source) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, 'benchmark')",
+        foods
+    )
+
+    food_ids = [row[0] for row in conn.execute("SELECT id FROM foods")]
+    mappings = (
+        (food_id, meal_type_id)
+        for food_id in food_ids
+        for meal_type_id in rng.sample(meal_type_ids, rng.randint(1, 2))
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO food_meal_types (food_id, meal_type_id) VALUES (?, ?)",
+        mappings
+    )
+    conn.commit()
+    print(f"Generated {n_foods} foods in {time.perf_counter() - start:.1f}s")
+    return food_db
+
+
+def drop_migrated_indexes(conn):
+    """Roll the file back to the pre-migration schema (user_version 0)"""
+    for _, _, statements in FOOD_SCHEMA_MIGRATIONS:
+        for statement in statements:
+            words = statement.split()
+            if words[:2] == ['CREATE', 'INDEX']:
+                conn.execute(f"DROP INDEX IF EXISTS {words[5]}")
+    conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+
+
+def run_queries(conn, repeat):
+    """Print plans and return mean latency (ms) per query"""
+    timings = {}
+    for label, sql, params in QUERIES:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        print(f"  {label}:")
+        for row in plan:
+            print(f"      {row[3]}")
+
+        conn.execute(sql, params).fetchall()  # warm the page cache
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        timings[label] = (time.perf_counter() - start) * 1000 / repeat
+    return timings
+
+
+def run_methods(food_db, repeat):
+    """Time the public USDAFoodDatabase methods (SQL path, no catalog)"""
+    calls = {
+        'get_foods_by_meal_type': lambda: food_db.get_foods_by_meal_type(
+            'lunch', min_calories=400, max_calories=420, dietary_restrictions=['pork']),
+        'get_foods_by_calorie_range': lambda: food_db.get_foods_by_calorie_range(250, 252),
+    }
+    timings = {}
+    for label, call in calls.items():
+        call()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            call()
+        timings[label] = (time.perf_counter() - start) * 1000 / repeat
+    return timings
+
+
+def main():
+    args = parse_args()
+
+    db_path = args.db_path
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix='.db', prefix='food_bench_')
+        os.close(fd)
+        os.remove(db_path)
+
+    try:
+        food_db = populate(db_path, args.foods, args.seed)
+        conn = food_db._get_connection()
+
+        print("\n== Before migrations (user_version 0) ==")
+        drop_migrated_indexes(conn)
+        before = run_queries(conn, args.repeat)
+        before.update(run_methods(food_db, args.repeat))
+
+        start = time.perf_counter()
+        applied = migrate_food_schema(conn)
+        print(f"\nApplied {applied} migration(s) in {time.perf_counter() - start:.1f}s")
+
+        print("\n== After migrations ==")
+        after = run_queries(conn, args.repeat)
+        after.update(run_methods(food_db, args.repeat))
+
+        print(f"\n{'query':<30}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for label in before:
+            speedup = before[label] / after[label] if after[label] else float('inf')
+            print(f"{label:<30}{before[label]:>12.3f}{after[label]:>12.3f}{speedup:>9.1f}x")
+
+        food_db.close()
+    finally:
+        if args.db_path is None and os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
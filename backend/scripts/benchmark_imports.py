@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Benchmark import time of the backend with `python -X importtime`.
+
+Script ini menjalankan beberapa target (create_app, blueprint auth/profile,
+paket app.ml) di proses Python baru dengan `-X importtime`, lalu menampilkan
+total waktu import, waktu wall-clock, dan library berat (pandas, scikit-learn,
+scipy, numpy, joblib) yang ikut ter-import beserta waktu kumulatifnya.
+
+Contoh:
+    python scripts/benchmark_imports.py --repeat 5
+    python scripts/benchmark_imports.py --target create_app --top 15
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# label -> statement run in a fresh interpreter
+TARGETS = {
+    'create_app': "from app import create_app; create_app('testing')",
+    'auth routes': "import app.routes.auth",
+    'profile routes': "import app.routes.profile",
+    'app.ml': "import app.ml",
+}
+
+HEAVY_PACKAGES = ['pandas', 'sklearn', 'scipy', 'numpy', 'joblib']
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark backend import time')
+    parser.add_argument('--target', choices=sorted(TARGETS), action='append',
+                        help='Target to measure (default: all, can be repeated)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Fresh interpreters per target (the median is reported)')
+    parser.add_argument('--top', type=int, default=0,
+                        help='Also list the N slowest top-level imports of the last run')
+    return parser.parse_args()
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output
+
+    Returns:
+        List of (module, cumulative_us, depth) in output order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time:  <self> | <cumulative> | <indent><module>"
+        _, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        module = name[1:].rstrip()
+        depth = (len(module) - len(module.lstrip(' '))) // 2
+        entries.append((module.strip(), int(cumulative_us), depth))
+    return entries
+
+
+def measure(statement):
+    """Run a statement in a fresh interpreter and return its import profile"""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    top_level = [(module, cumulative) for module, cumulative, depth in entries if depth == 0]
+    heavy = {}
+    for module, cumulative, _ in entries:
+        if module in HEAVY_PACKAGES and module not in heavy:
+            heavy[module] = cumulative / 1000
+    return {
+        'import_ms': sum(cumulative for _, cumulative in top_level) / 1000,
+        'wall_ms': wall_ms,
+        'heavy': heavy,
+        'top_level': top_level,
+    }
+
+
+def main():
+    args = parse_args()
+    targets = args.target or list(TARGETS)
+
+    print(f"{'target':<18}{'imports ms':>12}{'wall ms':>10}  heavy packages (cumulative ms)")
+    for label in targets:
+        runs = [measure(TARGETS[label]) for _ in range(args.repeat)]
+        import_ms = statistics.median(run['import_ms'] for run in runs)
+        wall_ms = statistics.median(run['wall_ms'] for run in runs)
+        heavy = runs[-1]['heavy']
+        heavy_text = ', '.join(f"{name} {ms:.0f}" for name, ms in heavy.items()) or '-'
+        print(f"{label:<18}{import_ms:>12.0f}{wall_ms:>10.0f}  {heavy_text}")
+
+        if args.top:
+            slowest = sorted(runs[-1]['top_level'], key=lambda entry: entry[1], reverse=True)[:args.top]
+            for module, cumulative in slowest:
+                print(f"    {cumulative / 1000:>9.1f} ms  {module}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark meal type mapping on a large food database.
+
+Script ini membuat food database sintetis, lalu memetakan makanan ke meal
+type dengan dua cara: loop keyword lama (cek `keyword in name` per keyword
+dan satu INSERT per mapping) dan MealTypeClassifier (regex gabungan per meal
+type, fetchmany + executemany). Hasil mapping keduanya dibandingkan agar
+sama persis.
+
+Contoh:
+    python scripts/benchmark_meal_type_mapping.py --foods 200000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ml.food_database import USDAFoodDatabase
+from app.ml.meal_type_classifier import MEAL_TYPE_KEYWORDS, map_foods_to_meal_types
+
+# Words that match no keyword, so only part of the foods get a meal type
+FILLER_WORDS = [
+    'raw', 'cooked', 'frozen', 'canned', 'organic', 'low sodium', 'plain',
+    'sliced', 'whole', 'mixed', 'sweetened', 'unsalted', 'fresh', 'lean',
+]
+CATEGORIES = [
+    'Dairy and Egg Products', 'Soups, Sauces, and Gravies', 'Snacks',
+    'Beef Products', 'Vegetables and Vegetable Products', 'Spices and Herbs',
+    'Fruits and Fruit Juices', 'Legumes and Legume Products', 'Beverages',
+]
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark meal type mapping')
+    parser.add_argument('--foods', type=int, default=200000,
+                        help='Number of synthetic foods to generate')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    return parser.parse_args()
+
+
+def populate(db_path, n_foods, seed):
+    """Fill a fresh food database with synthetic USDA-like names"""
+    rng = random.Random(seed)
+    keywords = [word for words in MEAL_TYPE_KEYWORDS.values() for word in words]
+    food_db = USDAFoodDatabase(db_path=db_path)
+    conn = food_db._get_connection()
+
+    def name():
+        words = rng.sample(FILLER_WORDS, rng.randint(2, 4))
+        if rng.random() < 0.6:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords).upper())
+        return ', '.join(words)
+
+    conn.executemany(
+        "INSERT INTO foods (fdc_id, name, category, calories, protein, carbs, fat, data_source) "
+        "VALUES (?, ?, ?, 100, 1, 1, 1, 'benchmark')",
+        ((f"synthetic-{i}", name(), rng.choice(CATEGORIES)) for i in range(n_foods))
+    )
+    conn.commit()
+    return food_db
+
+
+def legacy_map_foods(conn):
+    """The previous per-keyword loop, kept here as the baseline"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name, category FROM foods")
+    mappings = 0
+    for food in cursor.fetchall():
+        name = food['name'].lower() if food['name'] else ''
+        category = food['category'].lower() if food['category'] else ''
+        for meal_type, keywords in MEAL_TYPE_KEYWORDS.items():
+            for keyword in keywords:
+                if keyword.lower() in name or keyword.lower() in category:
+                    conn.execute(
+                        """
+                        INSERT OR IGNORE INTO food_meal_types (food_id, meal_type_id)
+                        SELECT ?, id FROM meal_types WHERE name = ?
+                        """,
+                        (food['id'], meal_type)
+                    )
+                    mappings += 1
+                    break
+    conn.commit()
+    return mappings
+
+
+def snapshot(conn):
+    """Current mappings as a set, then clear them for the next run"""
+    rows = set(conn.execute("SELECT food_id, meal_type_id FROM food_meal_types"))
+    conn.execute("DELETE FROM food_meal_types")
+    conn.commit()
+    return rows
+
+
+def main():
+    args = parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='meal_map_bench_')
+    os.close(fd)
+    os.remove(db_path)
+
+    try:
+        food_db = populate(db_path, args.foods, args.seed)
+        conn = food_db._get_connection()
+        conn.execute("DELETE FROM food_meal_types")
+        conn.commit()
+
+        start = time.perf_counter()
+        legacy_mappings = legacy_map_foods(conn)
+        legacy_seconds = time.perf_counter() - start
+        legacy_rows = snapshot(conn)
+
+        stats = map_foods_to_meal_types(conn)
+        new_rows = snapshot(conn)
+
+        print(f"{'method':<20}{'seconds':>10}{'mappings':>12}")
+        print(f"{'keyword loop':<20}{legacy_seconds:>10.2f}{legacy_mappings:>12}")
+        print(f"{'classifier':<20}{stats['seconds']:>10.2f}{stats['mappings']:>12}")
+        print(f"Speedup: {legacy_seconds / stats['seconds']:.1f}x, "
+              f"identical mappings: {legacy_rows == new_rows}")
+
+        food_db.close()
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
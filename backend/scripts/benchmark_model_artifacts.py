@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Benchmark loading model artifacts in several worker processes.
+
+Script ini membuat artifact sintetis seukuran index makanan (matriks TF-IDF
+sparse + tabel tetangga top-k) dan menyimpannya dalam tiga format
+ModelSerializer: joblib terkompresi (default lama), joblib tanpa kompresi
+dengan mmap, dan direktori .npy. Untuk setiap format, beberapa proses
+worker memuat artifact bersamaan dan membaca seluruh isinya; script
+menampilkan waktu load dan memori per worker (private dan PSS dari
+/proc/self/smaps_rollup, jadi hanya di Linux). Dengan mmap, halaman
+artifact berada di page cache dan dibagi antar worker.
+
+Contoh:
+    python scripts/benchmark_model_artifacts.py --foods 300000 --workers 4
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ml.model_serializer import ModelSerializer
+
+# label -> (save, load) with the ModelSerializer options of that format
+FORMATS = {
+    'joblib compressed': (
+        lambda state, path: ModelSerializer.save_model(state, path + '.joblib'),
+        lambda path: ModelSerializer.load_model(path + '.joblib'),
+    ),
+    'joblib mmap': (
+        lambda state, path: ModelSerializer.save_model(state, path + '.joblib', mmap=True),
+        lambda path: ModelSerializer.load_model(path + '.joblib', mmap=True),
+    ),
+    'npy directory': (
+        lambda state, path: ModelSerializer.save_arrays(state, path),
+        lambda path: ModelSerializer.load_arrays(path),
+    ),
+}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark model artifact formats')
+    parser.add_argument('--foods', type=int, default=300000,
+                        help='Rows of the synthetic artifact')
+    parser.add_argument('--terms', type=int, default=30000,
+                        help='Columns (vocabulary) of the sparse matrix')
+    parser.add_argument('--terms-per-food', type=int, default=5,
+                        help='Non-zeros per row of the sparse matrix')
+    parser.add_argument('--k', type=int, default=20, help='Neighbours per food')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Worker processes loading the artifact at the same time')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    return parser.parse_args()
+
+
+def synthetic_state(n_foods, n_terms, terms_per_food, k, seed):
+    """Arrays shaped like a food ANN index plus a similarity table"""
+    from scipy.sparse import csr_matrix
+
+    rng = np.random.default_rng(seed)
+    nnz = n_foods * terms_per_food
+    matrix = csr_matrix((
+        rng.random(nnz, dtype=np.float32),
+        rng.integers(0, n_terms, size=nnz).astype(np.int32),
+        np.arange(0, nnz + 1, terms_per_food, dtype=np.int32)
+    ), shape=(n_foods, n_terms))
+    return {
+        'ids': np.arange(1, n_foods + 1, dtype=np.int64),
+        'matrix': matrix,
+        'neighbor_ids': rng.integers(1, n_foods + 1, size=(n_foods, k)),
+        'scores': rng.random((n_foods, k), dtype=np.float32),
+        'vocabulary_size': n_terms,
+    }
+
+
+def memory_kb():
+    """(private, PSS) memory of this process in KB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values.get('Private_Clean', 0) + values.get('Private_Dirty', 0), values.get('Pss', 0)
+
+
+def worker(label, path, barrier, results):
+    """Load the artifact, read all of it, report while every worker holds it"""
+    # Imported up front so only the artifact is measured
+    import joblib  # noqa: F401
+    import scipy.sparse  # noqa: F401
+
+    before_private, before_pss = memory_kb()
+    start = time.perf_counter()
+    state = FORMATS[label][1](path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Touch every page, as serving requests eventually does
+    checksum = float(state['matrix'].data.sum()) + float(state['scores'].sum())
+    checksum += int(state['neighbor_ids'].sum() % 7) + int(state['ids'][-1])
+
+    barrier.wait()
+    private, pss = memory_kb()
+    results.put((load_ms, private - before_private, pss - before_pss, checksum))
+    barrier.wait()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("This benchmark reads /proc/self/smaps_rollup and needs Linux")
+        sys.exit(1)
+
+    state = synthetic_state(args.foods, args.terms, args.terms_per_food, args.k, args.seed)
+    raw_mb = sum(
+        value.data.nbytes + value.indices.nbytes + value.indptr.nbytes if name == 'matrix' else value.nbytes
+        for name, value in state.items() if name != 'vocabulary_size'
+    ) / 2 ** 20
+    print(f"Artifact: {args.foods} foods, {raw_mb:.0f} MB of arrays, {args.workers} workers\n")
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'format':<20}{'save s':>8}{'size MB':>9}{'load ms':>9}{'private MB':>12}{'PSS MB':>9}")
+    with tempfile.TemporaryDirectory(prefix='artifact_bench_') as workdir:
+        for label, (save, _) in FORMATS.items():
+            path = os.path.join(workdir, label.replace(' ', '_'))
+            start = time.perf_counter()
+            save(state, path)
+            save_seconds = time.perf_counter() - start
+            if os.path.isdir(path):
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+            else:
+                size = os.path.getsize(path + '.joblib')
+
+            barrier = context.Barrier(args.workers)
+            results = context.Queue()
+            processes = [context.Process(target=worker, args=(label, path, barrier, results))
+                         for _ in range(args.workers)]
+            for process in processes:
+                process.start()
+            reports = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            load_ms = statistics.median(report[0] for report in reports)
+            private_mb = statistics.median(report[1] for report in reports) / 1024
+            pss_mb = statistics.median(report[2] for report in reports) / 1024
+            print(f"{label:<20}{save_seconds:>8.1f}{size / 2 ** 20:>9.0f}{load_ms:>9.0f}"
+                  f"{private_mb:>12.0f}{pss_mb:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
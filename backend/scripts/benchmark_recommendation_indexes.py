@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+"""
+Benchmark recommendation and check-in queries before and after the
+(user_id, date) indexes.
+
+Script ini membuat database SQLite sintetis dengan schema dari model
+DailyRecommendation dan DailyCheckin (default 10.000 user x 365 hari), lalu
+menjalankan query yang dipakai route month, history, today, progress dan
+plan job dua kali: tanpa index (seperti sebelum migrasi e7a4c9d3f1b6) dan
+dengan index dari model. Untuk setiap query ditampilkan EXPLAIN QUERY PLAN
+dan waktu rata-rata.
+
+Contoh:
+    python scripts/benchmark_recommendation_indexes.py --users 10000 --days 365
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+
+from app.models.recommendation import DailyRecommendation, DailyCheckin
+
+TABLES = [DailyRecommendation.__table__, DailyCheckin.__table__]
+
+# (label, sql) - mirrors the queries issued by the routes; parameters are
+# :user_id and the dates computed in query_params
+QUERIES = [
+    ('month view', """
+        SELECT * FROM daily_recommendations
+        WHERE user_id = :user_id AND date >= :month_start AND date <= :month_end
+        ORDER BY date
+    """),
+    ('history (last 7)', """
+        SELECT * FROM daily_recommendations
+        WHERE user_id = :user_id
+        ORDER BY date DESC LIMIT 7
+    """),
+    ('history check-in', """
+        SELECT * FROM daily_checkins
+        WHERE user_id = :user_id AND recommendation_id = :recommendation_id
+        LIMIT 1
+    """),
+    ('today', """
+        SELECT * FROM daily_recommendations
+        WHERE user_id = :user_id AND date = :today
+        LIMIT 1
+    """),
+    ('progress check-ins', """
+        SELECT * FROM daily_checkins
+        WHERE user_id = :user_id AND date >= :month_start AND date <= :today
+        ORDER BY date
+    """),
+    ('planned days count', """
+        SELECT COUNT(*) FROM daily_recommendations
+        WHERE user_id = :user_id AND date >= :today
+    """),
+]
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark recommendation (user_id, date) indexes')
+    parser.add_argument('--users', type=int, default=10000,
+                        help='Number of synthetic users')
+    parser.add_argument('--days', type=int, default=365,
+                        help='Days of recommendations per user')
+    parser.add_argument('--checkin-rate', type=float, default=0.7,
+                        help='Fraction of days with a check-in')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Number of runs per query (each for a different user)')
+    parser.add_argument('--db-path', default=None,
+                        help='Database file to use (default: temporary file)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    return parser.parse_args()
+
+
+def create_schema(db_path):
+    """Create the tables from the models, without their indexes"""
+    engine = create_engine(f'sqlite:///{db_path}')
+    with engine.begin() as connection:
+        for table in TABLES:
+            table.create(connection)
+            for index in table.indexes:
+                index.drop(connection)
+    return engine
+
+
+def create_indexes(engine):
+    """Create the indexes declared on the models"""
+    with engine.begin() as connection:
+        for table in TABLES:
+            for index in table.indexes:
+                index.create(connection)
+        connection.exec_driver_sql("ANALYZE")
+
+
+def populate(conn, n_users, n_days, checkin_rate, first_day, seed):
+    """Insert one recommendation per user per day, day by day like production"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    created_at = first_day.isoformat() + ' 06:00:00'
+
+    for offset in range(n_days):
+        day = (first_day + timedelta(days=offset)).isoformat()
+        first_id = offset * n_users + 1
+        conn.executemany(
+            "INSERT INTO daily_recommendations (id, user_id, date, breakfast, lunch, dinner, "
+            "activities, total_calories, target_calories, is_completed, created_at) "
+            "VALUES (?, ?, ?, '{}', '{}', '{}', '[]', ?, 2000, 0, ?)",
+            (
+                (first_id + user_id - 1, user_id, day, rng.randint(1500, 2500), created_at)
+                for user_id in range(1, n_users + 1)
+            )
+        )
+        conn.executemany(
+            "INSERT INTO daily_checkins (user_id, recommendation_id, date, food_completed, "
+            "activity_completed, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (user_id, first_id + user_id - 1, day, rng.random() < 0.8, rng.random() < 0.8, created_at)
+                for user_id in range(1, n_users + 1)
+                if rng.random() < checkin_rate
+            )
+        )
+    conn.commit()
+
+    recommendations = conn.execute("SELECT COUNT(*) FROM daily_recommendations").fetchone()[0]
+    checkins = conn.execute("SELECT COUNT(*) FROM daily_checkins").fetchone()[0]
+    print(f"Generated {recommendations} recommendations and {checkins} check-ins "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+def query_params(rng, n_users, n_days, first_day):
+    """Parameters for one run: a random user, the last month of its plan"""
+    user_id = rng.randint(1, n_users)
+    today = first_day + timedelta(days=n_days - 31)
+    return {
+        'user_id': user_id,
+        'recommendation_id': (n_days - 31) * n_users + user_id,
+        'today': today.isoformat(),
+        'month_start': today.replace(day=1).isoformat(),
+        'month_end': (today.replace(day=1) + timedelta(days=31)).replace(day=1).isoformat(),
+    }
+
+
+def run_queries(conn, params_list):
+    """Print plans and return mean latency (ms) per query"""
+    timings = {}
+    for label, sql in QUERIES:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params_list[0]).fetchall()
+        print(f"  {label}:")
+        for row in plan:
+            print(f"      {row[3]}")
+
+        conn.execute(sql, params_list[0]).fetchall()  # warm the page cache
+        start = time.perf_counter()
+        for params in params_list:
+            conn.execute(sql, params).fetchall()
+        timings[label] = (time.perf_counter() - start) * 1000 / len(params_list)
+    return timings
+
+
+def main():
+    args = parse_args()
+
+    db_path = args.db_path
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix='.db', prefix='recommendation_bench_')
+        os.close(fd)
+        os.remove(db_path)
+
+    first_day = date.today() - timedelta(days=args.days - 31)
+    rng = random.Random(args.seed)
+    params_list = [query_params(rng, args.users, args.days, first_day) for _ in range(args.repeat)]
+
+    try:
+        engine = create_schema(db_path)
+        conn = sqlite3.connect(db_path)
+        populate(conn, args.users, args.days, args.checkin_rate, first_day, args.seed)
+
+        print("\n== Without indexes ==")
+        before = run_queries(conn, params_list)
+
+        start = time.perf_counter()
+        create_indexes(engine)
+        print(f"\nCreated indexes in {time.perf_counter() - start:.1f}s")
+
+        # New connection: the old one keeps statements planned without the indexes
+        conn.close()
+        conn = sqlite3.connect(db_path)
+
+        print("\n== With (user_id, date) indexes ==")
+        after = run_queries(conn, params_list)
+
+        print(f"\n{'query':<30}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for label in before:
+            speedup = before[label] / after[label] if after[label] else float('inf')
+            print(f"{label:<30}{before[label]:>12.3f}{after[label]:>12.3f}{speedup:>9.1f}x")
+
+        conn.close()
+        engine.dispose()
+    finally:
+        if args.db_path is None and os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Benchmark cold start of the backend, phase by phase.
+
+Script ini menjalankan cold start (import paket app, create_app, dan
+pembuatan recommendation engine) beberapa kali di proses Python baru, lalu
+menampilkan median waktu tiap fase: import, config, extensions, blueprints,
+db init, plan jobs dan engine init. Hasilnya bisa disimpan sebagai JSON dan
+dipakai sebagai baseline run berikutnya untuk mendeteksi regresi cold start.
+
+Contoh:
+    python scripts/benchmark_startup.py --repeat 5 --save startup_baseline.json
+    python scripts/benchmark_startup.py --baseline startup_baseline.json --threshold 20
+"""
+import os
+import sys
+import json
+import argparse
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.startup_profile import measure_cold_start, summarize
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark backend cold start per phase')
+    parser.add_argument('--env', default='testing',
+                        help='Configuration passed to create_app')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Cold starts to run (the median of each phase is reported)')
+    parser.add_argument('--no-engine', action='store_true',
+                        help='Skip building the recommendation engine')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Start in an empty directory (seed foods and fit the vectorizer)')
+    parser.add_argument('--save', default=None,
+                        help='Write the median phases as JSON to this file')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON file from --save to compare against')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='Exit with status 1 if the total is this many percent above the baseline')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    runs = []
+    for i in range(args.repeat):
+        runs.append(measure_cold_start(args.env, engine=not args.no_engine, fresh=args.fresh))
+        total = sum(phase['ms'] for phase in runs[-1])
+        print(f"run {i + 1}/{args.repeat}: {total:.0f} ms")
+    phases = summarize(runs)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            saved = {phase['name']: phase['ms'] for phase in json.load(f)}
+        # Only phases measured in both runs (e.g. no engine init with --no-engine)
+        baseline = {phase['name']: saved[phase['name']] for phase in phases if phase['name'] in saved}
+
+    print(f"\n{'phase':<16}{'median ms':>12}{'baseline ms':>14}{'change':>10}")
+    for phase in phases + [{'name': 'total', 'ms': sum(p['ms'] for p in phases)}]:
+        line = f"{phase['name']:<16}{phase['ms']:>12.1f}"
+        if phase['name'] == 'total' and baseline:
+            before = sum(baseline.values())
+        else:
+            before = baseline.get(phase['name'])
+        if before:
+            line += f"{before:>14.1f}{(phase['ms'] - before) * 100 / before:>9.1f}%"
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(phases, f, indent=2)
+        print(f"\nSaved to {args.save}")
+
+    if baseline:
+        total = sum(phase['ms'] for phase in phases)
+        limit = sum(baseline.values()) * (1 + args.threshold / 100)
+        if total > limit:
+            print(f"\nCold start regression: {total:.0f} ms > {limit:.0f} ms "
+                  f"(baseline + {args.threshold:.0f}%)")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
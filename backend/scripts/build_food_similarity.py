@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Build the precomputed food similarity index.
+
+Script ini memuat seluruh katalog makanan, mengubahnya menjadi matriks TF-IDF
+sparse dengan vectorizer di `models/tfidf_vectorizer.joblib`, lalu menghitung
+top-k makanan paling mirip (cosine similarity) untuk setiap makanan dan
+menyimpannya di `models/food_similarity`. Jalankan setelah import data
+makanan agar worker tidak perlu membangun index saat start.
+
+Dengan `--ann inverted` (atau `lsh`) script juga membangun nearest-neighbour
+index di `models/food_ann_index` dan memakainya untuk mencari tetangga,
+jauh lebih cepat untuk katalog USDA penuh; engine memakai index itu untuk
+makanan yang belum ada di tabel tetangga.
+
+Contoh:
+    python scripts/build_food_similarity.py --db-path food_database.db --k 20
+    python scripts/build_food_similarity.py --ann inverted --max-postings 1000
+"""
+import os
+import sys
+import time
+import argparse
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ml.food_database import USDAFoodDatabase
+from app.ml.model_serializer import ModelSerializer
+from app.ml.food_similarity import FoodSimilarityIndex, DEFAULT_TOP_K
+from app.ml.ann_index import ANN_INDEX_TYPES
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Build the food similarity index')
+    parser.add_argument('--db-path', default='food_database.db',
+                        help='Path to the SQLite food database')
+    parser.add_argument('--model-dir', default='models',
+                        help='Directory of the vectorizer and the index')
+    parser.add_argument('--k', type=int, default=DEFAULT_TOP_K,
+                        help='Neighbours to keep per food')
+    parser.add_argument('--ann', choices=sorted(ANN_INDEX_TYPES), default=None,
+                        help='Also build this nearest-neighbour index (models/food_ann_index) '
+                             'and compute the neighbours with it')
+    parser.add_argument('--max-postings', type=int, default=1000,
+                        help='Foods read per query term (inverted index)')
+    parser.add_argument('--tables', type=int, default=8, help='LSH hash tables')
+    parser.add_argument('--bits', type=int, default=16, help='LSH bits per table')
+    parser.add_argument('--sample', type=int, default=5,
+                        help='Print the neighbours of this many foods')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    food_db = USDAFoodDatabase(db_path=args.db_path, use_catalog=True)
+    catalog = food_db.get_catalog()
+    if not len(catalog):
+        print(f"No foods in {args.db_path}")
+        sys.exit(1)
+
+    # Same vectorizer as AdvancedRecommendationEngine (fitted if missing)
+    vectorizer = ModelSerializer.initialize_vectorizer(
+        food_data=food_db.get_all_foods(limit=1000),
+        model_path=os.path.join(args.model_dir, 'tfidf_vectorizer.joblib')
+    )
+
+    start = time.perf_counter()
+    ann_index = None
+    if args.ann:
+        params = {
+            'inverted': {'max_postings': args.max_postings},
+            'lsh': {'n_tables': args.tables, 'n_bits': args.bits},
+        }.get(args.ann, {})
+        ann_index = ModelSerializer.initialize_ann_index(
+            vectorizer,
+            food_data=catalog.get_rows(range(len(catalog))),
+            model_path=os.path.join(args.model_dir, 'food_ann_index'),
+            index_type=args.ann,
+            rebuild=True,
+            **params
+        )
+    index = FoodSimilarityIndex.build(catalog, vectorizer, args.k, ann_index=ann_index)
+    build_seconds = time.perf_counter() - start
+
+    path = os.path.join(args.model_dir, 'food_similarity')
+    if not index.save(path):
+        sys.exit(1)
+
+    with_neighbours = int((index.neighbor_ids[:, 0] >= 0).sum()) if index.k else 0
+    print(f"Indexed {len(catalog)} foods (k={index.k}) in {build_seconds:.1f}s, "
+          f"{with_neighbours} with at least one similar food")
+    size = sum(entry.stat().st_size for entry in os.scandir(path))
+    print(f"Saved to {path} ({size / 1024:.0f} KB)")
+
+    for position in range(0, len(catalog), max(1, len(catalog) // max(args.sample, 1)))[:args.sample]:
+        food = catalog.get_rows([position])[0]
+        neighbours = index.similar(food['id'], 3)
+        names = catalog.get_rows(catalog.positions_of([food_id for food_id, _ in neighbours]))
+        similar = ', '.join(f"{row['name']} ({score:.2f})" for row, (_, score) in zip(names, neighbours))
+        print(f"  {food['name']} -> {similar or '-'}")
+
+
+if __name__ == '__main__':
+    main()
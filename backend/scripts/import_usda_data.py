@@ -17,12 +17,16 @@ import io
 from pathlib import Path
 import logging
 import time
+import multiprocessing
+import queue as queue_module
 from datetime import datetime
 
 # Add the parent directory to the path so we can import our app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.ml.food_database import USDAFoodDatabase
+from app.ml.meal_type_classifier import map_foods_to_meal_types as classify_meal_types
+from app.utils.json_stream import JsonArrayReader
 
 # Configure logging
 logging.basicConfig(
@@ -88,350 +92,529 @@ def extract_zip(zip_path, output_dir):
         logger.error(f"Error extracting zip file: {e}")
         return False
 
-def process_foundation_foods(json_path, food_db):
-    """Process foundation foods from the JSON file"""
+def find_json_file(zip_path, output_dir, default_name):
+    """Path of the extracted JSON file (names carry the release date, e.g. *_2025-04-24.json)"""
     try:
-        logger.info(f"Processing foundation foods from {json_path}")
-        with open(json_path, 'r') as file:
-            foods = json.load(file)
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            for name in zip_ref.namelist():
+                if name.lower().endswith('.json'):
+                    return os.path.join(output_dir, name)
+    except Exception as e:
+        logger.warning(f"Could not list {zip_path}: {e}")
+    return os.path.join(output_dir, default_name)
+
+def extract_nutrients(food_nutrients, food_data):
+    """Copy the macro nutrients of a Foundation / SR Legacy food into food_data"""
+    for nutrient in food_nutrients:
+        nutrient_name = nutrient.get('nutrient', {}).get('name', '').lower()
+        unit = nutrient.get('nutrient', {}).get('unitName', '').lower()
+        amount = nutrient.get('amount', 0)
         
-        count = 0
-        for food in foods:
-            try:
-                # Extract basic food information
-                food_data = {
-                    'fdc_id': food.get('fdcId'),
-                    'name': food.get('description'),
-                    'category': food.get('foodCategory', {}).get('description', ''),
-                    'data_type': 'Foundation',
-                }
-                
-                # Extract nutrients
-                for nutrient in food.get('foodNutrients', []):
-                    nutrient_id = nutrient.get('nutrient', {}).get('id')
-                    nutrient_name = nutrient.get('nutrient', {}).get('name', '').lower()
-                    amount = nutrient.get('amount', 0)
-                    
-                    if 'protein' in nutrient_name:
-                        food_data['protein'] = amount
-                    elif 'carbohydrate' in nutrient_name and 'total' in nutrient_name:
-                        food_data['carbs'] = amount
-                    elif 'total lipid' in nutrient_name or ('fat' in nutrient_name and 'total' in nutrient_name):
-                        food_data['fat'] = amount
-                    elif 'energy' in nutrient_name:
-                        food_data['calories'] = amount
-                    elif 'fiber' in nutrient_name and 'total' in nutrient_name:
-                        food_data['fiber'] = amount
-                    elif 'sugar' in nutrient_name and 'total' in nutrient_name:
-                        food_data['sugar'] = amount
-                    elif 'sodium' in nutrient_name:
-                        food_data['sodium'] = amount
-                
-                # Save to database
-                if 'calories' in food_data and 'protein' in food_data and 'carbs' in food_data and 'fat' in food_data:
-                    food_db._save_food_to_db(food_data)
-                    count += 1
-                    
-                    if count % 100 == 0:
-                        print(f"\rProcessed {count} foods", end='')
-            
-            except Exception as e:
-                logger.warning(f"Error processing foundation food: {e}")
-                continue
+        if 'protein' in nutrient_name:
+            food_data['protein'] = amount
+        elif nutrient_name.startswith('carbohydrate'):
+            # "Carbohydrate, by difference" / "by summation"
+            food_data['carbs'] = amount
+        elif nutrient_name.startswith('fatty acids'):
+            # Fat subtypes ("Fatty acids, total saturated") are not total fat
+            continue
+        elif 'total lipid' in nutrient_name or ('fat' in nutrient_name and 'total' in nutrient_name):
+            food_data['fat'] = amount
+        elif 'energy' in nutrient_name:
+            # Energy is listed both in kcal and kJ
+            if unit in ('', 'kcal'):
+                food_data['calories'] = amount
+        elif 'fiber' in nutrient_name and 'total' in nutrient_name:
+            food_data['fiber'] = amount
+        elif 'sugar' in nutrient_name and 'total' in nutrient_name:
+            food_data['sugar'] = amount
+        elif 'sodium' in nutrient_name:
+            food_data['sodium'] = amount
+    return food_data
+
+def normalize_foundation_food(food):
+    """Convert a Foundation food record into our food dict"""
+    food_data = {
+        'fdc_id': food.get('fdcId'),
+        'name': food.get('description'),
+        'category': food.get('foodCategory', {}).get('description', ''),
+        'data_type': 'Foundation',
+    }
+    return extract_nutrients(food.get('foodNutrients', []), food_data)
+
+def normalize_sr_legacy_food(food):
+    """Convert an SR Legacy food record into our food dict"""
+    food_data = {
+        'fdc_id': food.get('fdcId'),
+        'name': food.get('description'),
+        'category': food.get('foodCategory', {}).get('description', ''),
+        'data_type': 'SR Legacy',
+    }
+    return extract_nutrients(food.get('foodNutrients', []), food_data)
+
+def normalize_branded_food(food):
+    """Convert a Branded food record into our food dict"""
+    food_data = {
+        'fdc_id': food.get('fdcId'),
+        'name': food.get('description', ''),
+        'category': food.get('brandedFoodCategory', ''),
+        'data_type': 'Branded',
+    }
+    
+    # Extract serving size
+    serving_size = food.get('servingSize')
+    serving_unit = food.get('servingSizeUnit')
+    if serving_size:
+        food_data['serving_size'] = serving_size
+        food_data['serving_unit'] = serving_unit
+    
+    # Extract nutrients (branded records use the abridged nutrient format)
+    for nutrient in food.get('foodNutrients', []):
+        nutrient_name = (nutrient.get('nutrientName') or nutrient.get('nutrient', {}).get('name', '')).lower()
+        amount = nutrient.get('value', nutrient.get('amount', 0))
         
-        print(f"\nSuccessfully processed {count} foundation foods")
-        return count
+        if 'protein' in nutrient_name:
+            food_data['protein'] = amount
+        elif 'carbohydrate' in nutrient_name or 'carbs' in nutrient_name:
+            food_data['carbs'] = amount
+        elif ('fat' in nutrient_name and 'total' in nutrient_name) or 'total fat' in nutrient_name:
+            food_data['fat'] = amount
+        elif 'energy' in nutrient_name or 'calorie' in nutrient_name:
+            food_data['calories'] = amount
+        elif 'fiber' in nutrient_name:
+            food_data['fiber'] = amount
+        elif 'sugar' in nutrient_name:
+            food_data['sugar'] = amount
+        elif 'sodium' in nutrient_name:
+            food_data['sodium'] = amount
     
-    except Exception as e:
-        logger.error(f"Error processing foundation foods: {e}")
-        return 0
+    return food_data
 
-def process_sr_legacy_foods(json_path, food_db):
-    """Process SR Legacy foods from the JSON file"""
-    try:
-        logger.info(f"Processing SR Legacy foods from {json_path}")
-        with open(json_path, 'r') as file:
-            foods = json.load(file)
+def normalize_survey_food(food):
+    """Convert a Survey (FNDDS) food record into our food dict"""
+    food_data = {
+        'fdc_id': food.get('fdcId'),
+        'name': food.get('description'),
+        'category': (food.get('wweiaFoodCategory') or {}).get('wweiaFoodCategoryDescription', ''),
+        'data_type': 'Survey (FNDDS)',
+    }
+    return extract_nutrients(food.get('foodNutrients', []), food_data)
+
+def has_required_nutrients(food_data):
+    """Foods without calories and macros are useless for recommendations"""
+    return all(key in food_data for key in ('calories', 'protein', 'carbs', 'fat'))
+
+def iter_normalized_foods(reader, normalize, label, limit=None):
+    """Yield normalized foods that have the required nutrients, up to limit"""
+    count = 0
+    for food in reader:
+        try:
+            food_data = normalize(food)
+        except Exception as e:
+            logger.warning(f"Error processing {label} record: {e}")
+            continue
         
-        count = 0
-        for food in foods:
-            try:
-                # Extract basic food information
-                food_data = {
-                    'fdc_id': food.get('fdcId'),
-                    'name': food.get('description'),
-                    'category': food.get('foodCategory', {}).get('description', ''),
-                    'data_type': 'SR Legacy',
-                }
-                
-                # Extract nutrients
-                for nutrient in food.get('foodNutrients', []):
-                    nutrient_name = nutrient.get('nutrient', {}).get('name', '').lower()
-                    amount = nutrient.get('amount', 0)
-                    
-                    if 'protein' in nutrient_name:
-                        food_data['protein'] = amount
-                    elif 'carbohydrate' in nutrient_name and 'total' in nutrient_name:
-                        food_data['carbs'] = amount
-                    elif 'total lipid' in nutrient_name or ('fat' in nutrient_name and 'total' in nutrient_name):
-                        food_data['fat'] = amount
-                    elif 'energy' in nutrient_name:
-                        food_data['calories'] = amount
-                    elif 'fiber' in nutrient_name and 'total' in nutrient_name:
-                        food_data['fiber'] = amount
-                    elif 'sugar' in nutrient_name and 'total' in nutrient_name:
-                        food_data['sugar'] = amount
-                    elif 'sodium' in nutrient_name:
-                        food_data['sodium'] = amount
-                
-                # Skip if missing required nutrients
-                if 'calories' in food_data and 'protein' in food_data and 'carbs' in food_data and 'fat' in food_data:
-                    food_db._save_food_to_db(food_data)
-                    count += 1
-                    
-                    if count % 100 == 0:
-                        print(f"\rProcessed {count} SR Legacy foods", end='')
-            
-            except Exception as e:
-                logger.warning(f"Error processing SR Legacy food: {e}")
-                continue
+        # Skip if missing required nutrients
+        if not has_required_nutrients(food_data):
+            continue
         
-        print(f"\nSuccessfully processed {count} SR Legacy foods")
-        return count
-    
-    except Exception as e:
-        logger.error(f"Error processing SR Legacy foods: {e}")
-        return 0
+        yield food_data
+        count += 1
+        if limit and count >= limit:
+            break
 
-def process_branded_foods(json_path, food_db, limit=10000):
-    """Process branded foods from the JSON file (with limit due to large size)"""
+def process_food_file(json_path, food_db, normalize, label, limit=None,
+                      batch_size=5000, fast_import=False):
+    """
+    Stream a USDA JSON file into the database
+    
+    The file is read incrementally with JsonArrayReader, so memory use does
+    not depend on the file size (the branded file is several GB), and foods
+    are written in batches with USDAFoodDatabase.bulk_insert_foods.
+    
+    Args:
+        json_path: Path to the extracted USDA JSON file
+        food_db: USDAFoodDatabase instance
+        normalize: Function converting one USDA record into our food dict
+        label: Name used in log messages
+        limit: Maximum number of foods to import (None = all)
+        batch_size: Number of foods per transaction
+        fast_import: Relax durability while importing (see bulk_insert_foods)
+        
+    Returns:
+        Number of foods imported
+    """
     try:
-        logger.info(f"Processing branded foods from {json_path} (limit: {limit})")
-        count = 0
+        logger.info(f"Processing {label} from {json_path}" + (f" (limit: {limit})" if limit else ""))
         
-        # Branded foods file is very large, so process it incrementally
-        with open(json_path, 'r') as file:
-            # The file begins with a [ character
-            char = file.read(1)
-            if char != '[':
-                logger.error("Invalid JSON format for branded foods")
-                return 0
+        with open(json_path, 'r', encoding='utf-8') as file:
+            reader = JsonArrayReader(file, label=label)
             
-            # Process each food item
-            while count < limit:
-                # Try to read and parse a single food item
-                try:
-                    food_json = ""
-                    braces = 0
-                    in_quotes = False
-                    escape_next = False
-                    
-                    # Simple JSON parser to find a complete food item
-                    while True:
-                        char = file.read(1)
-                        if not char:  # End of file
-                            break
-                        
-                        food_json += char
-                        
-                        if escape_next:
-                            escape_next = False
-                        elif char == '\\':
-                            escape_next = True
-                        elif char == '"' and not escape_next:
-                            in_quotes = not in_quotes
-                        elif not in_quotes:
-                            if char == '{':
-                                braces += 1
-                            elif char == '}':
-                                braces -= 1
-                                if braces == 0:
-                                    break
-                    
-                    if not char:  # End of file
-                        break
-                    
-                    # Remove trailing comma if present
-                    if food_json.endswith(','):
-                        food_json = food_json[:-1]
-                    
-                    # Parse the food item
-                    food = json.loads(food_json)
-                    
-                    # Extract basic food information
-                    food_data = {
-                        'fdc_id': food.get('fdcId'),
-                        'name': food.get('description', ''),
-                        'category': food.get('brandedFoodCategory', ''),
-                        'data_type': 'Branded',
-                    }
-                    
-                    # Extract serving size
-                    serving_size = food.get('servingSize')
-                    serving_unit = food.get('servingSizeUnit')
-                    if serving_size:
-                        food_data['serving_size'] = serving_size
-                        food_data['serving_unit'] = serving_unit
-                    
-                    # Extract nutrients
-                    for nutrient in food.get('foodNutrients', []):
-                        nutrient_name = nutrient.get('nutrientName', '').lower()
-                        amount = nutrient.get('value', 0)
-                        
-                        if 'protein' in nutrient_name:
-                            food_data['protein'] = amount
-                        elif 'carbohydrate' in nutrient_name or 'carbs' in nutrient_name:
-                            food_data['carbs'] = amount
-                        elif ('fat' in nutrient_name and 'total' in nutrient_name) or 'total fat' in nutrient_name:
-                            food_data['fat'] = amount
-                        elif 'energy' in nutrient_name or 'calorie' in nutrient_name:
-                            food_data['calories'] = amount
-                        elif 'fiber' in nutrient_name:
-                            food_data['fiber'] = amount
-                        elif 'sugar' in nutrient_name:
-                            food_data['sugar'] = amount
-                        elif 'sodium' in nutrient_name:
-                            food_data['sodium'] = amount
-                    
-                    # Skip if missing required nutrients
-                    if 'calories' in food_data and 'protein' in food_data and 'carbs' in food_data and 'fat' in food_data:
-                        food_db._save_food_to_db(food_data)
-                        count += 1
-                        
-                        if count % 100 == 0:
-                            print(f"\rProcessed {count} branded foods", end='')
-                
-                except json.JSONDecodeError:
-                    # Skip invalid JSON
-                    continue
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing branded food: {e}")
-                    continue
+            def report(batch):
+                print(f"\rImported {reader.items_read} {label} records, "
+                      f"batch {batch['batch']}: {batch['foods']} foods "
+                      f"({batch['foods_per_second']:.0f}/s)", end='')
+            
+            stats = food_db.bulk_insert_foods(
+                iter_normalized_foods(reader, normalize, label, limit),
+                batch_size=batch_size,
+                fast_import=fast_import,
+                on_batch=report
+            )
+            print()
+            reader.log_progress(final=True)
         
-        print(f"\nSuccessfully processed {count} branded foods")
-        return count
+        print(f"Successfully processed {stats['inserted']} {label} "
+              f"({stats['failed']} failed) in {stats['seconds']:.1f}s")
+        return stats['inserted']
     
     except Exception as e:
-        logger.error(f"Error processing branded foods: {e}")
+        logger.error(f"Error processing {label}: {e}")
         return 0
 
-def map_foods_to_meal_types(food_db):
-    """Map foods to appropriate meal types based on heuristics"""
-    try:
-        logger.info("Mapping foods to meal types")
-        
-        # Connect to the database
-        conn = food_db._get_connection()
-        cursor = conn.cursor()
-        
-        # Get all foods
-        cursor.execute("SELECT id, name, category FROM foods")
-        foods = cursor.fetchall()
-        
-        breakfast_keywords = [
-            'breakfast', 'cereal', 'oatmeal', 'pancake', 'waffle', 'egg', 
-            'toast', 'bagel', 'muffin', 'yogurt', 'milk', 'bread',
-            'coffee', 'tea', 'juice', 'morning'
-        ]
+def process_foundation_foods(json_path, food_db, **kwargs):
+    """Process foundation foods from the JSON file"""
+    return process_food_file(json_path, food_db, normalize_foundation_food, 'foundation foods', **kwargs)
+
+def process_sr_legacy_foods(json_path, food_db, **kwargs):
+    """Process SR Legacy foods from the JSON file"""
+    return process_food_file(json_path, food_db, normalize_sr_legacy_food, 'SR Legacy foods', **kwargs)
+
+def process_branded_foods(json_path, food_db, limit=10000, **kwargs):
+    """Process branded foods from the JSON file (with limit due to large size)"""
+    return process_food_file(json_path, food_db, normalize_branded_food, 'branded foods', limit, **kwargs)
+
+def process_survey_foods(json_path, food_db, **kwargs):
+    """Process survey (FNDDS) foods from the JSON file"""
+    return process_food_file(json_path, food_db, normalize_survey_food, 'survey foods', **kwargs)
+
+# Food type -> (default JSON file name, normalizer, label)
+DATASETS = {
+    'foundation': ('FoodData_Central_foundation_food.json', normalize_foundation_food, 'foundation foods'),
+    'sr_legacy': ('sr_legacy_food.json', normalize_sr_legacy_food, 'SR Legacy foods'),
+    'branded': ('branded_food.json', normalize_branded_food, 'branded foods'),
+    'survey': ('survey_food.json', normalize_survey_food, 'survey foods'),
+}
+
+# ---------------------------------------------------------------------------
+# Parallel import: parser processes -> queue -> single writer process
+# ---------------------------------------------------------------------------
+
+# Bytes of a line-delimited file parsed per task (the branded file is split
+# into many tasks, the small files usually fit in one)
+PARALLEL_CHUNK_BYTES = 64 << 20
+# Bytes read from the start of a file to detect its layout
+LAYOUT_PROBE_BYTES = 1 << 20
+
+# Set by _init_parser_worker in each pool process
+_worker_queue = None
+_worker_stop_events = None
+_worker_abort = None
+
+def find_record_ranges(json_path, chunk_bytes=PARALLEL_CHUNK_BYTES):
+    """
+    Split a USDA JSON file into byte ranges that can be parsed independently
+    
+    The FoodData Central exports put one record per line
+    (``{"BrandedFoods": [`` on the first line, then ``{...},`` lines and
+    ``{...}]}`` at the end), so any range starting and ending on a line
+    boundary holds whole records. Files with a different layout return None
+    and are parsed as a single stream.
+    
+    Args:
+        json_path: Path to the extracted USDA JSON file
+        chunk_bytes: Approximate size of each range
         
-        lunch_keywords = [
-            'sandwich', 'soup', 'salad', 'wrap', 'burger', 'pasta',
-            'lunch', 'noon', 'midday', 'roll', 'bowl', 'taco',
-            'burrito', 'noon meal'
-        ]
+    Returns:
+        List of (start, end) byte offsets, or None if the file is not
+        line-delimited
+    """
+    with open(json_path, 'rb') as file:
+        head = file.read(LAYOUT_PROBE_BYTES)
+        file_size = os.fstat(file.fileno()).st_size
         
-        dinner_keywords = [
-            'dinner', 'steak', 'fish', 'chicken', 'pork', 'beef',
-            'roast', 'curry', 'evening', 'supper', 'casserole',
-            'stew', 'hearty', 'nighttime'
-        ]
+        # latin-1 maps bytes 1:1 to characters, so offsets stay byte offsets
+        text = head.decode('latin-1')
+        start = JsonArrayReader._find_array_start(text, 0)
+        if start is None:
+            return None
+        first_line_end = text.find('\n', start)
+        if first_line_end < 0 or text[start + 1:first_line_end].strip():
+            return None
+        data_start = first_line_end + 1
         
-        snack_keywords = [
-            'snack', 'chip', 'cracker', 'nut', 'seed', 'bar',
-            'popcorn', 'pretzel', 'candy', 'chocolate', 'cookie',
-            'between meal', 'trail mix', 'dried fruit', 'jerky'
-        ]
+        # The first record must be complete on its own line
+        second_line_end = text.find('\n', data_start)
+        if second_line_end < 0:
+            return None
+        try:
+            _decode_record_line(head[data_start:second_line_end])
+        except ValueError:
+            return None
         
-        # Indonesian food keywords
-        indo_breakfast = [
-            'bubur', 'nasi uduk', 'nasi kuning', 'lontong', 'ketupat',
-            'roti', 'serabi', 'kue', 'gudeg', 'kolak'
-        ]
+        ranges = []
+        position = data_start
+        while position < file_size:
+            file.seek(min(position + chunk_bytes, file_size))
+            file.readline()  # move to the next line boundary
+            end = min(file.tell(), file_size)
+            ranges.append((position, end))
+            position = end
+        return ranges
+
+def _decode_record_line(line):
+    """Decode one ``{...},`` line of a line-delimited USDA file (None for blank/closing lines)"""
+    text = line.decode('utf-8').strip()
+    if not text.startswith('{'):
+        if text.strip(',]}'):
+            raise ValueError(f"Unexpected line in record range: {text[:80]!r}")
+        return None
+    record, end = _record_decoder.raw_decode(text)
+    if text[end:].strip(' \t,]}'):
+        raise ValueError("More than one record per line")
+    return record
+
+_record_decoder = json.JSONDecoder()
+
+def _init_parser_worker(queue, stop_events, abort):
+    """Pool initializer: share the output queue and stop flags with the worker"""
+    global _worker_queue, _worker_stop_events, _worker_abort
+    _worker_queue = queue
+    _worker_stop_events = stop_events
+    _worker_abort = abort
+
+def _put_batch(message):
+    """Put a batch on the writer queue, giving up if the writer has failed"""
+    while True:
+        try:
+            _worker_queue.put(message, timeout=1)
+            return
+        except queue_module.Full:
+            if _worker_abort.is_set():
+                raise RuntimeError("Writer process stopped")
+
+def _iter_range_records(json_path, start, end):
+    """Yield the records in a byte range returned by find_record_ranges"""
+    with open(json_path, 'rb') as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            record = _decode_record_line(line)
+            if record is not None:
+                yield record
+
+def _parse_task(task):
+    """
+    Pool worker: parse and normalize one task and send batches to the writer
+    
+    Args:
+        task: (food_type, json_path, start, end, batch_size); start/end are
+            None when the whole file has to be streamed
         
-        indo_lunch = [
-            'nasi', 'bakso', 'soto', 'gado-gado', 'pecel', 'rendang',
-            'ayam', 'sate', 'ikan', 'sayur', 'sambal', 'tumis'
-        ]
+    Returns:
+        (food_type, records read, foods sent, seconds)
+    """
+    food_type, json_path, start, end, batch_size = task
+    _, normalize, label = DATASETS[food_type]
+    stop = _worker_stop_events[food_type]
+    started_at = time.perf_counter()
+    records = 0
+    sent = 0
+    if stop.is_set():
+        return food_type, records, sent, 0.0
+    
+    if start is None:
+        file = open(json_path, 'r', encoding='utf-8')
+        source = JsonArrayReader(file, label=label)
+    else:
+        file = None
+        source = _iter_range_records(json_path, start, end)
+    
+    try:
+        batch = []
+        for record in source:
+            records += 1
+            try:
+                food_data = normalize(record)
+            except Exception as e:
+                logger.warning(f"Error processing {label} record: {e}")
+                continue
+            if not has_required_nutrients(food_data):
+                continue
+            batch.append(food_data)
+            if len(batch) >= batch_size:
+                # The writer sets the stop flag once a type reaches its limit
+                if stop.is_set() or _worker_abort.is_set():
+                    batch = []
+                    break
+                _put_batch((food_type, batch))
+                sent += len(batch)
+                batch = []
+        if batch and not stop.is_set():
+            _put_batch((food_type, batch))
+            sent += len(batch)
+    finally:
+        if file is not None:
+            file.close()
+    
+    return food_type, records, sent, time.perf_counter() - started_at
+
+def _writer_main(db_path, queue, result_queue, limits, stop_events, abort,
+                 batch_size, fast_import):
+    """
+    Writer process: insert every batch from the queue into the database
+    
+    This is the only process that writes, so SQLite never sees concurrent
+    writers. Per-type limits are applied here; when a type is full its stop
+    flag tells the parsers to skip the rest of that file.
+    """
+    counts = {food_type: 0 for food_type in stop_events}
+    finished = False
+    try:
+        food_db = USDAFoodDatabase(db_path=db_path)
         
-        indo_dinner = [
-            'lele', 'bakar', 'goreng', 'geprek', 'rica', 'teri',
-            'tahu', 'tempe', 'terong', 'lalapan', 'sup'
-        ]
+        def foods():
+            nonlocal finished
+            while True:
+                message = queue.get()
+                if message is None:
+                    finished = True
+                    return
+                food_type, batch = message
+                limit = limits.get(food_type)
+                if limit is not None:
+                    remaining = limit - counts[food_type]
+                    if remaining <= 0:
+                        continue
+                    if len(batch) >= remaining:
+                        batch = batch[:remaining]
+                        stop_events[food_type].set()
+                counts[food_type] += len(batch)
+                yield from batch
         
-        indo_snack = [
-            'keripik', 'kerupuk', 'kacang', 'gorengan', 'cireng',
-            'bakwan', 'pisang', 'tempe mendoan', 'tahu gejrot'
-        ]
+        def report(batch):
+            logger.info(f"Writer: batch {batch['batch']}, {batch['foods']} foods "
+                        f"({batch['foods_per_second']:.0f}/s)")
         
-        # Combine keywords
-        breakfast_keywords.extend(indo_breakfast)
-        lunch_keywords.extend(indo_lunch)
-        dinner_keywords.extend(indo_dinner)
-        snack_keywords.extend(indo_snack)
+        stats = food_db.bulk_insert_foods(foods(), batch_size=batch_size,
+                                          fast_import=fast_import, on_batch=report)
+        food_db.close()
+        result_queue.put((counts, stats, None))
+    except Exception as e:
+        abort.set()
+        # Keep draining so blocked parsers can notice the abort flag
+        while not finished and queue.get() is not None:
+            pass
+        result_queue.put((counts, None, str(e)))
+
+def import_parallel(datasets, db_path, workers, batch_size=5000, fast_import=False,
+                    chunk_bytes=PARALLEL_CHUNK_BYTES):
+    """
+    Import several USDA files with a pool of parser processes and one writer
+    
+    JSON decoding and nutrient extraction are CPU bound and run in ``workers``
+    processes (line-delimited files are split into byte ranges, so the
+    branded file uses every core). Normalized foods travel in batches over a
+    bounded queue to a single writer process that calls
+    USDAFoodDatabase.bulk_insert_foods, which keeps writes sequential.
+    
+    With a limit, the foods kept are the first ones to reach the writer, which
+    depends on scheduling; use --workers 1 for a reproducible subset.
+    
+    Args:
+        datasets: List of (food_type, json_path, limit) tuples
+        db_path: Database file to write
+        workers: Number of parser processes
+        batch_size: Foods per queue message and per transaction
+        fast_import: Relax durability while importing (see bulk_insert_foods)
+        chunk_bytes: Approximate bytes per parse task
         
-        count = 0
-        mappings = 0
+    Returns:
+        Number of foods imported
+    """
+    tasks = []
+    for food_type, json_path, _ in datasets:
+        ranges = find_record_ranges(json_path, chunk_bytes)
+        if ranges is None:
+            logger.info(f"{json_path} is not line-delimited, parsing it as one stream")
+            tasks.append((food_type, json_path, None, None, batch_size))
+        else:
+            tasks.extend((food_type, json_path, start, end, batch_size) for start, end in ranges)
+    
+    food_types = {food_type for food_type, _, _ in datasets}
+    limits = {food_type: limit for food_type, _, limit in datasets if limit}
+    
+    context = multiprocessing.get_context()
+    # A few batches per worker keep the writer busy without buffering whole files
+    queue = context.Queue(maxsize=workers * 2)
+    result_queue = context.Queue()
+    stop_events = {food_type: context.Event() for food_type in food_types}
+    abort = context.Event()
+    
+    writer = context.Process(
+        target=_writer_main,
+        args=(db_path, queue, result_queue, limits, stop_events, abort, batch_size, fast_import),
+        name='usda-writer'
+    )
+    writer.start()
+    
+    started_at = time.perf_counter()
+    records_read = {food_type: 0 for food_type in food_types}
+    logger.info(f"Parsing {len(tasks)} chunk(s) of {len(datasets)} file(s) with {workers} workers")
+    try:
+        pool = context.Pool(workers, initializer=_init_parser_worker,
+                            initargs=(queue, stop_events, abort))
+        try:
+            for done, (food_type, records, sent, seconds) in enumerate(
+                    pool.imap_unordered(_parse_task, tasks), 1):
+                records_read[food_type] += records
+                elapsed = time.perf_counter() - started_at
+                logger.info(f"Parsed chunk {done}/{len(tasks)} ({DATASETS[food_type][2]}): "
+                            f"{records} records, {sent} foods in {seconds:.1f}s "
+                            f"[{sum(records_read.values()) / elapsed:.0f} records/s overall]")
+            # Let the workers exit normally: terminating them (what the Pool
+            # context manager does) can cut off batches still being flushed
+            # into the queue
+            pool.close()
+        except Exception:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    except Exception as e:
+        # Batches already queued are still written, like the sequential import
+        logger.error(f"Error parsing USDA files: {e}")
+    finally:
+        queue.put(None)
+    
+    counts, stats, error = result_queue.get()
+    writer.join()
+    if error:
+        logger.error(f"Writer process failed: {error}")
+        return 0
+    
+    for food_type in sorted(food_types):
+        print(f"Successfully processed {counts[food_type]} {DATASETS[food_type][2]} "
+              f"from {records_read[food_type]} records")
+    print(f"Imported {stats['inserted']} foods ({stats['failed']} failed) "
+          f"in {time.perf_counter() - started_at:.1f}s with {workers} workers")
+    return stats['inserted']
+
+def map_foods_to_meal_types(food_db):
+    """Map foods to appropriate meal types based on heuristics (see app.ml.meal_type_classifier)"""
+    try:
+        logger.info("Mapping foods to meal types")
         
-        for food in foods:
-            food_id = food['id']
-            name = food['name'].lower() if food['name'] else ''
-            category = food['category'].lower() if food['category'] else ''
-            
-            # Check if the food matches any meal type
-            meal_types = []
-            
-            for keyword in breakfast_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('breakfast')
-                    break
-            
-            for keyword in lunch_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('lunch')
-                    break
-            
-            for keyword in dinner_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('dinner')
-                    break
-            
-            for keyword in snack_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('snack')
-                    break
-            
-            # Add mappings to database
-            for meal_type in meal_types:
-                try:
-                    cursor.execute(
-                        """
-                        INSERT OR IGNORE INTO food_meal_types (food_id, meal_type_id)
-                        SELECT ?, id FROM meal_types WHERE name = ?
-                        """,
-                        (food_id, meal_type)
-                    )
-                    mappings += 1
-                except Exception as e:
-                    logger.warning(f"Error mapping food to meal type: {e}")
-            
-            count += 1
-            if count % 1000 == 0:
-                print(f"\rProcessed {count} foods, created {mappings} mappings", end='')
+        def report(count, mappings):
+            print(f"\rProcessed {count} foods, created {mappings} mappings", end='')
         
-        conn.commit()
-        print(f"\nCreated {mappings} meal type mappings for {count} foods")
-        return mappings
+        stats = classify_meal_types(food_db._get_connection(), on_progress=report)
+        print(f"\nCreated {stats['mappings']} meal type mappings for {stats['foods']} foods")
+        return stats['mappings']
     
     except Exception as e:
         logger.error(f"Error mapping foods to meal types: {e}")
@@ -443,9 +626,15 @@ def main():
     parser.add_argument('--db-path', default='food_database.db', help='Output database path')
     parser.add_argument('--data-dir', default='data', help='Directory for downloaded files')
     parser.add_argument('--food-types', default='foundation,sr_legacy,branded',
-                       help='Comma-separated list of food types to import (foundation,sr_legacy,branded)')
+                       help='Comma-separated list of food types to import (foundation,sr_legacy,branded,survey)')
     parser.add_argument('--limit', type=int, default=10000, help='Limit for branded foods (default: 10000)')
     parser.add_argument('--skip-download', action='store_true', help='Skip downloading files (use existing)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Foods per database transaction (default: 5000)')
+    parser.add_argument('--fast-import', action='store_true',
+                       help='Disable fsync/journal and defer search indexing during import (offline databases only)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Parser processes; >1 parses files in parallel and writes from one process '
+                            f'(default: 1, this machine has {os.cpu_count()} CPUs)')
     args = parser.parse_args()
     
     # Create data directory if it doesn't exist
@@ -458,9 +647,8 @@ def main():
     # Parse food types
     food_types = [t.strip() for t in args.food_types.split(',')]
     
-    total_foods = 0
-    
-    # Process each food type
+    # Download and extract every requested file first
+    datasets = []
     for food_type in food_types:
         if food_type not in DOWNLOAD_URLS:
             logger.warning(f"Unknown food type: {food_type}")
@@ -480,20 +668,20 @@ def main():
         if not extract_zip(zip_path, data_dir):
             continue
         
-        # Process the data
-        if food_type == 'foundation':
-            json_path = os.path.join(data_dir, 'FoodData_Central_foundation_food.json')
-            count = process_foundation_foods(json_path, food_db)
-        elif food_type == 'sr_legacy':
-            json_path = os.path.join(data_dir, 'sr_legacy_food.json')
-            count = process_sr_legacy_foods(json_path, food_db)
-        elif food_type == 'branded':
-            json_path = os.path.join(data_dir, 'branded_food.json')
-            count = process_branded_foods(json_path, food_db, args.limit)
-        else:
-            count = 0
-        
-        total_foods += count
+        json_path = find_json_file(zip_path, data_dir, DATASETS[food_type][0])
+        limit = args.limit if food_type == 'branded' else None
+        datasets.append((food_type, json_path, limit))
+    
+    write_options = {'batch_size': args.batch_size, 'fast_import': args.fast_import}
+    
+    # Process the data
+    if args.workers > 1 and datasets:
+        total_foods = import_parallel(datasets, args.db_path, args.workers, **write_options)
+    else:
+        total_foods = 0
+        for food_type, json_path, limit in datasets:
+            _, normalize, label = DATASETS[food_type]
+            total_foods += process_food_file(json_path, food_db, normalize, label, limit, **write_options)
     
     # Map foods to meal types
     map_foods_to_meal_types(food_db)
@@ -504,4 +692,4 @@ def main():
     food_db.close()
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -17,6 +17,7 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.ml.food_database import USDAFoodDatabase
+from app.ml.meal_type_classifier import map_foods_to_meal_types as classify_meal_types
 
 # Configure logging
 logging.basicConfig(
@@ -117,121 +118,16 @@ HEALTHY_FOODS = [
 ]
 
 def map_foods_to_meal_types(food_db):
-    """Map foods to appropriate meal types based on heuristics"""
+    """Map foods to appropriate meal types based on heuristics (see app.ml.meal_type_classifier)"""
     try:
         logger.info("Mapping foods to meal types")
         
-        # Connect to the database
-        conn = food_db._get_connection()
-        cursor = conn.cursor()
+        def report(count, mappings):
+            print(f"\rProcessed {count} foods, created {mappings} mappings", end='')
         
-        # Get all foods
-        cursor.execute("SELECT id, name, category FROM foods")
-        foods = cursor.fetchall()
-        
-        breakfast_keywords = [
-            'breakfast', 'cereal', 'oatmeal', 'pancake', 'waffle', 'egg', 
-            'toast', 'bagel', 'muffin', 'yogurt', 'milk', 'bread',
-            'coffee', 'tea', 'juice', 'morning'
-        ]
-        
-        lunch_keywords = [
-            'sandwich', 'soup', 'salad', 'wrap', 'burger', 'pasta',
-            'lunch', 'noon', 'midday', 'roll', 'bowl', 'taco',
-            'burrito', 'noon meal'
-        ]
-        
-        dinner_keywords = [
-            'dinner', 'steak', 'fish', 'chicken', 'pork', 'beef',
-            'roast', 'curry', 'evening', 'supper', 'casserole',
-            'stew', 'hearty', 'nighttime'
-        ]
-        
-        snack_keywords = [
-            'snack', 'chip', 'cracker', 'nut', 'seed', 'bar',
-            'popcorn', 'pretzel', 'candy', 'chocolate', 'cookie',
-            'between meal', 'trail mix', 'dried fruit', 'jerky'
-        ]
-        
-        # Indonesian food keywords
-        indo_breakfast = [
-            'bubur', 'nasi uduk', 'nasi kuning', 'lontong', 'ketupat',
-            'roti', 'serabi', 'kue', 'gudeg', 'kolak'
-        ]
-        
-        indo_lunch = [
-            'nasi', 'bakso', 'soto', 'gado-gado', 'pecel', 'rendang',
-            'ayam', 'sate', 'ikan', 'sayur', 'sambal', 'tumis'
-        ]
-        
-        indo_dinner = [
-            'lele', 'bakar', 'goreng', 'geprek', 'rica', 'teri',
-            'tahu', 'tempe', 'terong', 'lalapan', 'sup'
-        ]
-        
-        indo_snack = [
-            'keripik', 'kerupuk', 'kacang', 'gorengan', 'cireng',
-            'bakwan', 'pisang', 'tempe mendoan', 'tahu gejrot'
-        ]
-        
-        # Combine keywords
-        breakfast_keywords.extend(indo_breakfast)
-        lunch_keywords.extend(indo_lunch)
-        dinner_keywords.extend(indo_dinner)
-        snack_keywords.extend(indo_snack)
-        
-        count = 0
-        mappings = 0
-        
-        for food in foods:
-            food_id = food['id']
-            name = food['name'].lower() if food['name'] else ''
-            category = food['category'].lower() if food['category'] else ''
-            
-            # Check if the food matches any meal type
-            meal_types = []
-            
-            for keyword in breakfast_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('breakfast')
-                    break
-            
-            for keyword in lunch_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('lunch')
-                    break
-            
-            for keyword in dinner_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('dinner')
-                    break
-            
-            for keyword in snack_keywords:
-                if keyword.lower() in name or keyword.lower() in category:
-                    meal_types.append('snack')
-                    break
-            
-            # Add mappings to database
-            for meal_type in meal_types:
-                try:
-                    cursor.execute(
-                        """
-                        INSERT OR IGNORE INTO food_meal_types (food_id, meal_type_id)
-                        SELECT ?, id FROM meal_types WHERE name = ?
-                        """,
-                        (food_id, meal_type)
-                    )
-                    mappings += 1
-                except Exception as e:
-                    logger.warning(f"Error mapping food to meal type: {e}")
-            
-            count += 1
-            if count % 1000 == 0:
-                print(f"\rProcessed {count} foods, created {mappings} mappings", end='')
-        
-        conn.commit()
-        print(f"\nCreated {mappings} meal type mappings for {count} foods")
-        return mappings
+        stats = classify_meal_types(food_db._get_connection(), on_progress=report)
+        print(f"\nCreated {stats['mappings']} meal type mappings for {stats['foods']} foods")
+        return stats['mappings']
     
     except Exception as e:
         logger.error(f"Error mapping foods to meal types: {e}")
@@ -33,6 +33,9 @@ def rebuild_database():
         if table_name != 'sqlite_sequence':  # Don't drop the SQLite internal table
             cursor.execute(f"DROP TABLE IF EXISTS {table_name};")
     
+    # Indexes went away with the tables, so schema migrations must run again
+    cursor.execute("PRAGMA user_version = 0;")
+    
     # Commit changes and close connection
     conn.commit()
     conn.close()